@@ -7,7 +7,7 @@ import pandas as pd
 from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta  # For month/year parsing
 from grafana_api import GrafanaAPI
-from databricks_client import execute_databricks_query  # Import the function from databricks_client
+from databricks_client import execute_databricks_query, prewarm_schemas  # Import the functions from databricks_client
 from config import (
     DEBUG, SECRET_KEY, GEMINI_API_KEY, GEMINI_API_ENDPOINT, GEMINI_MODEL_NAME, 
     USE_MCP, MCP_HOST, MCP_PORT, START_MCP_SERVER, GEMINI_TEMPERATURE, 
@@ -139,6 +139,9 @@ if USE_MCP:
 else:
     logger.info("MCP integration is disabled")
 
+# Warm the Databricks catalog for DATABRICKS_PREWARM_TABLES ahead of the first query
+prewarm_schemas()
+
 # Global testing mode flag for Gemini API
 GEMINI_TESTING_MODE = False
 GEMINI_MOCK_RESPONSE = "## Mock Insights from Gemini API\nThis is a mock response used during testing to avoid real API calls."
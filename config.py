@@ -3,55 +3,136 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-# Grafana settings
-GRAFANA_URL = os.environ.get('GRAFANA_URL', 'http://localhost:3000')
-GRAFANA_SERVICE_TOKEN = os.environ.get('GRAFANA_SERVICE_TOKEN', '')
-GRAFANA_ORG_ID = os.environ.get('GRAFANA_ORG_ID', '1')
-GRAFANA_COST_DASHBOARD_ID = os.environ.get('GRAFANA_COST_DASHBOARD_ID', '')
-
-# Gemini API settings
-GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
-# Read the API URL from environment, then use it to construct the endpoint
-GEMINI_API_URL = os.environ.get('GEMINI_API_URL', 'https://generativelanguage.googleapis.com/v1beta')
+def _parse_bool(value):
+    return value.lower() == 'true'
+
+def _parse_list(value):
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+# Coercers applied to raw environment strings, keyed by schema type
+_CO = {
+    'str': str,
+    'int': int,
+    'float': float,
+    'bool': _parse_bool,
+    'list': _parse_list,
+}
+
+# (name, type, default) for every setting read from the environment.
+# Defaults are already typed and are used as-is when the variable is unset.
+SCHEMA = (
+    # Grafana settings
+    ('GRAFANA_URL', 'str', 'http://localhost:3000'),
+    ('GRAFANA_SERVICE_TOKEN', 'str', ''),
+    ('GRAFANA_ORG_ID', 'str', '1'),
+    ('GRAFANA_COST_DASHBOARD_ID', 'str', ''),
+    # Persistent response cache: 'disk', 'redis' or unset, plus its directory or URL
+    ('GRAFANA_CACHE_BACKEND', 'str', ''),
+    ('GRAFANA_CACHE_URL', 'str', ''),
+
+    # Gemini API settings
+    ('GEMINI_API_KEY', 'str', None),
+    # Read the API URL from environment, then use it to construct the endpoint
+    ('GEMINI_API_URL', 'str', 'https://generativelanguage.googleapis.com/v1beta'),
+    # Model name will be set dynamically or in the calling function
+    ('GEMINI_MODEL_NAME', 'str', 'gemini-2.0-flash-thinking-exp'),
+
+    # Gemini API advanced configuration
+    ('GEMINI_TEMPERATURE', 'float', 0.2),  # Lower temperature for more precise recommendations
+    ('GEMINI_TOP_P', 'float', 0.95),  # Slightly lower top_p for more focused outputs
+    ('GEMINI_TOP_K', 'int', 40),  # Higher top_k for better SQL optimizations
+    ('GEMINI_MAX_OUTPUT_TOKENS', 'int', 8192),  # Increased token limit for detailed SQL recommendations
+    # Gemini 2.5 specific parameters
+    ('GEMINI_RESPONSE_MIME_TYPE', 'str', 'text/plain'),
+    ('GEMINI_SAFETY_SETTINGS', 'str', '{}'),
+
+    # Databricks SQL Warehouse settings
+    ('DATABRICKS_SERVER_HOSTNAME', 'str', ''),
+    ('DATABRICKS_HTTP_PATH', 'str', ''),
+    ('DATABRICKS_ACCESS_TOKEN', 'str', ''),
+    # Comma-separated list of tables whose schemas are prefetched in the background
+    ('DATABRICKS_PREWARM_TABLES', 'list', []),
+
+    # MCP Server settings
+    ('USE_MCP', 'bool', True),
+    ('MCP_HOST', 'str', 'localhost'),
+    ('MCP_PORT', 'int', 8090),
+    ('START_MCP_SERVER', 'bool', True),
+    # Upper bound on MCP actions executing at once
+    ('MCP_WORKERS', 'int', 32),
+    # MCP server implementation: 'http' (standard library) or 'asgi' (needs uvicorn and starlette)
+    ('MCP_SERVER', 'str', 'http'),
+
+    # Email settings
+    ('MAIL_SERVER', 'str', 'smtp.gmail.com'),
+    ('MAIL_PORT', 'int', 587),
+    ('MAIL_USE_TLS', 'bool', True),
+    ('MAIL_USE_SSL', 'bool', False),
+    ('MAIL_USERNAME', 'str', ''),
+    ('MAIL_PASSWORD', 'str', ''),
+    ('MAIL_DEFAULT_SENDER', 'str', ''),
+    ('USE_RECIPIENT_AS_SENDER', 'bool', False),
+
+    # Application settings
+    ('DEBUG', 'bool', False),
+    ('SECRET_KEY', 'str', 'your-secret-key'),
+)
+
+def _load(env):
+    """Parse every schema entry from a single environment snapshot."""
+    config = {}
+    for name, kind, default in SCHEMA:
+        raw = env.get(name)
+        config[name] = default if raw is None else _CO[kind](raw)
+    return config
+
+# All settings as one dict, also exposed as module attributes below
+CONFIG = _load(os.environ)
+
+# Module-level names for `from config import ...`; assigned explicitly so
+# linters and IDEs can resolve them
+GRAFANA_URL = CONFIG['GRAFANA_URL']
+GRAFANA_SERVICE_TOKEN = CONFIG['GRAFANA_SERVICE_TOKEN']
+GRAFANA_ORG_ID = CONFIG['GRAFANA_ORG_ID']
+GRAFANA_COST_DASHBOARD_ID = CONFIG['GRAFANA_COST_DASHBOARD_ID']
+GRAFANA_CACHE_BACKEND = CONFIG['GRAFANA_CACHE_BACKEND']
+GRAFANA_CACHE_URL = CONFIG['GRAFANA_CACHE_URL']
+GEMINI_API_KEY = CONFIG['GEMINI_API_KEY']
+GEMINI_API_URL = CONFIG['GEMINI_API_URL']
+GEMINI_MODEL_NAME = CONFIG['GEMINI_MODEL_NAME']
+GEMINI_TEMPERATURE = CONFIG['GEMINI_TEMPERATURE']
+GEMINI_TOP_P = CONFIG['GEMINI_TOP_P']
+GEMINI_TOP_K = CONFIG['GEMINI_TOP_K']
+GEMINI_MAX_OUTPUT_TOKENS = CONFIG['GEMINI_MAX_OUTPUT_TOKENS']
+GEMINI_RESPONSE_MIME_TYPE = CONFIG['GEMINI_RESPONSE_MIME_TYPE']
+GEMINI_SAFETY_SETTINGS = CONFIG['GEMINI_SAFETY_SETTINGS']
+DATABRICKS_SERVER_HOSTNAME = CONFIG['DATABRICKS_SERVER_HOSTNAME']
+DATABRICKS_HTTP_PATH = CONFIG['DATABRICKS_HTTP_PATH']
+DATABRICKS_ACCESS_TOKEN = CONFIG['DATABRICKS_ACCESS_TOKEN']
+DATABRICKS_PREWARM_TABLES = CONFIG['DATABRICKS_PREWARM_TABLES']
+USE_MCP = CONFIG['USE_MCP']
+MCP_HOST = CONFIG['MCP_HOST']
+MCP_PORT = CONFIG['MCP_PORT']
+START_MCP_SERVER = CONFIG['START_MCP_SERVER']
+MCP_WORKERS = CONFIG['MCP_WORKERS']
+MCP_SERVER = CONFIG['MCP_SERVER']
+MAIL_SERVER = CONFIG['MAIL_SERVER']
+MAIL_PORT = CONFIG['MAIL_PORT']
+MAIL_USE_TLS = CONFIG['MAIL_USE_TLS']
+MAIL_USE_SSL = CONFIG['MAIL_USE_SSL']
+MAIL_USERNAME = CONFIG['MAIL_USERNAME']
+MAIL_PASSWORD = CONFIG['MAIL_PASSWORD']
+MAIL_DEFAULT_SENDER = CONFIG['MAIL_DEFAULT_SENDER']
+USE_RECIPIENT_AS_SENDER = CONFIG['USE_RECIPIENT_AS_SENDER']
+DEBUG = CONFIG['DEBUG']
+SECRET_KEY = CONFIG['SECRET_KEY']
+# Every SCHEMA entry needs its line above
+assert all(name in globals() for name, _, _ in SCHEMA), "config.SCHEMA setting without a module-level name"
+
 # Define the full endpoint that will be used by the code
 GEMINI_API_ENDPOINT = GEMINI_API_URL  # For backward compatibility with existing code
-# Model name will be set dynamically or in the calling function
-GEMINI_MODEL_NAME = os.environ.get('GEMINI_MODEL_NAME', 'gemini-2.0-flash-thinking-exp')
-
-# Gemini API advanced configuration
-GEMINI_TEMPERATURE = float(os.environ.get('GEMINI_TEMPERATURE', '0.2'))  # Lower temperature for more precise recommendations
-GEMINI_TOP_P = float(os.environ.get('GEMINI_TOP_P', '0.95'))  # Slightly lower top_p for more focused outputs
-GEMINI_TOP_K = int(os.environ.get('GEMINI_TOP_K', '40'))     # Higher top_k for better SQL optimizations
-GEMINI_MAX_OUTPUT_TOKENS = int(os.environ.get('GEMINI_MAX_OUTPUT_TOKENS', '8192'))  # Increased token limit for detailed SQL recommendations
-# Gemini 2.5 specific parameters
-GEMINI_RESPONSE_MIME_TYPE = os.environ.get('GEMINI_RESPONSE_MIME_TYPE', 'text/plain')
-GEMINI_SAFETY_SETTINGS = os.environ.get('GEMINI_SAFETY_SETTINGS', '{}')
-
-# Databricks SQL Warehouse settings
-DATABRICKS_SERVER_HOSTNAME = os.environ.get('DATABRICKS_SERVER_HOSTNAME', '')
-DATABRICKS_HTTP_PATH = os.environ.get('DATABRICKS_HTTP_PATH', '')
-DATABRICKS_ACCESS_TOKEN = os.environ.get('DATABRICKS_ACCESS_TOKEN', '')
-
-# MCP Server settings
-USE_MCP = os.environ.get('USE_MCP', 'True').lower() == 'true'
-MCP_HOST = os.environ.get('MCP_HOST', 'localhost')
-MCP_PORT = int(os.environ.get('MCP_PORT', '8090'))
-START_MCP_SERVER = os.environ.get('START_MCP_SERVER', 'True').lower() == 'true'
-
-# Email settings
-MAIL_SERVER = os.environ.get('MAIL_SERVER', 'smtp.gmail.com')
-MAIL_PORT = int(os.environ.get('MAIL_PORT', '587'))
-MAIL_USE_TLS = os.environ.get('MAIL_USE_TLS', 'True').lower() == 'true'
-MAIL_USE_SSL = os.environ.get('MAIL_USE_SSL', 'False').lower() == 'true'
-MAIL_USERNAME = os.environ.get('MAIL_USERNAME', '')
-MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD', '')
-MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER', '')
-USE_RECIPIENT_AS_SENDER = os.environ.get('USE_RECIPIENT_AS_SENDER', 'False').lower() == 'true'
-
-# Application settings
-DEBUG = os.environ.get('DEBUG', 'False').lower() == 'true'
-SECRET_KEY = os.environ.get('SECRET_KEY', 'your-secret-key')
+CONFIG['GEMINI_API_ENDPOINT'] = GEMINI_API_ENDPOINT
 
 # Validate essential configuration
 if not all([GRAFANA_URL, GRAFANA_SERVICE_TOKEN, GEMINI_API_KEY]):
-    raise ValueError("Missing essential environment variables (Grafana URL/Token, Gemini API Key)")
\ No newline at end of file
+    raise ValueError("Missing essential environment variables (Grafana URL/Token, Gemini API Key)")
@@ -0,0 +1,44 @@
+"""
+pytest configuration for running the unittest suites in parallel with pytest-xdist
+
+Test classes that talk to Grafana are marked as integration tests and pinned
+to one xdist group so they run on the same worker and share its Flask client,
+GrafanaAPI and pooled session; the remaining classes are spread across the
+other workers. Outside integration tests every requests call is intercepted,
+so a missing mock fails instead of reaching the network.
+"""
+import pytest
+import requests_mock
+
+# Test classes that share module-level Grafana state
+GRAFANA_CLASSES = frozenset(('GrafanaCostDashboardE2ETests', 'GrafanaAPIIntegrationTests'))
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "xdist_group(name): run every test of the group on one xdist worker")
+    config.addinivalue_line("markers", "integration: test may make real HTTP requests")
+
+def pytest_collection_modifyitems(config, items):
+    """Mark every Grafana-backed test as integration and put it in the grafana_live xdist group"""
+    for item in items:
+        if item.cls is not None and item.cls.__name__ in GRAFANA_CLASSES:
+            item.add_marker(pytest.mark.integration)
+            item.add_marker(pytest.mark.xdist_group("grafana_live"))
+
+@pytest.fixture(autouse=True)
+def run_cache(request):
+    """Expose pytest's cross-run cache to unittest-style tests as self.run_cache"""
+    if request.instance is not None:
+        request.instance.run_cache = getattr(request.config, 'cache', None)
+
+@pytest.fixture(autouse=True)
+def block_network(request):
+    """Route requests through requests_mock for every non-integration test
+    
+    Unregistered URLs raise NoMockAddress; tests register the responses they
+    need with their own requests_mock.Mocker.
+    """
+    if request.node.get_closest_marker('integration'):
+        yield None
+        return
+    with requests_mock.Mocker() as mocker:
+        yield mocker
@@ -1,12 +1,67 @@
 import pandas as pd
 from databricks import sql as databricks_sql
-from config import DATABRICKS_SERVER_HOSTNAME, DATABRICKS_HTTP_PATH, DATABRICKS_ACCESS_TOKEN
+from config import DATABRICKS_SERVER_HOSTNAME, DATABRICKS_HTTP_PATH, DATABRICKS_ACCESS_TOKEN, DATABRICKS_PREWARM_TABLES
 import logging
+import threading
+from typing import Iterable
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Tables prewarm_schemas has already been asked to warm
+_prewarmed: set[str] = set()
+_prewarm_lock = threading.Lock()
+
+def _connect():
+    """Open a new Databricks SQL connection using the configured credentials."""
+    return databricks_sql.connect(
+        server_hostname=DATABRICKS_SERVER_HOSTNAME,
+        http_path=DATABRICKS_HTTP_PATH,
+        access_token=DATABRICKS_ACCESS_TOKEN
+    )
+
+def _prewarm_worker(tables: list[str]) -> None:
+    """Run a zero-row query against each table so the warehouse loads its metadata."""
+    try:
+        with _connect() as connection:
+            with connection.cursor() as cursor:
+                for table in tables:
+                    try:
+                        cursor.execute(f"SELECT * FROM {table} LIMIT 0")
+                        cursor.fetchall()
+                        logger.info(f"Prewarmed catalog metadata for {table}")
+                    except databricks_sql.exc.Error as e:
+                        logger.warning(f"Could not prewarm schema for {table}: {e}")
+    except Exception as e:
+        logger.warning(f"Schema prewarm failed: {e}")
+
+def prewarm_schemas(tables: Iterable[str] | None = None) -> threading.Thread | None:
+    """
+    Warms the warehouse-side catalog for the given tables in a background thread.
+
+    Only Databricks' own metadata caches are warmed; nothing is kept in this
+    process. Call it at startup so it runs ahead of the first query rather
+    than racing it.
+
+    Args:
+        tables: Fully qualified table names; defaults to DATABRICKS_PREWARM_TABLES.
+
+    Returns:
+        The started daemon thread, or None if there was nothing to prewarm.
+    """
+    if not all([DATABRICKS_SERVER_HOSTNAME, DATABRICKS_HTTP_PATH, DATABRICKS_ACCESS_TOKEN]):
+        return None
+    with _prewarm_lock:
+        pending = [t for t in (DATABRICKS_PREWARM_TABLES if tables is None else tables)
+                   if t and t not in _prewarmed]
+        _prewarmed.update(pending)
+    if not pending:
+        return None
+    thread = threading.Thread(target=_prewarm_worker, args=(pending,), daemon=True)
+    thread.start()
+    return thread
+
 def execute_databricks_query(query: str) -> pd.DataFrame | str:
     """
     Connects to Databricks SQL Warehouse and executes the given query.
@@ -25,11 +80,7 @@ def execute_databricks_query(query: str) -> pd.DataFrame | str:
 
     try:
         logger.info(f"Attempting to connect to Databricks host: {DATABRICKS_SERVER_HOSTNAME}")
-        with databricks_sql.connect(
-            server_hostname=DATABRICKS_SERVER_HOSTNAME,
-            http_path=DATABRICKS_HTTP_PATH,
-            access_token=DATABRICKS_ACCESS_TOKEN
-        ) as connection:
+        with _connect() as connection:
             logger.info("Successfully connected to Databricks.")
             with connection.cursor() as cursor:
                 logger.info(f"Executing query: {query[:100]}...") # Log first 100 chars
@@ -1,70 +1,576 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib3.util.request import ACCEPT_ENCODING
 import json
+import re
+import asyncio
+import threading
+import concurrent.futures
+import orjson
+import urllib3
+import numpy as np
+import logging
+from cachetools import TTLCache
+from functools import cached_property, lru_cache
+from types import MappingProxyType
+from urllib.parse import urlsplit
+from dataclasses import dataclass
+from datetime import datetime
 from config import GRAFANA_URL, GRAFANA_SERVICE_TOKEN, GRAFANA_ORG_ID
+from grafana_cache import backend_from_config, cached, cached_key
+
+logger = logging.getLogger(__name__)
+
+try:
+    import ahocorasick
+except ImportError:  # pyahocorasick is optional; fall back to compiled regexes
+    ahocorasick = None
+
+try:
+    import ijson
+except ImportError:  # ijson is optional; panels are then read from the full dashboard
+    ijson = None
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp is only needed for AsyncGrafanaAPI
+    aiohttp = None
+
+# (connect, read) timeout in seconds for Grafana HTTP calls
+REQUEST_TIMEOUT = (3.05, 10)
+
+# Title terms that place a panel in each metric category
+PANEL_CATEGORY_TERMS = {
+    'cost': ('cost', 'expense', 'spend', 'budget', 'billing'),
+    'compute': ('compute', 'cpu', 'instance', 'vm', 'ec2', 'server'),
+    'storage': ('storage', 'disk', 's3', 'ebs', 'volume', 'blob'),
+    'network': ('network', 'bandwidth', 'transfer', 'egress', 'ingress', 'traffic'),
+    'database': ('database', 'db', 'rds', 'sql', 'nosql', 'dynamo', 'cosmos', 'mongo'),
+    'serverless': ('serverless', 'lambda', 'function', 'azure function', 'cloud function', 'fargate'),
+}
+
+# Panel keys kept by get_dashboard_panels; the rest (targets, options, ...) is dropped
+PANEL_FIELDS = ('id', 'type', 'title')
+
+# Title words or tags that mark a whole dashboard as cost-related
+COST_DASHBOARD_TERMS = ('cost', 'expense', 'billing', 'finance', 'budget')
+
+def _build_term_matcher(terms):
+    """Build a predicate telling whether a lowercased string contains any of terms
+    
+    Uses a single Aho-Corasick automaton when pyahocorasick is installed,
+    otherwise one precompiled alternation regex.
+    """
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for term in terms:
+            automaton.add_word(term, term)
+        automaton.make_automaton()
+        
+        def match(text_lc):
+            return next(automaton.iter(text_lc), None) is not None
+        return match
+    
+    pattern = re.compile('|'.join(map(re.escape, terms)))
+    
+    def match(text_lc):
+        return pattern.search(text_lc) is not None
+    return match
+
+# True if a lowercased title mentions any COST_DASHBOARD_TERMS
+has_cost_term = _build_term_matcher(COST_DASHBOARD_TERMS)
+
+def _build_category_matcher():
+    """Build a function mapping a lowercased title to its set of categories
+    
+    Uses a single Aho-Corasick automaton over every term when pyahocorasick
+    is installed, otherwise one precompiled alternation regex per category.
+    """
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for category, terms in PANEL_CATEGORY_TERMS.items():
+            for term in terms:
+                if term in automaton:
+                    automaton.get(term).add(category)
+                else:
+                    automaton.add_word(term, {category})
+        automaton.make_automaton()
+        
+        def match(title_lc):
+            found = set()
+            for _, categories in automaton.iter(title_lc):
+                found |= categories
+            return found
+        return match
+    
+    patterns = {
+        category: re.compile('|'.join(map(re.escape, terms)))
+        for category, terms in PANEL_CATEGORY_TERMS.items()
+    }
+    
+    def match(title_lc):
+        return {category for category, pattern in patterns.items() if pattern.search(title_lc)}
+    return match
+
+_match_categories = _build_category_matcher()
+
+def _classify_panels(panels):
+    """Bucket panels by category in a single pass over their titles
+    
+    A panel lands in every category whose terms appear in its title.
+    """
+    buckets = {category: [] for category in PANEL_CATEGORY_TERMS}
+    for panel in panels:
+        for category in _match_categories(panel.get('title', '').lower()):
+            buckets[category].append(panel)
+    return buckets
+
+# Sample trend breakdown: category names, their integer percentages and
+# the matching ratios applied to the current total in one multiply
+TREND_BREAKDOWN_CATEGORIES = ('Compute', 'Storage', 'Network', 'Other')
+TREND_BREAKDOWN_PERCENTAGES = (45, 30, 15, 10)
+_TREND_BREAKDOWN_RATIOS = np.array(TREND_BREAKDOWN_PERCENTAGES, dtype=np.float64) / 100
+
+# Lookup tables for the sample per-panel attributes, indexed by panel id
+_INSTANCE_TYPES = ('t3.small', 't3.medium', 't3.large')  # panel_id % 3
+_STORAGE_TYPES = ('Standard', 'SSD', 'Archive')  # panel_id % 3
+_REGION_PREFIX = ('us', 'eu')
+_REGION_DIR = ('east', 'west')
+# Region depends on panel_id % 2 and panel_id % 3, so panel_id % 6 selects it
+_SAMPLE_REGIONS = tuple(f"{_REGION_PREFIX[i & 1]}-{_REGION_DIR[i & 1]}-{1 + i % 3}" for i in range(6))
+
+# Database title terms in priority order; the earliest entry wins when a
+# title mentions several engines
+_DB_TERMS = (
+    ('mysql', 'MySQL/MariaDB'),
+    ('maria', 'MySQL/MariaDB'),
+    ('postgres', 'PostgreSQL'),
+    ('sql server', 'SQL Server'),
+    ('mssql', 'SQL Server'),
+    ('oracle', 'Oracle'),
+    ('dynamo', 'DynamoDB'),
+    ('cosmos', 'CosmosDB'),
+    ('mongo', 'MongoDB'),
+    ('redis', 'Redis'),
+    ('elastic', 'Elasticsearch'),
+)
+
+def _build_database_matcher():
+    """Build a function mapping a lowercased title to its database type"""
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for priority, (term, name) in enumerate(_DB_TERMS):
+            automaton.add_word(term, (priority, name))
+        automaton.make_automaton()
+        
+        def match(title_lc):
+            best = min((hit for _, hit in automaton.iter(title_lc)), default=None)
+            return best[1] if best else 'Other'
+        return match
+    
+    def match(title_lc):
+        for term, name in _DB_TERMS:
+            if term in title_lc:
+                return name
+        return 'Other'
+    return match
+
+_match_database_type = _build_database_matcher()
+
+@dataclass(slots=True)
+class Metric:
+    """Fields shared by every metric; supports dict-style reads for existing callers"""
+    name: str
+    value: float
+    unit: str
+    timestamp: str
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def to_dict(self):
+        """Plain dict with the fields in declaration order"""
+        return {field: getattr(self, field) for field in self.__dataclass_fields__}
+
+@dataclass(slots=True)
+class CostMetric(Metric):
+    source: str
+
+@dataclass(slots=True)
+class ComputeCostMetric(Metric):
+    cpu_usage: float
+    memory_usage: float
+    instance_type: str
+    region: str
+
+@dataclass(slots=True)
+class StorageCostMetric(Metric):
+    storage_type: str
+    volume_size: int
+    read_ops: int
+    write_ops: int
+
+@dataclass(slots=True)
+class NetworkCostMetric(Metric):
+    data_transfer_in: int
+    data_transfer_out: int
+    region: str
+
+@dataclass(slots=True)
+class DatabaseCostMetric(CostMetric):
+    database_type: str
+    database_instance_count: int
+
+@dataclass(slots=True)
+class ServerlessCostMetric(CostMetric):
+    function_type: str
+    invocation_count: int
+    avg_execution_time_ms: float
+
+# Categories get_all_category_metrics can fetch; 'cost' is the overall get_cost_metrics
+COST_METRIC_KINDS = ('cost', 'compute', 'storage', 'network', 'database', 'serverless')
+
+def _metric_list(metric_cls):
+    """decode hook for cached(): rebuild a list of metric_cls from its JSON dicts"""
+    return lambda items: [metric_cls(**item) for item in items]
+
+def _sum_values(metrics):
+    """Sum the 'value' of every metric (missing values count as 0)"""
+    values = np.fromiter((m.get('value', 0) for m in metrics), dtype=np.float64, count=len(metrics))
+    return float(values.sum())
+
+@lru_cache(maxsize=1024)
+def _embed_url(base_url, org_id, dashboard_uid, theme, from_time, to_time):
+    """Kiosk-mode embed URL; pure in its arguments, so safe to memoize"""
+    return f"{base_url}/d/{dashboard_uid}?orgId={org_id}&theme={theme}&from={from_time}&to={to_time}&kiosk"
+
+def _retry_policy():
+    """Retry policy shared by the session adapter and the urllib3 pool"""
+    return Retry(total=3, backoff_factor=0.2, status_forcelist=[429, 502, 503, 504])
 
 class GrafanaAPI:
-    def __init__(self, base_url=GRAFANA_URL, service_token=GRAFANA_SERVICE_TOKEN, org_id=GRAFANA_ORG_ID):
+    # Default cache lifetime in seconds per kind of response: the dashboard
+    # list barely changes, cost figures should stay fresh
+    _TTLS = MappingProxyType({'dashboard': 30, 'search': 300, 'cost_metrics': 15, 'trend': 60})
+
+    def __init__(self, base_url=GRAFANA_URL, service_token=GRAFANA_SERVICE_TOKEN, org_id=GRAFANA_ORG_ID, use_pool=True, cache_backend=None, ttl_overrides=None):
         self.base_url = base_url
-        self.headers = {
-            'Authorization': f'Bearer {service_token}',
-            'Content-Type': 'application/json',
-            'Accept': 'application/json'
-        }
+        self._service_token = service_token
         self.org_id = org_id
+        
+        # Keep-alive session for every requests-based call
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=50, max_retries=_retry_policy())
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        
+        # Plain GETs go straight through a urllib3 pool; set use_pool=False
+        # to fall back to the requests session when debugging
+        self.use_pool = use_pool
+        self._base_path = urlsplit(base_url).path.rstrip('/')
+        self._pool = urllib3.connection_from_url(
+            base_url,
+            maxsize=10,
+            headers=dict(self.headers),
+            retries=_retry_policy(),
+            timeout=urllib3.Timeout(connect=REQUEST_TIMEOUT[0], read=REQUEST_TIMEOUT[1])
+        ) if use_pool else None
+        
+        # Per-kind TTLs, e.g. ttl_overrides={'cost_metrics': 5}
+        self.ttls = {**self._TTLS, **(ttl_overrides or {})}
+        
+        # Short-lived response caches so repeated metric calls on the same
+        # dashboard share one fetch
+        self._dash_cache = TTLCache(maxsize=512, ttl=self.ttls['dashboard'])
+        self._search_cache = TTLCache(maxsize=512, ttl=self.ttls['search'])
+        # Projected panel headers (PANEL_FIELDS only) per dashboard UID
+        self._panels_cache = TTLCache(maxsize=512, ttl=self.ttls['dashboard'])
+        self._cache_lock = threading.Lock()
+        # Fetches currently on the wire, so concurrent misses share one request
+        self._inflight: dict[tuple, concurrent.futures.Future] = {}
+        # path -> (ETag, body) for conditional re-fetches once the TTL expires
+        self._etags = TTLCache(maxsize=512, ttl=3600)
+        # Panel classification keyed by id() of the panels list; each entry
+        # holds the list itself so the id cannot be reused while cached
+        self._classified = TTLCache(maxsize=512, ttl=self.ttls['dashboard'])
+        # Optional persistent cache (disk/Redis) shared across restarts and workers
+        self.cache_backend = cache_backend if cache_backend is not None else backend_from_config()
+
+    @cached_property
+    def headers(self):
+        """Read-only request headers, built once per client"""
+        return MappingProxyType({
+            'Authorization': f'Bearer {self._service_token}',
+            'Content-Type': 'application/json',
+            'Accept': 'application/json',
+            # gzip/deflate, plus br/zstd when their decoders are installed
+            'Accept-Encoding': ACCEPT_ENCODING
+        })
+
+    def _get(self, path):
+        """Issue a GET against the Grafana API and return the decoded JSON body"""
+        if not self.use_pool:
+            response = self.session.get(f"{self.base_url}{path}", timeout=REQUEST_TIMEOUT)
+            response.raise_for_status()
+            return orjson.loads(response.content)
+        
+        response = self._pool.request('GET', f"{self._base_path}{path}")
+        if response.status != 200:
+            raise requests.exceptions.HTTPError(
+                f"{response.status} Error: {response.reason} for url: {self.base_url}{path}"
+            )
+        return orjson.loads(response.data)
+
+    def _get_conditional(self, path):
+        """GET path with If-None-Match when we hold an ETag for it
+        
+        On 304 Not Modified the previously stored body is returned without
+        downloading or parsing it again. Responses without an ETag are
+        returned as-is and not remembered.
+        """
+        with self._cache_lock:
+            stored = self._etags.get(path)
+        extra = {'If-None-Match': stored[0]} if stored else {}
+        
+        if self.use_pool:
+            response = self._pool.request('GET', f"{self._base_path}{path}", headers={**self.headers, **extra})
+            status, etag = response.status, response.headers.get('ETag')
+        else:
+            response = self.session.get(f"{self.base_url}{path}", headers=extra, timeout=REQUEST_TIMEOUT)
+            status, etag = response.status_code, response.headers.get('ETag')
+        
+        if status == 304 and stored:
+            return stored[1]
+        if status != 200:
+            raise requests.exceptions.HTTPError(
+                f"{status} Error: {response.reason} for url: {self.base_url}{path}"
+            )
+        
+        body = orjson.loads(response.data if self.use_pool else response.content)
+        if etag:
+            with self._cache_lock:
+                self._etags[path] = (etag, body)
+        return body
+
+    def _cached(self, cache, key, fetch):
+        """Return cache[key], calling fetch() and storing its result on a miss
+        
+        Concurrent misses for the same key wait on the first caller's fetch
+        instead of issuing their own request.
+        """
+        inflight_key = (id(cache), key)
+        with self._cache_lock:
+            if key in cache:
+                return cache[key]
+            future = self._inflight.get(inflight_key)
+            owner = future is None
+            if owner:
+                future = concurrent.futures.Future()
+                self._inflight[inflight_key] = future
+        
+        if not owner:
+            return future.result()
+        
+        try:
+            value = fetch()
+        except Exception as e:
+            with self._cache_lock:
+                self._inflight.pop(inflight_key, None)
+            future.set_exception(e)
+            raise
+        with self._cache_lock:
+            cache[key] = value
+            self._inflight.pop(inflight_key, None)
+        future.set_result(value)
+        return value
+
+    def invalidate(self, uid=None):
+        """Drop cached responses for one dashboard UID, or everything if uid is None
+        
+        Stored ETags are kept: the next fetch revalidates with If-None-Match,
+        and Grafana only answers 304 if the dashboard really is unchanged.
+        """
+        with self._cache_lock:
+            if uid is None:
+                self._dash_cache.clear()
+                self._panels_cache.clear()
+            else:
+                self._dash_cache.pop(uid, None)
+                self._panels_cache.pop(uid, None)
+            self._search_cache.clear()
+        
+        if self.cache_backend is not None:
+            try:
+                if uid is None:
+                    self.cache_backend.clear()
+                else:
+                    self.cache_backend.delete(cached_key(self, 'dashboard', self._fetch_dashboard.__name__, uid))
+                    self.cache_backend.delete(cached_key(self, 'search', self._fetch_all_dashboards.__name__))
+            except Exception as e:
+                logger.warning(f"Could not invalidate persistent cache: {e}")
+
+    def invalidate_category(self, kind):
+        """Drop every cached response of one kind ('dashboard', 'search', 'cost_metrics', 'trend')
+        
+        Call this when the underlying data is known to have changed, e.g. on
+        dashboard refresh, instead of waiting for the TTL to run out.
+        """
+        if kind not in self.ttls:
+            raise ValueError(f"Unknown cache kind: {kind}")
+        
+        with self._cache_lock:
+            if kind == 'dashboard':
+                self._dash_cache.clear()
+                self._panels_cache.clear()
+                self._classified.clear()
+                self._etags.clear()
+            elif kind == 'search':
+                self._search_cache.clear()
+        
+        if self.cache_backend is not None:
+            try:
+                self.cache_backend.clear(kind)
+            except Exception as e:
+                logger.warning(f"Could not invalidate persistent {kind} cache: {e}")
+
+    @cached('dashboard')
+    def _fetch_dashboard(self, dashboard_uid):
+        return self._get_conditional(f"/api/dashboards/uid/{dashboard_uid}")
+
+    @cached('search')
+    def _fetch_all_dashboards(self):
+        return self._get("/api/search?type=dash-db")
 
     def get_dashboard(self, dashboard_uid):
         """Get dashboard by UID"""
-        url = f"{self.base_url}/api/dashboards/uid/{dashboard_uid}"
-        response = requests.get(url, headers=self.headers)
-        if response.status_code == 200:
-            return response.json()
-        else:
-            response.raise_for_status()
+        return self._cached(self._dash_cache, dashboard_uid, lambda: self._fetch_dashboard(dashboard_uid))
     
     def get_dashboard_by_id(self, dashboard_id):
         """Get dashboard by numeric ID"""
-        url = f"{self.base_url}/api/dashboards/id/{dashboard_id}"
-        response = requests.get(url, headers=self.headers)
-        if response.status_code == 200:
-            return response.json()
-        else:
-            response.raise_for_status()
+        return self._get_conditional(f"/api/dashboards/id/{dashboard_id}")
     
+    def _stream_panels(self, path):
+        """Stream-parse dashboard.panels from a GET response with ijson
+        
+        Only the panel items are materialized; templating, annotations and
+        the rest of the dashboard JSON are skipped by the parser.
+        """
+        if self.use_pool:
+            response = self._pool.request('GET', f"{self._base_path}{path}", preload_content=False)
+            try:
+                if response.status != 200:
+                    raise requests.exceptions.HTTPError(
+                        f"{response.status} Error: {response.reason} for url: {self.base_url}{path}"
+                    )
+                return list(ijson.items(response, 'dashboard.panels.item', use_float=True))
+            finally:
+                response.release_conn()
+        
+        with self.session.get(f"{self.base_url}{path}", stream=True, timeout=REQUEST_TIMEOUT) as response:
+            response.raise_for_status()
+            response.raw.decode_content = True
+            return list(ijson.items(response.raw, 'dashboard.panels.item', use_float=True))
+
+    def _fetch_panels(self, dashboard_uid):
+        with self._cache_lock:
+            dashboard = self._dash_cache.get(dashboard_uid)
+        if dashboard is not None or ijson is None:
+            # Already have the full JSON (or no streaming parser): project it
+            if dashboard is None:
+                dashboard = self.get_dashboard(dashboard_uid)
+            panels = dashboard.get('dashboard', {}).get('panels', [])
+        else:
+            panels = self._stream_panels(f"/api/dashboards/uid/{dashboard_uid}")
+        return [{k: panel[k] for k in PANEL_FIELDS if k in panel} for panel in panels]
+
     def get_dashboard_panels(self, dashboard_uid):
-        """Get panels from a dashboard"""
-        dashboard = self.get_dashboard(dashboard_uid)
-        return dashboard.get('dashboard', {}).get('panels', [])
+        """Get panels from a dashboard
+        
+        Returns:
+            A list of panel dicts reduced to PANEL_FIELDS (id, type, title)
+        """
+        return self._cached(self._panels_cache, dashboard_uid, lambda: self._fetch_panels(dashboard_uid))
+    
+    def get_classified_panels(self, dashboard_uid):
+        """Get a dashboard's panels bucketed by cost category
+        
+        Returns:
+            Dictionary mapping each PANEL_CATEGORY_TERMS key to its panels
+        """
+        panels = self.get_dashboard_panels(dashboard_uid)
+        key = id(panels)
+        with self._cache_lock:
+            entry = self._classified.get(key)
+        if entry is not None and entry[0] is panels:
+            return entry[1]
+        buckets = _classify_panels(panels)
+        with self._cache_lock:
+            self._classified[key] = (panels, buckets)
+        return buckets
     
     def get_all_dashboards(self):
         """Get all dashboards"""
-        url = f"{self.base_url}/api/search?type=dash-db"
-        response = requests.get(url, headers=self.headers)
-        if response.status_code == 200:
-            return response.json()
-        else:
-            response.raise_for_status()
+        return self._cached(self._search_cache, "all", self._fetch_all_dashboards)
     
-    def get_cost_dashboards(self):
-        """Get dashboards related to costs (based on title or tags)"""
+    def get_dashboards_bulk(self, dashboard_uids, max_workers=8):
+        """Get several dashboards by UID in parallel
+        
+        Grafana has no batch read endpoint, so the GETs are fanned out over
+        the pooled connection; cached and in-flight UIDs are not refetched.
+        
+        Args:
+            dashboard_uids: Iterable of dashboard UIDs
+            max_workers: Maximum number of concurrent requests
+            
+        Returns:
+            Dictionary mapping each UID to its dashboard JSON
+        """
+        uids = list(dict.fromkeys(dashboard_uids))
+        if not uids:
+            return {}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(max_workers, len(uids))) as executor:
+            return dict(zip(uids, executor.map(self.get_dashboard, uids)))
+    
+    def get_cost_dashboards(self, include_panels=False):
+        """Get dashboards related to costs (based on title or tags)
+        
+        Args:
+            include_panels: If True, return (summary, panels) tuples with the
+                panels of every matching dashboard fetched in one bulk call
+        """
         all_dashboards = self.get_all_dashboards()
         cost_dashboards = [
             d for d in all_dashboards 
-            if any(cost_term in d.get('title', '').lower() 
-                  for cost_term in ['cost', 'expense', 'billing', 'finance', 'budget'])
-            or any(tag in d.get('tags', []) 
-                  for tag in ['cost', 'expense', 'billing', 'finance', 'budget'])
+            if has_cost_term(d.get('title', '').lower())
+            or any(tag in COST_DASHBOARD_TERMS for tag in d.get('tags', []))
+        ]
+        if not include_panels:
+            return cost_dashboards
+        
+        full = self.get_dashboards_bulk(d['uid'] for d in cost_dashboards)
+        return [
+            (d, full[d['uid']].get('dashboard', {}).get('panels', []))
+            for d in cost_dashboards
         ]
-        return cost_dashboards
     
     def generate_dashboard_embed_url(self, dashboard_uid, theme='light', from_time='now-7d', to_time='now'):
         """Generate URL for embedding a dashboard"""
-        return f"{self.base_url}/d/{dashboard_uid}?orgId={self.org_id}&theme={theme}&from={from_time}&to={to_time}&kiosk"
+        return _embed_url(self.base_url, self.org_id, dashboard_uid, theme, from_time, to_time)
     
-    def get_current_time_iso(self):
+    @staticmethod
+    def get_current_time_iso():
         """Get current time in ISO format"""
-        from datetime import datetime
         return datetime.now().isoformat()
     
+    @cached('cost_metrics', decode=_metric_list(CostMetric))
     def get_cost_metrics(self, dashboard_uid, period=None):
         """Get cost metrics from a dashboard
         
@@ -75,16 +581,11 @@ class GrafanaAPI:
         Returns:
             A list of cost metrics with name, value, unit, timestamp, and source
         """
-        # Get dashboard panels to extract cost metrics
-        panels = self.get_dashboard_panels(dashboard_uid)
+        # Get dashboard panels that contain cost data
+        cost_panels = self.get_classified_panels(dashboard_uid)['cost']
         
-        # Filter for panels that contain cost data
-        cost_panels = [p for p in panels if any(
-            term in p.get('title', '').lower() for term in 
-            ['cost', 'expense', 'spend', 'budget', 'billing']
-        )]
-        
-        # Extract metrics from panels
+        # Extract metrics from panels, all stamped with the same time
+        now_iso = self.get_current_time_iso()
         metrics = []
         for panel in cost_panels:
             # In a real implementation, this would query panel data using Grafana API
@@ -93,24 +594,24 @@ class GrafanaAPI:
             panel_title = panel.get('title', 'Unknown')
             
             # Sample metric (in a real implementation, this would be actual panel data)
-            metrics.append({
-                'name': f"{panel_title}",
-                'value': 100 + (panel_id * 10),  # Sample value
-                'unit': 'USD',
-                'timestamp': self.get_current_time_iso(),
-                'source': f"panel-{panel_id}"
-            })
+            metrics.append(CostMetric(
+                name=f"{panel_title}",
+                value=100 + (panel_id * 10),  # Sample value
+                unit='USD',
+                timestamp=now_iso,
+                source=f"panel-{panel_id}"
+            ))
         
         # Add total cost metric if we have cost metrics
         if metrics:
-            total = sum(metric['value'] for metric in metrics)
-            metrics.append({
-                'name': 'Total Cost',
-                'value': total,
-                'unit': 'USD',
-                'timestamp': self.get_current_time_iso(),
-                'source': 'calculated'
-            })
+            total = _sum_values(metrics)
+            metrics.append(CostMetric(
+                name='Total Cost',
+                value=total,
+                unit='USD',
+                timestamp=now_iso,
+                source='calculated'
+            ))
             
         return metrics
     
@@ -131,7 +632,7 @@ class GrafanaAPI:
         
         # Sample recommendations
         if metrics:
-            total_cost = sum(metric.get('value', 0) for metric in metrics)
+            total_cost = _sum_values(metrics)
             
             if total_cost > 1000:
                 recommendations.append(
@@ -149,6 +650,7 @@ class GrafanaAPI:
         
         return recommendations
     
+    @cached('trend')
     def get_cost_trend(self, dashboard_uid, period=None):
         """Get cost trend analysis for a dashboard
         
@@ -164,7 +666,7 @@ class GrafanaAPI:
         
         # Get current metrics
         current_metrics = self.get_cost_metrics(dashboard_uid, period)
-        current_total = sum(metric.get('value', 0) for metric in current_metrics)
+        current_total = _sum_values(current_metrics)
         
         # For demo purposes, create sample trend data
         # In a real implementation, this would query historical data
@@ -177,11 +679,12 @@ class GrafanaAPI:
             change_percentage = 0
             
         # Sample breakdown by service category
+        breakdown_values = (current_total * _TREND_BREAKDOWN_RATIOS).tolist()
         breakdown = [
-            {"category": "Compute", "value": current_total * 0.45, "percentage": 45},
-            {"category": "Storage", "value": current_total * 0.30, "percentage": 30},
-            {"category": "Network", "value": current_total * 0.15, "percentage": 15},
-            {"category": "Other", "value": current_total * 0.10, "percentage": 10}
+            {"category": category, "value": value, "percentage": percentage}
+            for category, value, percentage in zip(
+                TREND_BREAKDOWN_CATEGORIES, breakdown_values, TREND_BREAKDOWN_PERCENTAGES
+            )
         ]
         
         # Sample forecast for next period
@@ -195,6 +698,47 @@ class GrafanaAPI:
             "forecast": forecast
         }
     
+    def get_all_category_metrics(self, dashboard_uid, period=None, kinds=None, return_exceptions=False):
+        """Get every category of cost metrics for a dashboard concurrently
+        
+        Args:
+            dashboard_uid: The UID of the dashboard
+            period: Time period for metrics (e.g., 'last-30-days', 'last-7-days')
+            kinds: Optional subset of COST_METRIC_KINDS to fetch; 'cost' (the
+                overall get_cost_metrics) may also be requested
+            return_exceptions: Map a failed category to its exception instead
+                of raising, so the other categories are still returned
+            
+        Returns:
+            Dictionary mapping category name ('compute', 'storage', 'network',
+            'database', 'serverless') to its list of metrics
+            
+        Raises:
+            ValueError: If kinds names an unknown category
+        """
+        fetchers = {
+            'cost': self.get_cost_metrics,
+            'compute': self.get_compute_cost_metrics,
+            'storage': self.get_storage_cost_metrics,
+            'network': self.get_network_cost_metrics,
+            'database': self.get_database_cost_metrics,
+            'serverless': self.get_serverless_cost_metrics,
+        }
+        if kinds is None:
+            kinds = ('compute', 'storage', 'network', 'database', 'serverless')
+        unknown = set(kinds) - fetchers.keys()
+        if unknown:
+            raise ValueError(f"Unknown cost metric kind(s): {', '.join(sorted(unknown))}")
+        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+            futures = {
+                category: executor.submit(fetchers[category], dashboard_uid, period)
+                for category in kinds
+            }
+            if not return_exceptions:
+                return {category: future.result() for category, future in futures.items()}
+            return {category: future.exception() or future.result() for category, future in futures.items()}
+    
+    @cached('cost_metrics', decode=_metric_list(ComputeCostMetric))
     def get_compute_cost_metrics(self, dashboard_uid, period=None):
         """Get compute-specific cost metrics from a dashboard
         
@@ -205,35 +749,31 @@ class GrafanaAPI:
         Returns:
             A list of compute-specific cost metrics
         """
-        # Get dashboard panels to extract compute cost metrics
-        panels = self.get_dashboard_panels(dashboard_uid)
+        # Get dashboard panels that contain compute cost data
+        compute_panels = self.get_classified_panels(dashboard_uid)['compute']
         
-        # Filter for panels that contain compute cost data
-        compute_panels = [p for p in panels if any(
-            term in p.get('title', '').lower() for term in 
-            ['compute', 'cpu', 'instance', 'vm', 'ec2', 'server']
-        )]
-        
-        # Extract metrics from panels
+        # Extract metrics from panels, all stamped with the same time
+        now_iso = self.get_current_time_iso()
         metrics = []
         for panel in compute_panels:
             panel_id = panel.get('id')
             panel_title = panel.get('title', 'Unknown')
             
             # Sample metric (in a real implementation, this would be actual panel data)
-            metrics.append({
-                'name': f"{panel_title}",
-                'value': 75 + (panel_id * 8),  # Sample value
-                'unit': 'USD',
-                'timestamp': self.get_current_time_iso(),
-                'cpu_usage': 65 + (panel_id % 20),  # Sample CPU usage percentage
-                'memory_usage': 70 + (panel_id % 15),  # Sample memory usage percentage
-                'instance_type': f"t3.{'small' if panel_id % 3 == 0 else 'medium' if panel_id % 3 == 1 else 'large'}",
-                'region': f"{'us' if panel_id % 2 == 0 else 'eu'}-{'east' if panel_id % 2 == 0 else 'west'}-{1 + (panel_id % 3)}"
-            })
+            metrics.append(ComputeCostMetric(
+                name=f"{panel_title}",
+                value=75 + (panel_id * 8),  # Sample value
+                unit='USD',
+                timestamp=now_iso,
+                cpu_usage=65 + (panel_id % 20),  # Sample CPU usage percentage
+                memory_usage=70 + (panel_id % 15),  # Sample memory usage percentage
+                instance_type=_INSTANCE_TYPES[panel_id % 3],
+                region=_SAMPLE_REGIONS[panel_id % 6]
+            ))
             
         return metrics
     
+    @cached('cost_metrics', decode=_metric_list(StorageCostMetric))
     def get_storage_cost_metrics(self, dashboard_uid, period=None):
         """Get storage-specific cost metrics from a dashboard
         
@@ -244,35 +784,31 @@ class GrafanaAPI:
         Returns:
             A list of storage-specific cost metrics
         """
-        # Get dashboard panels to extract storage cost metrics
-        panels = self.get_dashboard_panels(dashboard_uid)
-        
-        # Filter for panels that contain storage cost data
-        storage_panels = [p for p in panels if any(
-            term in p.get('title', '').lower() for term in 
-            ['storage', 'disk', 's3', 'ebs', 'volume', 'blob']
-        )]
+        # Get dashboard panels that contain storage cost data
+        storage_panels = self.get_classified_panels(dashboard_uid)['storage']
         
-        # Extract metrics from panels
+        # Extract metrics from panels, all stamped with the same time
+        now_iso = self.get_current_time_iso()
         metrics = []
         for panel in storage_panels:
             panel_id = panel.get('id')
             panel_title = panel.get('title', 'Unknown')
             
             # Sample metric (in a real implementation, this would be actual panel data)
-            metrics.append({
-                'name': f"{panel_title}",
-                'value': 50 + (panel_id * 5),  # Sample value
-                'unit': 'USD',
-                'timestamp': self.get_current_time_iso(),
-                'storage_type': f"{'Standard' if panel_id % 3 == 0 else 'SSD' if panel_id % 3 == 1 else 'Archive'}",
-                'volume_size': 100 + (panel_id * 50),  # Sample volume size in GB
-                'read_ops': 5000 + (panel_id * 1000),  # Sample read operations
-                'write_ops': 2000 + (panel_id * 500)   # Sample write operations
-            })
+            metrics.append(StorageCostMetric(
+                name=f"{panel_title}",
+                value=50 + (panel_id * 5),  # Sample value
+                unit='USD',
+                timestamp=now_iso,
+                storage_type=_STORAGE_TYPES[panel_id % 3],
+                volume_size=100 + (panel_id * 50),  # Sample volume size in GB
+                read_ops=5000 + (panel_id * 1000),  # Sample read operations
+                write_ops=2000 + (panel_id * 500)   # Sample write operations
+            ))
             
         return metrics
     
+    @cached('cost_metrics', decode=_metric_list(NetworkCostMetric))
     def get_network_cost_metrics(self, dashboard_uid, period=None):
         """Get network-specific cost metrics from a dashboard
         
@@ -283,34 +819,30 @@ class GrafanaAPI:
         Returns:
             A list of network-specific cost metrics
         """
-        # Get dashboard panels to extract network cost metrics
-        panels = self.get_dashboard_panels(dashboard_uid)
-        
-        # Filter for panels that contain network cost data
-        network_panels = [p for p in panels if any(
-            term in p.get('title', '').lower() for term in 
-            ['network', 'bandwidth', 'transfer', 'egress', 'ingress', 'traffic']
-        )]
+        # Get dashboard panels that contain network cost data
+        network_panels = self.get_classified_panels(dashboard_uid)['network']
         
-        # Extract metrics from panels
+        # Extract metrics from panels, all stamped with the same time
+        now_iso = self.get_current_time_iso()
         metrics = []
         for panel in network_panels:
             panel_id = panel.get('id')
             panel_title = panel.get('title', 'Unknown')
             
             # Sample metric (in a real implementation, this would be actual panel data)
-            metrics.append({
-                'name': f"{panel_title}",
-                'value': 30 + (panel_id * 3),  # Sample value
-                'unit': 'USD',
-                'timestamp': self.get_current_time_iso(),
-                'data_transfer_in': 200 + (panel_id * 100),  # Sample inbound data in GB
-                'data_transfer_out': 400 + (panel_id * 200),  # Sample outbound data in GB
-                'region': f"{'us' if panel_id % 2 == 0 else 'eu'}-{'east' if panel_id % 2 == 0 else 'west'}-{1 + (panel_id % 3)}"
-            })
+            metrics.append(NetworkCostMetric(
+                name=f"{panel_title}",
+                value=30 + (panel_id * 3),  # Sample value
+                unit='USD',
+                timestamp=now_iso,
+                data_transfer_in=200 + (panel_id * 100),  # Sample inbound data in GB
+                data_transfer_out=400 + (panel_id * 200),  # Sample outbound data in GB
+                region=_SAMPLE_REGIONS[panel_id % 6]
+            ))
             
         return metrics
     
+    @cached('cost_metrics', decode=_metric_list(DatabaseCostMetric))
     def get_database_cost_metrics(self, dashboard_uid, period=None):
         """Get database-specific cost metrics from a dashboard
         
@@ -321,16 +853,11 @@ class GrafanaAPI:
         Returns:
             A list of database cost metrics with name, value, unit, timestamp, and source
         """
-        # Get dashboard panels to extract cost metrics
-        panels = self.get_dashboard_panels(dashboard_uid)
+        # Get dashboard panels that contain database cost data
+        db_cost_panels = self.get_classified_panels(dashboard_uid)['database']
         
-        # Filter for panels that contain database cost data
-        db_cost_panels = [p for p in panels if any(
-            term in p.get('title', '').lower() for term in 
-            ['database', 'db', 'rds', 'sql', 'nosql', 'dynamo', 'cosmos', 'mongo']
-        )]
-        
-        # Extract metrics from panels
+        # Extract metrics from panels, all stamped with the same time
+        now_iso = self.get_current_time_iso()
         metrics = []
         for panel in db_cost_panels:
             # In a real implementation, this would query panel data using Grafana API
@@ -338,54 +865,38 @@ class GrafanaAPI:
             panel_title = panel.get('title', 'Unknown')
             
             # Sample metric (in a real implementation, this would be actual panel data)
-            metrics.append({
-                'name': f"{panel_title}",
-                'value': 75 + (panel_id * 5),  # Sample value
-                'unit': 'USD',
-                'timestamp': self.get_current_time_iso(),
-                'source': f"panel-{panel_id}",
-                'database_type': self._determine_database_type(panel_title),
-                'database_instance_count': self._determine_database_instances(panel_id)
-            })
+            metrics.append(DatabaseCostMetric(
+                name=f"{panel_title}",
+                value=75 + (panel_id * 5),  # Sample value
+                unit='USD',
+                timestamp=now_iso,
+                source=f"panel-{panel_id}",
+                database_type=self._determine_database_type(panel_title),
+                database_instance_count=self._determine_database_instances(panel_id)
+            ))
         
         # Add total database cost metric if we have cost metrics
         if metrics:
-            total = sum(metric['value'] for metric in metrics)
-            metrics.append({
-                'name': 'Total Database Cost',
-                'value': total,
-                'unit': 'USD',
-                'timestamp': self.get_current_time_iso(),
-                'source': 'calculated',
-                'database_type': 'all',
-                'database_instance_count': sum(m.get('database_instance_count', 1) for m in metrics)
-            })
+            total = 0
+            total_instances = 0
+            for m in metrics:
+                total += m.value
+                total_instances += m.database_instance_count
+            metrics.append(DatabaseCostMetric(
+                name='Total Database Cost',
+                value=total,
+                unit='USD',
+                timestamp=now_iso,
+                source='calculated',
+                database_type='all',
+                database_instance_count=total_instances
+            ))
             
         return metrics
     
     def _determine_database_type(self, panel_title):
         """Helper method to determine database type from panel title"""
-        panel_title_lower = panel_title.lower()
-        if 'mysql' in panel_title_lower or 'maria' in panel_title_lower:
-            return 'MySQL/MariaDB'
-        elif 'postgres' in panel_title_lower:
-            return 'PostgreSQL'
-        elif 'sql server' in panel_title_lower or 'mssql' in panel_title_lower:
-            return 'SQL Server'
-        elif 'oracle' in panel_title_lower:
-            return 'Oracle'
-        elif 'dynamo' in panel_title_lower:
-            return 'DynamoDB'
-        elif 'cosmos' in panel_title_lower:
-            return 'CosmosDB'
-        elif 'mongo' in panel_title_lower:
-            return 'MongoDB'
-        elif 'redis' in panel_title_lower:
-            return 'Redis'
-        elif 'elastic' in panel_title_lower:
-            return 'Elasticsearch'
-        else:
-            return 'Other'
+        return _match_database_type(panel_title.lower())
     
     def _determine_database_instances(self, panel_id):
         """Helper method to determine database instance count (sample data)"""
@@ -393,6 +904,7 @@ class GrafanaAPI:
         # For this example, we'll use the panel_id to generate a sample number
         return max(1, panel_id % 5)
     
+    @cached('cost_metrics', decode=_metric_list(ServerlessCostMetric))
     def get_serverless_cost_metrics(self, dashboard_uid, period=None):
         """Get serverless-specific cost metrics from a dashboard
         
@@ -403,16 +915,11 @@ class GrafanaAPI:
         Returns:
             A list of serverless cost metrics with name, value, unit, timestamp, and source
         """
-        # Get dashboard panels to extract cost metrics
-        panels = self.get_dashboard_panels(dashboard_uid)
-        
-        # Filter for panels that contain serverless cost data
-        serverless_cost_panels = [p for p in panels if any(
-            term in p.get('title', '').lower() for term in 
-            ['serverless', 'lambda', 'function', 'azure function', 'cloud function', 'fargate']
-        )]
+        # Get dashboard panels that contain serverless cost data
+        serverless_cost_panels = self.get_classified_panels(dashboard_uid)['serverless']
         
-        # Extract metrics from panels
+        # Extract metrics from panels, all stamped with the same time
+        now_iso = self.get_current_time_iso()
         metrics = []
         for panel in serverless_cost_panels:
             # In a real implementation, this would query panel data using Grafana API
@@ -420,31 +927,38 @@ class GrafanaAPI:
             panel_title = panel.get('title', 'Unknown')
             
             # Sample metric (in a real implementation, this would be actual panel data)
-            metrics.append({
-                'name': f"{panel_title}",
-                'value': 50 + (panel_id * 3),  # Sample value
-                'unit': 'USD',
-                'timestamp': self.get_current_time_iso(),
-                'source': f"panel-{panel_id}",
-                'function_type': self._determine_serverless_type(panel_title),
-                'invocation_count': self._determine_serverless_invocations(panel_id),
-                'avg_execution_time_ms': self._determine_serverless_execution_time(panel_id)
-            })
+            metrics.append(ServerlessCostMetric(
+                name=f"{panel_title}",
+                value=50 + (panel_id * 3),  # Sample value
+                unit='USD',
+                timestamp=now_iso,
+                source=f"panel-{panel_id}",
+                function_type=self._determine_serverless_type(panel_title),
+                invocation_count=self._determine_serverless_invocations(panel_id),
+                avg_execution_time_ms=self._determine_serverless_execution_time(panel_id)
+            ))
         
         # Add total serverless cost metric if we have cost metrics
         if metrics:
-            total = sum(metric['value'] for metric in metrics)
-            metrics.append({
-                'name': 'Total Serverless Cost',
-                'value': total,
-                'unit': 'USD',
-                'timestamp': self.get_current_time_iso(),
-                'source': 'calculated',
-                'function_type': 'all',
-                'invocation_count': sum(m.get('invocation_count', 0) for m in metrics),
-                'avg_execution_time_ms': sum(m.get('avg_execution_time_ms', 0) * m.get('invocation_count', 0) 
-                                           for m in metrics) / max(1, sum(m.get('invocation_count', 0) for m in metrics))
-            })
+            # Single pass for the total, invocation count and the
+            # invocation-weighted execution time
+            total = 0
+            total_invocations = 0
+            weighted_time = 0
+            for m in metrics:
+                total += m.value
+                total_invocations += m.invocation_count
+                weighted_time += m.avg_execution_time_ms * m.invocation_count
+            metrics.append(ServerlessCostMetric(
+                name='Total Serverless Cost',
+                value=total,
+                unit='USD',
+                timestamp=now_iso,
+                source='calculated',
+                function_type='all',
+                invocation_count=total_invocations,
+                avg_execution_time_ms=weighted_time / max(1, total_invocations)
+            ))
             
         return metrics
     
@@ -472,4 +986,79 @@ class GrafanaAPI:
         """Helper method to determine serverless function execution time in ms (sample data)"""
         # In a real implementation, this would retrieve actual execution time
         # For this example, we'll use the panel_id to generate a sample number
-        return 200 + (panel_id * 10)
\ No newline at end of file
+        return 200 + (panel_id * 10)
+
+
+class AsyncGrafanaAPI:
+    """aiohttp-based client for walking many dashboards concurrently
+    
+    Use as an async context manager so the underlying session is closed:
+    
+        async with AsyncGrafanaAPI() as api:
+            dashboards = await api.get_all_dashboards_full()
+    """
+    
+    def __init__(self, base_url=GRAFANA_URL, service_token=GRAFANA_SERVICE_TOKEN, org_id=GRAFANA_ORG_ID, max_concurrency=20):
+        if aiohttp is None:
+            raise ImportError("AsyncGrafanaAPI requires the aiohttp package")
+        self.base_url = base_url
+        self.org_id = org_id
+        self.headers = {
+            'Authorization': f'Bearer {service_token}',
+            'Content-Type': 'application/json',
+            'Accept': 'application/json'
+        }
+        self.max_concurrency = max_concurrency
+        self._session = None
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+    
+    def _get_session(self):
+        """Create the pooled session on first use (it must be bound to a running loop)"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers=self.headers,
+                connector=aiohttp.TCPConnector(limit=50, keepalive_timeout=30),
+                timeout=aiohttp.ClientTimeout(sock_connect=REQUEST_TIMEOUT[0], sock_read=REQUEST_TIMEOUT[1])
+            )
+        return self._session
+    
+    async def close(self):
+        """Close the underlying HTTP session"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+    
+    async def _get(self, path):
+        """Issue a GET against the Grafana API and return the decoded JSON body"""
+        async with self._get_session().get(f"{self.base_url}{path}") as response:
+            response.raise_for_status()
+            return orjson.loads(await response.read())
+    
+    async def get_dashboard(self, dashboard_uid):
+        """Get dashboard by UID"""
+        return await self._get(f"/api/dashboards/uid/{dashboard_uid}")
+    
+    async def get_all_dashboards(self):
+        """Get all dashboards"""
+        return await self._get("/api/search?type=dash-db")
+    
+    async def get_dashboard_panels(self, dashboard_uid):
+        """Get panels from a dashboard"""
+        dashboard = await self.get_dashboard(dashboard_uid)
+        return dashboard.get('dashboard', {}).get('panels', [])
+    
+    async def get_all_dashboards_full(self):
+        """Fetch the full JSON of every dashboard, at most max_concurrency at a time"""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        async def fetch(uid):
+            async with semaphore:
+                return await self.get_dashboard(uid)
+        
+        summaries = await self.get_all_dashboards()
+        return await asyncio.gather(*[fetch(d['uid']) for d in summaries])
@@ -0,0 +1,151 @@
+"""
+Persistent Cache Backends for the Grafana API client
+
+This module provides cache backends that outlive a single process, so a new
+worker can start with the dashboard responses an earlier one already fetched.
+Values are stored as orjson-encoded bytes under SHA-1 request-hash keys.
+"""
+import hashlib
+import logging
+import os
+from abc import ABC, abstractmethod
+from functools import wraps
+
+import orjson
+
+from config import GRAFANA_CACHE_BACKEND, GRAFANA_CACHE_URL
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Namespace prefix so our keys can be found (and cleared) in a shared store
+KEY_PREFIX = "grafanacost:"
+
+def make_key(base_url, kind, *parts):
+    """Build the cache key for one request: '<prefix><kind>:' + sha1 of 'base_url|kind|parts...'"""
+    raw = "|".join([base_url, kind, *map(str, parts)])
+    return f"{KEY_PREFIX}{kind}:{hashlib.sha1(raw.encode('utf-8')).hexdigest()}"
+
+def cached_key(api, kind, func_name, *args, **kwargs):
+    """Key under which @cached(kind) stores api.<func_name>(*args, **kwargs)
+
+    Shared by the decorator and by invalidation, so deletes hit the same entry.
+    """
+    return make_key(api.base_url, kind, func_name, *args, *sorted(kwargs.items()))
+
+class CacheBackend(ABC):
+    """Interface for a persistent key/value cache with per-entry TTLs"""
+
+    @abstractmethod
+    def get(self, key):
+        """Return the cached value for key, or None on a miss"""
+
+    @abstractmethod
+    def set(self, key, value, ttl):
+        """Store value under key for ttl seconds"""
+
+    @abstractmethod
+    def delete(self, key):
+        """Remove key if present"""
+
+    @abstractmethod
+    def clear(self, kind=None):
+        """Remove every entry of one kind, or everything written by this application"""
+
+class DiskCache(CacheBackend):
+    """Cache stored on local disk via the diskcache package"""
+
+    def __init__(self, directory="~/.cache/grafanacost"):
+        import diskcache
+        self._cache = diskcache.Cache(os.path.expanduser(directory))
+
+    def get(self, key):
+        data = self._cache.get(key)
+        return None if data is None else orjson.loads(data)
+
+    def set(self, key, value, ttl):
+        self._cache.set(key, orjson.dumps(value), expire=ttl)
+
+    def delete(self, key):
+        self._cache.delete(key)
+
+    def clear(self, kind=None):
+        if kind is None:
+            self._cache.clear()
+            return
+        prefix = f"{KEY_PREFIX}{kind}:"
+        for key in list(self._cache.iterkeys()):
+            if isinstance(key, str) and key.startswith(prefix):
+                self._cache.delete(key)
+
+class RedisCache(CacheBackend):
+    """Cache shared between workers through Redis"""
+
+    def __init__(self, url="redis://localhost:6379/0"):
+        import redis
+        self._redis = redis.Redis.from_url(url)
+
+    def get(self, key):
+        data = self._redis.get(key)
+        return None if data is None else orjson.loads(data)
+
+    def set(self, key, value, ttl):
+        self._redis.setex(key, ttl, orjson.dumps(value))
+
+    def delete(self, key):
+        self._redis.delete(key)
+
+    def clear(self, kind=None):
+        pattern = f"{KEY_PREFIX}*" if kind is None else f"{KEY_PREFIX}{kind}:*"
+        for key in self._redis.scan_iter(match=pattern):
+            self._redis.delete(key)
+
+def backend_from_config():
+    """Create the backend selected by GRAFANA_CACHE_BACKEND ('disk', 'redis' or unset)"""
+    kind = (GRAFANA_CACHE_BACKEND or '').lower()
+    try:
+        if kind == 'disk':
+            return DiskCache(GRAFANA_CACHE_URL or "~/.cache/grafanacost")
+        if kind == 'redis':
+            return RedisCache(GRAFANA_CACHE_URL or "redis://localhost:6379/0")
+    except Exception as e:
+        logger.warning(f"Could not initialize {kind} cache backend, continuing without it: {e}")
+        return None
+    if kind and kind != 'none':
+        logger.warning(f"Unknown cache backend '{kind}', continuing without it")
+    return None
+
+def cached(kind, ttl=None, decode=None):
+    """Decorate a GrafanaAPI method so its JSON result is kept in self.cache_backend
+
+    The key is built from the client's base_url, the kind, the method name and
+    the call arguments. Unless ttl is given, entries live for self.ttls[kind]
+    seconds. Values come back from the backend as decoded JSON; decode, when
+    given, turns that back into the type the method returns so hits and misses
+    look the same. Backend failures are logged and treated as misses.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            backend = self.cache_backend
+            if backend is None:
+                return func(self, *args, **kwargs)
+
+            key = cached_key(self, kind, func.__name__, *args, **kwargs)
+            try:
+                hit = backend.get(key)
+            except Exception as e:
+                logger.warning(f"Cache read failed for {kind}: {e}")
+                hit = None
+            if hit is not None:
+                return decode(hit) if decode is not None else hit
+
+            value = func(self, *args, **kwargs)
+            try:
+                backend.set(key, value, ttl if ttl is not None else self.ttls[kind])
+            except Exception as e:
+                logger.warning(f"Cache write failed for {kind}: {e}")
+            return value
+        return wrapper
+    return decorator
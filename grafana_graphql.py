@@ -5,14 +5,104 @@ This module provides an implementation of the MCP GraphQL interface for Grafana
 based on the specification from https://github.com/grafana/mcp-grafana
 """
 import graphene
-from typing import Dict, Any, List, Optional
-from grafana_api import GrafanaAPI
+import orjson
+import sys
+from functools import lru_cache
+from graphql import parse, validate, execute_sync, GraphQLError, StringValueNode, Undefined
+from typing import Dict, Any, List, Optional, Tuple, Union
+from grafana_api import GrafanaAPI, COST_METRIC_KINDS
 import logging
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# (schema field, API metric key) pairs; the list resolvers return plain dicts
+# built from these so graphene's default dict resolver can read them directly
+_DB_KEY_MAP = (
+    ('name', 'name'), ('value', 'value'), ('unit', 'unit'), ('timestamp', 'timestamp'),
+    ('db_type', 'dbType'), ('instance_size', 'instanceSize'),
+    ('storage_allocated', 'storageAllocated'), ('io_operations', 'ioOperations'),
+    ('backup_storage', 'backupStorage'),
+)
+_SERVERLESS_KEY_MAP = (
+    ('name', 'name'), ('value', 'value'), ('unit', 'unit'), ('timestamp', 'timestamp'),
+    ('invocations', 'invocations'), ('execution_duration', 'executionDuration'),
+    ('memory_configured', 'memoryConfigured'), ('region', 'region'),
+)
+
+# Long metric keys and their wire abbreviations for the cost_breakdown and
+# cost_anomalies JSON payloads; clients map them back with EXPANDED_KEYS
+SHORT_KEYS = {
+    'timestamp': 'ts',
+    'cpu_usage': 'cpu',
+    'memory_usage': 'mem',
+    'instance_type': 'it',
+    'storage_type': 'st',
+    'volume_size': 'vs',
+    'data_transfer_in': 'dti',
+    'data_transfer_out': 'dto',
+    'database_type': 'dt',
+    'database_instance_count': 'dic',
+    'function_type': 'ft',
+    'invocation_count': 'ic',
+    'avg_execution_time_ms': 'aet',
+}
+EXPANDED_KEYS = {short: key for key, short in SHORT_KEYS.items()}
+
+def _shorten(metric):
+    """Metric as a dict with SHORT_KEYS abbreviations applied"""
+    if not isinstance(metric, dict):
+        metric = metric.to_dict()
+    return {SHORT_KEYS.get(key, key): value for key, value in metric.items()}
+
+# Metric attribute that names the group for each cost_breakdown groupby
+_BREAKDOWN_GROUP_KEYS = {
+    'region': ('region',),
+    'resource_type': ('instance_type', 'storage_type', 'database_type', 'function_type'),
+}
+
+def _panel_fields(panel):
+    """Panel schema fields from raw panel JSON; the datasource reference
+    (dict with a uid, plain name or missing) is flattened to a string"""
+    get = panel.get
+    datasource = get('datasource') or ''
+    return {
+        'id': get('id'),
+        'title': get('title'),
+        'type': get('type'),
+        'description': get('description', ''),
+        # Exact type check: panel JSON from orjson only ever holds plain dicts
+        'datasource': datasource.get('uid', '') if type(datasource) is dict else datasource,
+        'targets': get('targets') or ()
+    }
+
+class FastJSONString(graphene.JSONString):
+    """graphene.JSONString encoded and decoded with orjson
+    
+    Keeps the "JSONString" type name, so the schema clients see is unchanged.
+    """
+    class Meta:
+        name = "JSONString"
+    
+    @staticmethod
+    def serialize(dt):
+        # NumPy scalars/arrays from the cost layer are encoded natively
+        return orjson.dumps(dt, option=orjson.OPT_SERIALIZE_NUMPY).decode('utf-8')
+    
+    @staticmethod
+    def parse_value(value):
+        return orjson.loads(value)
+    
+    @staticmethod
+    def parse_literal(node, _variables=None):
+        if isinstance(node, StringValueNode):
+            try:
+                return orjson.loads(node.value)
+            except orjson.JSONDecodeError as error:
+                raise ValueError(f"Badly formed JSONString: {str(error)}")
+        return Undefined
+
 # GraphQL Types for Grafana resources
 class Panel(graphene.ObjectType):
     """Represents a Grafana dashboard panel"""
@@ -21,7 +111,7 @@ class Panel(graphene.ObjectType):
     type = graphene.String()
     description = graphene.String()
     datasource = graphene.String()
-    targets = graphene.List(lambda: graphene.JSONString)
+    targets = graphene.List(lambda: FastJSONString)
 
 class Dashboard(graphene.ObjectType):
     """Represents a Grafana dashboard"""
@@ -34,15 +124,7 @@ class Dashboard(graphene.ObjectType):
     
     def resolve_panels(self, info):
         """Resolver for panels field"""
-        panels_data = self.get('panels', [])
-        return [Panel(
-            id=panel.get('id'),
-            title=panel.get('title'),
-            type=panel.get('type'),
-            description=panel.get('description', ''),
-            datasource=panel.get('datasource', {}).get('uid', '') if isinstance(panel.get('datasource'), dict) else panel.get('datasource', ''),
-            targets=panel.get('targets', [])
-        ) for panel in panels_data]
+        return [_panel_fields(panel) for panel in self.get('panels', ())]
 
 class DashboardSearchResult(graphene.ObjectType):
     """Represents a dashboard in search results"""
@@ -54,7 +136,24 @@ class DashboardSearchResult(graphene.ObjectType):
     tags = graphene.List(graphene.String)
     is_starred = graphene.Boolean()
 
-class CostMetric(graphene.ObjectType):
+def _item_resolver(attname, default_value, root, info, **args):
+    """Default field resolver for metric rows: a single .get() on the row
+    
+    Rows are plain dicts or grafana_api.Metric instances, which both provide
+    .get(), so graphene's dict-or-attribute dispatch is skipped.
+    """
+    return root.get(attname, default_value)
+
+class FastObject(graphene.ObjectType):
+    """ObjectType whose fields resolve through _item_resolver"""
+    class Meta:
+        abstract = True
+    
+    @classmethod
+    def __init_subclass_with_meta__(cls, default_resolver=_item_resolver, **options):
+        super().__init_subclass_with_meta__(default_resolver=default_resolver, **options)
+
+class CostMetric(FastObject):
     """Represents a cost metric from Grafana"""
     name = graphene.String()
     value = graphene.Float()
@@ -62,7 +161,7 @@ class CostMetric(graphene.ObjectType):
     timestamp = graphene.String()
     source = graphene.String()
     
-class ComputeCostMetric(graphene.ObjectType):
+class ComputeCostMetric(FastObject):
     """Represents a compute-specific cost metric"""
     name = graphene.String()
     value = graphene.Float()
@@ -73,7 +172,7 @@ class ComputeCostMetric(graphene.ObjectType):
     instance_type = graphene.String()
     region = graphene.String()
     
-class StorageCostMetric(graphene.ObjectType):
+class StorageCostMetric(FastObject):
     """Represents a storage-specific cost metric"""
     name = graphene.String()
     value = graphene.Float()
@@ -84,7 +183,7 @@ class StorageCostMetric(graphene.ObjectType):
     read_ops = graphene.Int()
     write_ops = graphene.Int()
     
-class NetworkCostMetric(graphene.ObjectType):
+class NetworkCostMetric(FastObject):
     """Represents a network-specific cost metric"""
     name = graphene.String()
     value = graphene.Float()
@@ -94,7 +193,7 @@ class NetworkCostMetric(graphene.ObjectType):
     data_transfer_out = graphene.Float()
     region = graphene.String()
     
-class DatabaseCostMetric(graphene.ObjectType):
+class DatabaseCostMetric(FastObject):
     """Represents a database-specific cost metric"""
     name = graphene.String()
     value = graphene.Float()
@@ -106,7 +205,7 @@ class DatabaseCostMetric(graphene.ObjectType):
     io_operations = graphene.Int()
     backup_storage = graphene.Float()
     
-class ServerlessCostMetric(graphene.ObjectType):
+class ServerlessCostMetric(FastObject):
     """Represents a serverless-specific cost metric"""
     name = graphene.String()
     value = graphene.Float()
@@ -117,6 +216,15 @@ class ServerlessCostMetric(graphene.ObjectType):
     memory_configured = graphene.Int()
     region = graphene.String()
     
+class GenericCostMetric(FastObject):
+    """A cost metric of any kind; kind-specific fields are carried in attributes"""
+    kind = graphene.String()
+    name = graphene.String()
+    value = graphene.Float()
+    unit = graphene.String()
+    timestamp = graphene.String()
+    attributes = FastJSONString()
+    
 class CostReport(graphene.ObjectType):
     """Represents a cost analysis report"""
     id = graphene.ID()
@@ -134,7 +242,7 @@ class CostTrend(graphene.ObjectType):
     previous_total = graphene.Float()
     current_total = graphene.Float() 
     change_percentage = graphene.Float()
-    breakdown = graphene.List(graphene.JSONString)
+    breakdown = graphene.List(FastJSONString)
     forecast = graphene.Float()
 
 # Input types for mutations
@@ -144,7 +252,7 @@ class PanelInput(graphene.InputObjectType):
     type = graphene.String(required=True)
     description = graphene.String()
     datasource = graphene.String()
-    targets = graphene.List(graphene.JSONString)
+    targets = graphene.List(FastJSONString)
 
 class DashboardInput(graphene.InputObjectType):
     """Input type for dashboard creation/updates"""
@@ -159,6 +267,131 @@ class DashboardMutationResponse(graphene.ObjectType):
     message = graphene.String()
     dashboard = graphene.Field(Dashboard)
 
+# Top-level query fields served by CostMetricsLoader and the metric kinds each needs
+_COST_FIELD_KINDS = {
+    'costMetrics': ('cost',),
+    'computeCostMetrics': ('compute',),
+    'storageCostMetrics': ('storage',),
+    'networkCostMetrics': ('network',),
+    'databaseCostMetrics': ('database',),
+    'serverlessCostMetrics': ('serverless',),
+    'allCostMetrics': ('cost', 'compute', 'storage', 'network', 'database', 'serverless'),
+    'costBreakdown': ('compute', 'storage', 'network', 'database', 'serverless'),
+    'costAnomalies': ('compute', 'storage', 'network', 'database', 'serverless'),
+}
+
+def _requested_cost_kinds(document):
+    """Metric kinds asked for by the top-level fields of every operation in a document"""
+    kinds = set()
+    for definition in document.definitions:
+        selection_set = getattr(definition, 'selection_set', None)
+        if selection_set is None:
+            continue
+        for selection in selection_set.selections:
+            name = getattr(selection, 'name', None)
+            if name is None:
+                continue
+            # allCostMetrics(kind: "...") with a literal kind only needs that kind
+            kind_arg = next((arg.value for arg in getattr(selection, 'arguments', ()) or ()
+                             if arg.name.value == 'kind'), None)
+            if name.value == 'allCostMetrics' and isinstance(kind_arg, StringValueNode):
+                if kind_arg.value in COST_METRIC_KINDS:
+                    kinds.add(kind_arg.value)
+            else:
+                kinds.update(_COST_FIELD_KINDS.get(name.value, ()))
+    return frozenset(kinds)
+
+# Fields every metric has; anything else goes into GenericCostMetric.attributes
+_BASE_METRIC_FIELDS = ('name', 'value', 'unit', 'timestamp')
+
+def _generic_metric(kind, metric):
+    """GenericCostMetric row for one metric (dict or grafana_api.Metric)"""
+    if not isinstance(metric, dict):
+        metric = metric.to_dict()
+    row = {field: metric.get(field) for field in _BASE_METRIC_FIELDS}
+    row['kind'] = kind
+    row['attributes'] = {k: v for k, v in metric.items() if k not in _BASE_METRIC_FIELDS}
+    return row
+
+class CostMetricsLoader:
+    """Request-scoped loader for cost metrics keyed by (dashboard_uid, period, kind)
+    
+    The first load for a dashboard/period fetches that kind together with
+    every other kind the query asks for, concurrently through
+    GrafanaAPI.get_all_category_metrics. Sibling fields are then served from
+    memory, so the query waits for the slowest fetch rather than their sum.
+    A failed fetch is remembered per kind and only fails the fields that
+    need that kind.
+    """
+    
+    def __init__(self, grafana_api, kinds=()):
+        self.grafana_api = grafana_api
+        self.kinds = frozenset(kinds)
+        self._batches = {}
+    
+    def load(self, key):
+        """Return the metrics for one (dashboard_uid, period, kind) key"""
+        dashboard_uid, period, kind = key
+        if kind not in COST_METRIC_KINDS:
+            raise ValueError(f"Unknown cost metric kind: {kind}")
+        batch = self._batches.setdefault((dashboard_uid, period), {})
+        if kind not in batch:
+            wanted = {kind} | (self.kinds - batch.keys())
+            batch.update(self.grafana_api.get_all_category_metrics(
+                dashboard_uid, period, kinds=wanted, return_exceptions=True
+            ))
+        result = batch[kind]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+@lru_cache(maxsize=1)
+def _default_api():
+    """Process-wide GrafanaAPI, so resolvers share one keep-alive connection pool"""
+    return GrafanaAPI()
+
+def _context_api(info):
+    """GrafanaAPI for this request, or the shared client outside execute_query"""
+    return (info.context or {}).get('grafana_api') or _default_api()
+
+def _dashboard_cache(info):
+    """Dashboard JSON already fetched during this request, keyed by UID"""
+    if info.context is None:
+        return {}
+    return info.context.setdefault('dashboard_cache', {})
+
+def _get_dashboard_cached(api, uid, cache):
+    """Fetch a dashboard at most once per request"""
+    if uid not in cache:
+        cache[uid] = api.get_dashboard(uid)
+    return cache[uid]
+
+def _forget_dashboard(api, uid, cache):
+    """Drop a dashboard from the request and client caches after a write"""
+    cache.pop(uid, None)
+    api.invalidate(uid)
+
+def _mk_dashboard(uid, dashboard):
+    """Dashboard field values as a plain dict (read by graphene's default resolver
+    and by Dashboard.resolve_panels) for a fetched dashboard JSON"""
+    meta = dashboard.get('meta', {})
+    data = dashboard.get('dashboard', {})
+    return {
+        'uid': uid,
+        'id': meta.get('id'),
+        'title': data.get('title'),
+        'url': meta.get('url', ''),
+        'tags': data.get('tags', []),
+        'panels': data.get('panels', [])
+    }
+
+def _load_cost_metrics(info, dashboard_uid, period, kind):
+    """Load metrics through the request's loader, or a one-off one outside execute_query"""
+    loader = (info.context or {}).get('loaders', {}).get('cost_metrics')
+    if loader is None:
+        loader = CostMetricsLoader(_context_api(info))
+    return loader.load((dashboard_uid, period, kind))
+
 class Query(graphene.ObjectType):
     """Root query object for Grafana GraphQL API"""
     dashboard = graphene.Field(
@@ -203,39 +436,52 @@ class Query(graphene.ObjectType):
         ComputeCostMetric,
         dashboard_uid=graphene.String(required=True),
         period=graphene.String(),
-        description="Get compute-specific cost metrics for a dashboard"
+        description="Get compute-specific cost metrics for a dashboard",
+        deprecation_reason="Use allCostMetrics(kind: \"compute\")"
     )
     
     storage_cost_metrics = graphene.List(
         StorageCostMetric,
         dashboard_uid=graphene.String(required=True),
         period=graphene.String(),
-        description="Get storage-specific cost metrics for a dashboard"
+        description="Get storage-specific cost metrics for a dashboard",
+        deprecation_reason="Use allCostMetrics(kind: \"storage\")"
     )
     
     network_cost_metrics = graphene.List(
         NetworkCostMetric,
         dashboard_uid=graphene.String(required=True),
         period=graphene.String(),
-        description="Get network-specific cost metrics for a dashboard"
+        description="Get network-specific cost metrics for a dashboard",
+        deprecation_reason="Use allCostMetrics(kind: \"network\")"
     )
     
     database_cost_metrics = graphene.List(
         DatabaseCostMetric,
         dashboard_uid=graphene.String(required=True),
         period=graphene.String(),
-        description="Get database-specific cost metrics for a dashboard"
+        description="Get database-specific cost metrics for a dashboard",
+        deprecation_reason="Use allCostMetrics(kind: \"database\")"
+    )
+    
+    all_cost_metrics = graphene.List(
+        GenericCostMetric,
+        dashboard_uid=graphene.String(required=True),
+        kind=graphene.String(),
+        period=graphene.String(),
+        description="Get cost metrics of one kind (cost, compute, storage, network, database, serverless) or all kinds"
     )
     
     serverless_cost_metrics = graphene.List(
         ServerlessCostMetric,
         dashboard_uid=graphene.String(required=True),
         period=graphene.String(),
-        description="Get serverless-specific cost metrics for a dashboard"
+        description="Get serverless-specific cost metrics for a dashboard",
+        deprecation_reason="Use allCostMetrics(kind: \"serverless\")"
     )
     
     cost_breakdown = graphene.Field(
-        graphene.JSONString,
+        FastJSONString,
         dashboard_uid=graphene.String(required=True),
         period=graphene.String(),
         groupby=graphene.String(),
@@ -243,13 +489,143 @@ class Query(graphene.ObjectType):
     )
     
     cost_anomalies = graphene.List(
-        graphene.JSONString,
+        FastJSONString,
         dashboard_uid=graphene.String(required=True),
         period=graphene.String(),
         threshold=graphene.Float(),
         description="Get cost anomalies detected in the specified period"
     )
 
+    def resolve_dashboard(self, info, uid):
+        """Resolver for dashboard query"""
+        try:
+            dashboard = _get_dashboard_cached(_context_api(info), uid, _dashboard_cache(info))
+        except Exception as e:
+            logger.error(f"Error fetching dashboard {uid}: {str(e)}")
+            return None
+        return _mk_dashboard(uid, dashboard)
+    
+    def resolve_cost_metrics(self, info, dashboard_uid, period="30d"):
+        """Resolver for cost_metrics query"""
+        try:
+            return _load_cost_metrics(info, dashboard_uid, period, 'cost')
+        except Exception as e:
+            logger.error(f"Error fetching cost metrics for dashboard {dashboard_uid}: {str(e)}")
+            return []
+    
+    def resolve_compute_cost_metrics(self, info, dashboard_uid, period="30d"):
+        """Resolver for compute_cost_metrics query"""
+        try:
+            return _load_cost_metrics(info, dashboard_uid, period, 'compute')
+        except Exception as e:
+            logger.error(f"Error fetching compute cost metrics for dashboard {dashboard_uid}: {str(e)}")
+            return []
+    
+    def resolve_storage_cost_metrics(self, info, dashboard_uid, period="30d"):
+        """Resolver for storage_cost_metrics query"""
+        try:
+            return _load_cost_metrics(info, dashboard_uid, period, 'storage')
+        except Exception as e:
+            logger.error(f"Error fetching storage cost metrics for dashboard {dashboard_uid}: {str(e)}")
+            return []
+    
+    def resolve_network_cost_metrics(self, info, dashboard_uid, period="30d"):
+        """Resolver for network_cost_metrics query"""
+        try:
+            return _load_cost_metrics(info, dashboard_uid, period, 'network')
+        except Exception as e:
+            logger.error(f"Error fetching network cost metrics for dashboard {dashboard_uid}: {str(e)}")
+            return []
+    
+    def resolve_database_cost_metrics(self, info, dashboard_uid, period="30d"):
+        """Resolver for database_cost_metrics query"""
+        try:
+            metrics = _load_cost_metrics(info, dashboard_uid, period, 'database')
+            return [{field: metric.get(key) for field, key in _DB_KEY_MAP} for metric in metrics]
+        except Exception as e:
+            logger.error(f"Error fetching database cost metrics for dashboard {dashboard_uid}: {str(e)}")
+            return []
+    
+    def resolve_serverless_cost_metrics(self, info, dashboard_uid, period="30d"):
+        """Resolver for serverless_cost_metrics query"""
+        try:
+            metrics = _load_cost_metrics(info, dashboard_uid, period, 'serverless')
+            return [{field: metric.get(key) for field, key in _SERVERLESS_KEY_MAP} for metric in metrics]
+        except Exception as e:
+            logger.error(f"Error fetching serverless cost metrics for dashboard {dashboard_uid}: {str(e)}")
+            return []
+
+    def resolve_all_cost_metrics(self, info, dashboard_uid, kind=None, period="30d"):
+        """Resolver for all_cost_metrics query"""
+        try:
+            kinds = (kind,) if kind else _COST_FIELD_KINDS['allCostMetrics']
+            return [
+                _generic_metric(k, metric)
+                for k in kinds
+                for metric in _load_cost_metrics(info, dashboard_uid, period, k)
+            ]
+        except Exception as e:
+            logger.error(f"Error fetching {kind or 'all'} cost metrics for dashboard {dashboard_uid}: {str(e)}")
+            return []
+    
+    def resolve_cost_breakdown(self, info, dashboard_uid, period="30d", groupby="service"):
+        """Resolver for cost_breakdown query: total cost per service, region or resource type"""
+        try:
+            totals = {}
+            for kind in ('compute', 'storage', 'network', 'database', 'serverless'):
+                for metric in _load_cost_metrics(info, dashboard_uid, period, kind):
+                    if metric.get('source') == 'calculated':
+                        continue  # skip per-category totals
+                    if groupby == 'service':
+                        group = kind
+                    else:
+                        keys = _BREAKDOWN_GROUP_KEYS.get(groupby, ())
+                        group = next((metric.get(k) for k in keys if metric.get(k)), 'other')
+                    totals[group] = totals.get(group, 0) + metric.get('value', 0)
+            return totals
+        except Exception as e:
+            logger.error(f"Error building cost breakdown for dashboard {dashboard_uid}: {str(e)}")
+            return {}
+    
+    def resolve_cost_anomalies(self, info, dashboard_uid, period="30d", threshold=2.0):
+        """Resolver for cost_anomalies query: metrics costing over threshold x their category mean"""
+        try:
+            anomalies = []
+            for kind in ('compute', 'storage', 'network', 'database', 'serverless'):
+                metrics = [
+                    m for m in _load_cost_metrics(info, dashboard_uid, period, kind)
+                    if m.get('source') != 'calculated'
+                ]
+                if not metrics:
+                    continue
+                mean = sum(m.get('value', 0) for m in metrics) / len(metrics)
+                anomalies.extend(
+                    {**_shorten(m), 'category': kind}
+                    for m in metrics if m.get('value', 0) > threshold * mean
+                )
+            return anomalies
+        except Exception as e:
+            logger.error(f"Error detecting cost anomalies for dashboard {dashboard_uid}: {str(e)}")
+            return []
+
+def _build_panel(index, panel_input):
+    """Panel JSON for a PanelInput; optional fields are only set when given"""
+    panel = {"id": index + 1, "title": panel_input.title, "type": panel_input.type}  # Simple ID assignment
+    for key, value in (("description", panel_input.description),
+                       ("datasource", panel_input.datasource),
+                       ("targets", panel_input.targets)):
+        if value:
+            panel[key] = value
+    return panel
+
+def _dashboard_response(message, uid, dashboard):
+    """Successful DashboardMutationResponse for a fetched dashboard JSON"""
+    return DashboardMutationResponse(
+        success=True,
+        message=message,
+        dashboard=_mk_dashboard(uid, dashboard)
+    )
+
 class Mutation(graphene.ObjectType):
     """Root mutation object for Grafana GraphQL API"""
     create_dashboard = graphene.Field(
@@ -273,7 +649,8 @@ class Mutation(graphene.ObjectType):
     
     def resolve_create_dashboard(self, info, input):
         """Resolver for creating a new dashboard"""
-        api = GrafanaAPI()
+        api = _context_api(info)
+        cache = _dashboard_cache(info)
         try:
             # Prepare dashboard data
             dashboard_data = {
@@ -284,44 +661,15 @@ class Mutation(graphene.ObjectType):
             
             # Add panels if provided
             if input.panels:
-                for i, panel_input in enumerate(input.panels):
-                    panel = {
-                        "id": i + 1,  # Simple ID assignment
-                        "title": panel_input.title,
-                        "type": panel_input.type,
-                    }
-                    
-                    if panel_input.description:
-                        panel["description"] = panel_input.description
-                    
-                    if panel_input.datasource:
-                        panel["datasource"] = panel_input.datasource
-                    
-                    if panel_input.targets:
-                        panel["targets"] = panel_input.targets
-                    
-                    dashboard_data["panels"].append(panel)
+                dashboard_data["panels"] = [_build_panel(i, panel_input) for i, panel_input in enumerate(input.panels)]
             
             # Create dashboard in Grafana
             result = api.create_dashboard(dashboard_data)
+            _forget_dashboard(api, result.get('uid'), cache)
             
             # Get the created dashboard for the response
-            dashboard = api.get_dashboard(result.get('uid'))
-            dashboard_meta = dashboard.get('meta', {})
-            dashboard_data = dashboard.get('dashboard', {})
-            
-            return DashboardMutationResponse(
-                success=True,
-                message="Dashboard created successfully",
-                dashboard=Dashboard(
-                    uid=result.get('uid'),
-                    id=dashboard_meta.get('id'),
-                    title=dashboard_data.get('title'),
-                    url=dashboard_meta.get('url', ''),
-                    tags=dashboard_data.get('tags', []),
-                    panels=dashboard_data.get('panels', [])
-                )
-            )
+            dashboard = _get_dashboard_cached(api, result.get('uid'), cache)
+            return _dashboard_response("Dashboard created successfully", result.get('uid'), dashboard)
         except Exception as e:
             logger.error(f"Error creating dashboard: {str(e)}")
             return DashboardMutationResponse(
@@ -332,10 +680,11 @@ class Mutation(graphene.ObjectType):
     
     def resolve_update_dashboard(self, info, uid, input):
         """Resolver for updating a dashboard"""
-        api = GrafanaAPI()
+        api = _context_api(info)
+        cache = _dashboard_cache(info)
         try:
             # First, get the existing dashboard
-            existing_dashboard = api.get_dashboard(uid)
+            existing_dashboard = _get_dashboard_cached(api, uid, cache)
             if not existing_dashboard:
                 return DashboardMutationResponse(
                     success=False,
@@ -343,8 +692,9 @@ class Mutation(graphene.ObjectType):
                     dashboard=None
                 )
             
-            # Prepare update data, preserving existing structure
-            dashboard_data = existing_dashboard.get('dashboard', {})
+            # Prepare update data, preserving existing structure (copied, since
+            # the fetched JSON is shared with the caches)
+            dashboard_data = dict(existing_dashboard.get('dashboard', {}))
             dashboard_data['title'] = input.title
             
             if input.tags is not None:
@@ -352,47 +702,15 @@ class Mutation(graphene.ObjectType):
             
             if input.panels:
                 # Replace panels if provided
-                new_panels = []
-                for i, panel_input in enumerate(input.panels):
-                    panel = {
-                        "id": i + 1,
-                        "title": panel_input.title,
-                        "type": panel_input.type,
-                    }
-                    
-                    if panel_input.description:
-                        panel["description"] = panel_input.description
-                    
-                    if panel_input.datasource:
-                        panel["datasource"] = panel_input.datasource
-                    
-                    if panel_input.targets:
-                        panel["targets"] = panel_input.targets
-                    
-                    new_panels.append(panel)
-                
-                dashboard_data["panels"] = new_panels
+                dashboard_data["panels"] = [_build_panel(i, panel_input) for i, panel_input in enumerate(input.panels)]
             
             # Update the dashboard
             result = api.update_dashboard(uid, dashboard_data)
+            _forget_dashboard(api, uid, cache)
             
             # Get the updated dashboard for the response
-            updated_dashboard = api.get_dashboard(uid)
-            dashboard_meta = updated_dashboard.get('meta', {})
-            dashboard_data = updated_dashboard.get('dashboard', {})
-            
-            return DashboardMutationResponse(
-                success=True,
-                message="Dashboard updated successfully",
-                dashboard=Dashboard(
-                    uid=uid,
-                    id=dashboard_meta.get('id'),
-                    title=dashboard_data.get('title'),
-                    url=dashboard_meta.get('url', ''),
-                    tags=dashboard_data.get('tags', []),
-                    panels=dashboard_data.get('panels', [])
-                )
-            )
+            updated_dashboard = _get_dashboard_cached(api, uid, cache)
+            return _dashboard_response("Dashboard updated successfully", uid, updated_dashboard)
         except Exception as e:
             logger.error(f"Error updating dashboard: {str(e)}")
             return DashboardMutationResponse(
@@ -403,10 +721,11 @@ class Mutation(graphene.ObjectType):
     
     def resolve_delete_dashboard(self, info, uid):
         """Resolver for deleting a dashboard"""
-        api = GrafanaAPI()
+        api = _context_api(info)
+        cache = _dashboard_cache(info)
         try:
             # First, get the dashboard to return in the response
-            dashboard_before_delete = api.get_dashboard(uid)
+            dashboard_before_delete = _get_dashboard_cached(api, uid, cache)
             if not dashboard_before_delete:
                 return DashboardMutationResponse(
                     success=False,
@@ -414,24 +733,11 @@ class Mutation(graphene.ObjectType):
                     dashboard=None
                 )
             
-            dashboard_meta = dashboard_before_delete.get('meta', {})
-            dashboard_data = dashboard_before_delete.get('dashboard', {})
-            
             # Delete the dashboard
             api.delete_dashboard(uid)
+            _forget_dashboard(api, uid, cache)
             
-            return DashboardMutationResponse(
-                success=True,
-                message="Dashboard deleted successfully",
-                dashboard=Dashboard(
-                    uid=uid,
-                    id=dashboard_meta.get('id'),
-                    title=dashboard_data.get('title'),
-                    url=dashboard_meta.get('url', ''),
-                    tags=dashboard_data.get('tags', []),
-                    panels=dashboard_data.get('panels', [])
-                )
-            )
+            return _dashboard_response("Dashboard deleted successfully", uid, dashboard_before_delete)
         except Exception as e:
             logger.error(f"Error deleting dashboard: {str(e)}")
             return DashboardMutationResponse(
@@ -439,97 +745,49 @@ class Mutation(graphene.ObjectType):
                 message=f"Failed to delete dashboard: {str(e)}",
                 dashboard=None
             )
-    
-    def resolve_database_cost_metrics(self, info, dashboard_uid, period="30d"):
-        """Resolver for database_cost_metrics query"""
-        api = info.context.get('grafana_api', self.grafana_api)
-        try:
-            # Get database cost metrics from Grafana API
-            metrics = api.get_database_cost_metrics(dashboard_uid, period)
-            
-            # Convert to GraphQL type
-            results = []
-            for metric in metrics:
-                results.append(DatabaseCostMetric(
-                    name=metric.get('name'),
-                    value=metric.get('value'),
-                    unit=metric.get('unit'),
-                    timestamp=metric.get('timestamp'),
-                    db_type=metric.get('dbType'),
-                    instance_size=metric.get('instanceSize'),
-                    storage_allocated=metric.get('storageAllocated'),
-                    io_operations=metric.get('ioOperations'),
-                    backup_storage=metric.get('backupStorage')
-                ))
-            return results
-        except Exception as e:
-            logger.error(f"Error fetching database cost metrics for dashboard {dashboard_uid}: {str(e)}")
-            return []
-    
-    def resolve_serverless_cost_metrics(self, info, dashboard_uid, period="30d"):
-        """Resolver for serverless_cost_metrics query"""
-        api = info.context.get('grafana_api', self.grafana_api)
-        try:
-            # Get serverless cost metrics from Grafana API
-            metrics = api.get_serverless_cost_metrics(dashboard_uid, period)
-            
-            # Convert to GraphQL type
-            results = []
-            for metric in metrics:
-                results.append(ServerlessCostMetric(
-                    name=metric.get('name'),
-                    value=metric.get('value'),
-                    unit=metric.get('unit'),
-                    timestamp=metric.get('timestamp'),
-                    invocations=metric.get('invocations'),
-                    execution_duration=metric.get('executionDuration'),
-                    memory_configured=metric.get('memoryConfigured'),
-                    region=metric.get('region')
-                ))
-            return results
-        except Exception as e:
-            logger.error(f"Error fetching serverless cost metrics for dashboard {dashboard_uid}: {str(e)}")
-            return []
 
-# Create the GraphQL schema with both Query and Mutation
-grafana_schema = graphene.Schema(query=Query, mutation=Mutation)
+@lru_cache(maxsize=None)
+def _build_schema():
+    """Create the GraphQL schema with both Query and Mutation, once per process"""
+    return graphene.Schema(query=Query, mutation=Mutation)
 
-class GrafanaMCPGraphQL:
-    """Handles GraphQL operations for Grafana through MCP"""
+def __getattr__(name):
+    # grafana_schema is built on first access rather than at import time
+    if name == 'grafana_schema':
+        return _build_schema()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+@lru_cache(maxsize=512)
+def _compile(query):
+    """Parse and validate a query once
     
-    def __init__(self, grafana_api=None):
-        """Initialize the GraphQL handler with an optional Grafana API instance"""
-        self.grafana_api = grafana_api or GrafanaAPI()
+    Returns:
+        (document, validation_errors, cost metric kinds the query requests)
+    """
+    try:
+        document = parse(query)
+    except GraphQLError as error:
+        return None, [error], frozenset()
+    return document, validate(_build_schema().graphql_schema, document), _requested_cost_kinds(document)
+
+def _normalize_query(query):
+    """Collapse insignificant whitespace so formatting variants share a cache entry
     
-    def execute_query(self, query: str, variables: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        """Execute a GraphQL query against the Grafana schema
-        
-        Args:
-            query: The GraphQL query string
-            variables: Optional variables for the query
-            
-        Returns:
-            The query execution result
-        """
-        result = grafana_schema.execute(query, variable_values=variables or {})
-        
-        # Handle errors
-        if result.errors:
-            errors = [str(error) for error in result.errors]
-            logger.error(f"GraphQL query execution errors: {errors}")
-            return {
-                "data": result.data,
-                "errors": errors
-            }
-        
-        return {"data": result.data}
+    Indentation, runs of blanks and empty lines are dropped, but line breaks
+    are kept because they end `#` comments. Queries containing string
+    literals are only stripped, since whitespace inside a literal is
+    significant.
+    """
+    if '"' in query:
+        query = query.strip()
+    else:
+        query = "\n".join(filter(None, (" ".join(line.split()) for line in query.splitlines())))
+    return sys.intern(query)
 
-    def get_dashboard_example(self, uid: str) -> str:
-        """Example query to get a dashboard by UID
-        
-        Returns the GraphQL query string that can be used as an example
-        """
-        return """
+# Operations behind the *_example helpers; execute_precompiled runs them
+# straight from the parsed-document cache
+EXAMPLE_QUERIES = {
+    'get_dashboard': """
         query GetDashboard($uid: String!) {
             dashboard(uid: $uid) {
                 uid
@@ -547,14 +805,8 @@ class GrafanaMCPGraphQL:
                 }
             }
         }
-        """
-    
-    def search_dashboards_example(self) -> str:
-        """Example query to search for dashboards
-        
-        Returns the GraphQL query string that can be used as an example
-        """
-        return """
+        """,
+    'search_dashboards': """
         query SearchDashboards($query: String, $tag: String, $limit: Int) {
             dashboards(query: $query, tag: $tag, limit: $limit) {
                 uid
@@ -563,17 +815,11 @@ class GrafanaMCPGraphQL:
                 url
                 tags
                 type
-                is_starred
+                isStarred
             }
         }
-        """
-    
-    def create_dashboard_example(self) -> str:
-        """Example mutation to create a dashboard
-        
-        Returns the GraphQL mutation string that can be used as an example
-        """
-        return """
+        """,
+    'create_dashboard': """
         mutation CreateDashboard($input: DashboardInput!) {
             createDashboard(input: $input) {
                 success
@@ -587,14 +833,8 @@ class GrafanaMCPGraphQL:
                 }
             }
         }
-        """
-    
-    def update_dashboard_example(self) -> str:
-        """Example mutation to update a dashboard
-        
-        Returns the GraphQL mutation string that can be used as an example
-        """
-        return """
+        """,
+    'update_dashboard': """
         mutation UpdateDashboard($uid: String!, $input: DashboardInput!) {
             updateDashboard(uid: $uid, input: $input) {
                 success
@@ -608,4 +848,129 @@ class GrafanaMCPGraphQL:
                 }
             }
         }
-        """
\ No newline at end of file
+        """,
+}
+
+def _encode_result(payload, as_bytes):
+    """Return the response dict, or its orjson encoding when as_bytes is set"""
+    return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY) if as_bytes else payload
+
+class GrafanaMCPGraphQL:
+    """Handles GraphQL operations for Grafana through MCP"""
+    
+    def __init__(self, grafana_api=None):
+        """Initialize the GraphQL handler with an optional Grafana API instance"""
+        self.grafana_api = grafana_api or _default_api()
+    
+    def execute_query(self, query: str, variables: Optional[Dict[str, Any]] = None, as_bytes: bool = False) -> Union[Dict[str, Any], bytes]:
+        """Execute a GraphQL query against the Grafana schema
+        
+        Args:
+            query: The GraphQL query string
+            variables: Optional variables for the query
+            as_bytes: Return the response already JSON-encoded (orjson) for
+                callers that write it straight to the wire
+            
+        Returns:
+            The query execution result
+        """
+        return self._execute(_compile(_normalize_query(query)), variables, as_bytes)
+    
+    def execute_precompiled(self, name: str, variables: Optional[Dict[str, Any]] = None, as_bytes: bool = False) -> Union[Dict[str, Any], bytes]:
+        """Execute one of the EXAMPLE_QUERIES operations by name
+        
+        Fast path for server-side callers that always send the same shapes:
+        the query text is never normalized or re-read, and its parsed,
+        validated document comes straight from the _compile cache.
+        
+        Args:
+            name: 'get_dashboard', 'search_dashboards', 'create_dashboard' or 'update_dashboard'
+            variables: Optional variables for the operation
+            as_bytes: Return the response already JSON-encoded (orjson)
+        """
+        return self._execute(_compile(EXAMPLE_QUERIES[name]), variables, as_bytes)
+    
+    def execute_batch(self, queries: List[Tuple[str, Optional[Dict[str, Any]]]], as_bytes: bool = False) -> List[Union[Dict[str, Any], bytes]]:
+        """Execute several GraphQL queries against one shared request context
+        
+        The queries share the cost-metrics loader and the dashboard cache,
+        so dashboards and metrics they have in common are fetched once.
+        
+        Args:
+            queries: List of (query, variables) pairs
+            as_bytes: Return each response already JSON-encoded (orjson)
+            
+        Returns:
+            One execution result per query, in order
+        """
+        compiled = [_compile(_normalize_query(query)) for query, _ in queries]
+        context = self._build_request_context(frozenset().union(*(c[2] for c in compiled)))
+        return [
+            self._execute(c, variables, as_bytes, context)
+            for c, (_, variables) in zip(compiled, queries)
+        ]
+    
+    def _build_request_context(self, cost_kinds):
+        """Fresh per-request context so loaders never serve another request's data"""
+        return {
+            'grafana_api': self.grafana_api,
+            'loaders': {'cost_metrics': CostMetricsLoader(self.grafana_api, cost_kinds)},
+            'dashboard_cache': {}
+        }
+    
+    def _execute(self, compiled, variables, as_bytes, context=None):
+        """Run a (document, errors, cost_kinds) triple from _compile"""
+        document, errors, cost_kinds = compiled
+        if errors:
+            errors = [str(error) for error in errors]
+            logger.error(f"GraphQL query validation errors: {errors}")
+            return _encode_result({
+                "data": None,
+                "errors": errors
+            }, as_bytes)
+        
+        if context is None:
+            context = self._build_request_context(cost_kinds)
+        result = execute_sync(
+            _build_schema().graphql_schema, document,
+            context_value=context, variable_values=variables or {}
+        )
+        
+        # Handle errors
+        if result.errors:
+            errors = [str(error) for error in result.errors]
+            logger.error(f"GraphQL query execution errors: {errors}")
+            return _encode_result({
+                "data": result.data,
+                "errors": errors
+            }, as_bytes)
+        
+        return _encode_result({"data": result.data}, as_bytes)
+
+    def get_dashboard_example(self, uid: str) -> str:
+        """Example query to get a dashboard by UID
+        
+        Returns the GraphQL query string that can be used as an example
+        """
+        return EXAMPLE_QUERIES['get_dashboard']
+    
+    def search_dashboards_example(self) -> str:
+        """Example query to search for dashboards
+        
+        Returns the GraphQL query string that can be used as an example
+        """
+        return EXAMPLE_QUERIES['search_dashboards']
+    
+    def create_dashboard_example(self) -> str:
+        """Example mutation to create a dashboard
+        
+        Returns the GraphQL mutation string that can be used as an example
+        """
+        return EXAMPLE_QUERIES['create_dashboard']
+    
+    def update_dashboard_example(self) -> str:
+        """Example mutation to update a dashboard
+        
+        Returns the GraphQL mutation string that can be used as an example
+        """
+        return EXAMPLE_QUERIES['update_dashboard']
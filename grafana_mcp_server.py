@@ -6,59 +6,462 @@ providing AI-powered analysis capabilities through standardized actions.
 """
 
 import os
-import json
+import atexit
+import queue
+import re
+import argparse
+import signal
+import asyncio
+import functools
+import socket
+import orjson
 import logging
+from logging.handlers import QueueHandler, QueueListener
 import threading
-import socket
 import time
-from http.server import HTTPServer, BaseHTTPRequestHandler
-from urllib.parse import urlparse, parse_qs
+import types
+import concurrent.futures
+import hashlib
+import importlib.util
+import inspect
+import uuid
+import zlib
+from cachetools import LRUCache, TTLCache
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from grafana_api import GrafanaAPI
 from databricks_client import execute_databricks_query
-from config import GEMINI_API_KEY, GEMINI_API_ENDPOINT, GEMINI_MODEL_NAME, GEMINI_TEMPERATURE, GEMINI_TOP_P, GEMINI_TOP_K, GEMINI_MAX_OUTPUT_TOKENS, GEMINI_RESPONSE_MIME_TYPE, GEMINI_SAFETY_SETTINGS, GEMINI_API_URL
+from config import GEMINI_API_KEY, GEMINI_API_ENDPOINT, GEMINI_MODEL_NAME, GEMINI_TEMPERATURE, GEMINI_TOP_P, GEMINI_TOP_K, GEMINI_MAX_OUTPUT_TOKENS, GEMINI_RESPONSE_MIME_TYPE, GEMINI_SAFETY_SETTINGS, GEMINI_API_URL, MCP_WORKERS, MCP_SERVER
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
 from grafana_graphql import GrafanaMCPGraphQL  # Import the GraphQL handler
 
+try:
+    import httpx
+except ImportError:  # httpx is optional; Gemini calls then use the requests session
+    httpx = None
+else:
+    if importlib.util.find_spec("h2") is None:  # httpx needs h2 for HTTP/2
+        httpx = None
+
+try:
+    import uvicorn
+    from starlette.applications import Starlette
+    from starlette.responses import Response, StreamingResponse as ASGIStreamingResponse
+    from starlette.routing import Route
+except ImportError:  # uvicorn/starlette are optional; only MCP_SERVER=asgi needs them
+    uvicorn = None
+
+try:
+    import pyarrow as pa
+except ImportError:  # pyarrow is optional; execute_query then only answers with JSON
+    pa = None
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# While a server runs, request threads only enqueue records: the root
+# handlers move behind a queue and a listener thread does the stream I/O
+_log_lock = threading.Lock()
+_log_users = 0
+_log_listener = None
+_log_queue_handler = None
+
+def _start_log_queue():
+    """Put the root handlers behind a queue; the first running server installs it"""
+    global _log_users, _log_listener, _log_queue_handler
+    with _log_lock:
+        _log_users += 1
+        if _log_users > 1:
+            return
+        root = logging.getLogger()
+        handlers = tuple(root.handlers)
+        log_queue = queue.SimpleQueue()
+        _log_listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _log_queue_handler = QueueHandler(log_queue)
+        for handler in handlers:
+            root.removeHandler(handler)
+        root.addHandler(_log_queue_handler)
+        _log_listener.start()
+
+def _stop_log_queue(all_users=False):
+    """Drain the queue and restore the root handlers once the last server stops"""
+    global _log_users, _log_listener, _log_queue_handler
+    with _log_lock:
+        if not _log_users:
+            return
+        _log_users = 0 if all_users else _log_users - 1
+        if _log_users:
+            return
+        root = logging.getLogger()
+        root.removeHandler(_log_queue_handler)
+        _log_listener.stop()
+        for handler in _log_listener.handlers:
+            root.addHandler(handler)
+        _log_listener = _log_queue_handler = None
+
+# Servers run on daemon threads, so flush anything still queued at exit
+atexit.register(_stop_log_queue, all_users=True)
+
+# Gemini retry policy, shared by the requests and httpx paths; generateContent
+# has no side effects, so POSTs are safe to retry
+_RETRY_TOTAL = 2
+_RETRY_BACKOFF = 0.2
+_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+def _gemini_session():
+    """Keep-alive session for Gemini calls, so repeat prompts reuse the TLS connection"""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=8,
+        pool_maxsize=32,
+        max_retries=Retry(total=_RETRY_TOTAL, backoff_factor=_RETRY_BACKOFF, status_forcelist=_RETRY_STATUSES,
+                          allowed_methods=frozenset({'POST'}))
+    )
+    session.mount('https://', adapter)
+    return session
+
+_SESSION = _gemini_session()
+
+# With httpx available, concurrent Gemini calls are multiplexed over one HTTP/2 connection
+_HTTPX = httpx.Client(
+    timeout=120.0,
+    # The transport's retries only cover failed connects; _httpx_send adds the status retries
+    transport=httpx.HTTPTransport(
+        http2=True, retries=_RETRY_TOTAL,
+        limits=httpx.Limits(max_keepalive_connections=16, max_connections=32)
+    )
+) if httpx else None
+
+_TRANSPORT_ERRORS = (requests.exceptions.RequestException,) + ((httpx.HTTPError,) if httpx else ())
+
+def _httpx_send(url, headers, body, stream=False):
+    """POST with httpx, retrying _RETRY_STATUSES answers like the requests session does"""
+    request = _HTTPX.build_request("POST", url, headers=headers, content=body)
+    for attempt in range(_RETRY_TOTAL + 1):
+        response = _HTTPX.send(request, stream=stream)
+        if response.status_code not in _RETRY_STATUSES or attempt == _RETRY_TOTAL:
+            return response
+        response.close()
+        time.sleep(_RETRY_BACKOFF * 2 ** attempt)
+
+def _post_gemini(url, headers, body):
+    """POST an encoded generateContent request, over HTTP/2 when httpx is installed"""
+    if _HTTPX is not None:
+        return _httpx_send(url, headers, body)
+    return _SESSION.post(url, headers=headers, data=body, timeout=120)
+
+def _open_gemini_stream(url, headers, body):
+    """POST a streamGenerateContent request and return the open response
+
+    HTTP and transport errors are raised here, before any of the body is read.
+    """
+    if _HTTPX is not None:
+        response = _httpx_send(url, headers, body, stream=True)
+    else:
+        response = _SESSION.post(url, headers=headers, data=body, stream=True, timeout=120)
+    try:
+        response.raise_for_status()
+    except Exception:
+        response.close()
+        raise
+    return response
+
+def _gemini_stream_lines(response):
+    """Yield the raw SSE lines of an open stream response as they arrive, then close it"""
+    try:
+        if _HTTPX is not None:
+            for line in response.iter_lines():
+                yield line.encode('utf-8')
+        else:
+            yield from response.iter_lines()
+    finally:
+        response.close()
+
+def _candidate_text(result):
+    """Text of the first candidate's first part in a generateContent result, or None"""
+    candidates = result.get('candidates') or ()
+    if not candidates:
+        return None
+    parts = candidates[0].get('content', {}).get('parts') or ()
+    if not parts:
+        return None
+    part = parts[0]
+    if isinstance(part, dict) and 'text' in part:
+        return part['text']
+    if isinstance(part, str):
+        return part
+    return str(part)
+
+# Gemini request constants, built once at import
+# Use the experimental Gemini model (may need adjustment for other models)
+_GEMINI_MODEL = "gemini-2.0-flash-thinking-exp"
+# Ensure GEMINI_API_ENDPOINT is set to v1beta in config.py
+_GEMINI_ENDPOINT = f"{GEMINI_API_ENDPOINT}/models/{_GEMINI_MODEL}:generateContent"
+_GEMINI_URL = f"{_GEMINI_ENDPOINT}?key={GEMINI_API_KEY}" if GEMINI_API_KEY else None
+_GEMINI_STREAM_URL = (
+    f"{GEMINI_API_ENDPOINT}/models/{_GEMINI_MODEL}:streamGenerateContent?alt=sse&key={GEMINI_API_KEY}"
+    if GEMINI_API_KEY else None
+)
+_GEMINI_HEADERS = {'Content-Type': 'application/json'}
+_GEMINI_GENERATION_CONFIG = {
+    "temperature": GEMINI_TEMPERATURE,
+    "topP": GEMINI_TOP_P,
+    "topK": GEMINI_TOP_K,
+    "maxOutputTokens": GEMINI_MAX_OUTPUT_TOKENS
+}
+
+def _log_failure(message):
+    """Log a per-request error; the traceback is only formatted with DEBUG logging on"""
+    logger.error(message, exc_info=logger.isEnabledFor(logging.DEBUG))
+
+def _json_default(obj):
+    """orjson fallback: ActionResponse by its dict form, anything else (timestamps) as str"""
+    if isinstance(obj, ActionResponse):
+        return obj.to_dict()
+    return str(obj)
+
+def _json_bytes(obj):
+    """Encode a response body; ActionResponse, NumPy values and other odd types included"""
+    return orjson.dumps(obj, default=_json_default, option=orjson.OPT_SERIALIZE_NUMPY)
+
+def _dashboard_panels(dashboard_data):
+    """Panels of a dashboard given either bare or wrapped as Grafana's {"dashboard": ...}"""
+    if not isinstance(dashboard_data, dict):
+        return []
+    dashboard = dashboard_data.get("dashboard", dashboard_data)
+    return dashboard.get("panels") or [] if isinstance(dashboard, dict) else []
+
+def _input_key(*parts):
+    """Digest of action inputs; keys are sorted so equal dicts hash alike"""
+    body = orjson.dumps(parts, default=str, option=orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return hashlib.blake2b(body, digest_size=16).digest()
+
+def _json_text(obj):
+    """Compact JSON for embedding in prompts (the model does not need indentation)"""
+    return orjson.dumps(obj, default=str, option=orjson.OPT_SERIALIZE_NUMPY).decode('utf-8')
+
+# Fixed instructions for generate_recommendations; the dashboard (and
+# analysis) JSON is appended per call
+_PROMPT_WITH_ANALYSIS = (
+    "Based on the following dashboard data and analysis results, "
+    "provide specific cost optimization recommendations for Databricks "
+    "usage. Include expected impact, implementation difficulty, and "
+    "specific steps for each recommendation.\n\n"
+    "IMPORTANT INSTRUCTIONS:\n"
+    "1. For EACH recommendation, include a detailed cost-benefit analysis with monthly, quarterly, and yearly savings\n"
+    "2. When you identify inefficient SQL queries, provide a fully rewritten optimized version of the query with clear explanations\n"
+    "3. Explain specific configuration changes with exact parameter values\n"
+    "4. Provide concrete implementation steps that can be immediately actioned\n"
+    "5. Include performance impact metrics whenever possible\n"
+    "6. Prioritize recommendations based on implementation effort vs. cost savings\n\n"
+)
+
+_PROMPT_NO_ANALYSIS = (
+    "Analyze this Grafana dashboard structure and provide specific "
+    "cost optimization recommendations for Databricks usage. Focus on "
+    "query efficiency, resource utilization, and storage optimization.\n\n"
+    "IMPORTANT INSTRUCTIONS:\n"
+    "1. For EACH recommendation, include a detailed cost-benefit analysis with monthly, quarterly, and yearly savings\n"
+    "2. When you identify inefficient SQL queries, provide a fully rewritten optimized version of the query with clear explanations\n"
+    "3. Explain specific configuration changes with exact parameter values\n"
+    "4. Provide concrete implementation steps that can be immediately actioned\n"
+    "5. Include performance impact metrics whenever possible\n"
+    "6. Prioritize recommendations based on implementation effort vs. cost savings\n\n"
+    "FORMAT EACH RECOMMENDATION AS FOLLOWS:\n"
+    "## Recommendation: [Title]\n"
+    "[Detailed explanation with specific actions]\n\n"
+    "### SQL Optimization (if applicable):\n"
+    "```sql\n"
+    "-- Original query\n"
+    "[ORIGINAL SQL]\n\n"
+    "-- Optimized query\n"
+    "[OPTIMIZED SQL]\n"
+    "```\n\n"
+    "### Implementation Steps:\n"
+    "1. [Specific step with exact values/code]\n"
+    "2. [Next step]\n\n"
+    "### Cost-Benefit Impact:\n"
+    "- **Monthly Savings**: $X,XXX\n"
+    "- **Quarterly Savings**: $X,XXX\n"
+    "- **Yearly Savings**: $X,XXX\n"
+    "- **Performance Improvement**: X%\n"
+    "- **Implementation Effort**: [Low/Medium/High]\n"
+    "- **Priority**: [High/Medium/Low]\n\n"
+)
+
+_PROMPT_COST_PATTERNS = (
+    "Analyze the following Databricks cost data and identify patterns, "
+    "anomalies, and optimization opportunities. Focus on cost efficiency "
+    "and resource utilization patterns.\n\n"
+)
+
+# analyze_sql_query wraps the query (and optional execution stats) between these
+_PROMPT_SQL_HEAD = (
+    "You are a Databricks SQL optimization expert. Analyze the following SQL query "
+    "and provide specific, actionable optimization recommendations to improve performance "
+    "and reduce cost. If the query is inefficient, provide a fully rewritten optimized version.\n\n"
+    "QUERY TO ANALYZE:\n"
+)
+
+_PROMPT_SQL_TAIL = (
+    "REQUIRED OUTPUT FORMAT:\n"
+    "1. First, provide a clear assessment of the query's efficiency (1-2 paragraphs)\n"
+    "2. List specific inefficiencies found (bullet points)\n"
+    "3. Provide a fully rewritten optimized version of the query in ```sql code blocks\n"
+    "4. Explain each optimization made and its impact (bullet points)\n"
+    "5. Provide the estimated performance improvement as a percentage\n\n"
+    "SQL OPTIMIZATION TECHNIQUES TO CONSIDER:\n"
+    "- Filter pushdown opportunities\n"
+    "- Join order optimization\n"
+    "- Predicate optimization (removing redundant conditions)\n"
+    "- Partition pruning improvements\n"
+    "- Data skew handling\n"
+    "- Caching strategies\n"
+    "- Column pruning (SELECT only needed columns)\n"
+    "- Proper JOIN types (broadcast vs. shuffle)\n"
+    "- Subquery optimization or elimination\n"
+    "- Using appropriate data types\n"
+    "- Removing unnecessary functions in WHERE clauses\n"
+    "- Leveraging materialized views or Delta caching\n"
+)
+
+# Seconds a finished background job waits for its get_job before it is dropped
+_JOB_TTL = 3600
+
 # Simple custom implementation of MCP components
 class ActionResponse:
     """Response from an MCP action."""
     
+    __slots__ = ("status", "data", "error")
+    
     def __init__(self, status, data=None, error=None):
         self.status = status
-        self.data = data if data is not None else {}
+        self.data = data
         self.error = error
         
     def to_dict(self):
         """Convert to dictionary for JSON serialization."""
-        result = {
-            "status": self.status,
-        }
-        
+        result = {"status": self.status}
         if self.data:
             result["data"] = self.data
-        
         if self.error:
             result["error"] = self.error
-            
         return result
 
+# Largest request body accepted
+_MAX_BODY = 64 * 1024 * 1024
+# Bytes read from the socket at a time while receiving a request body
+_READ_CHUNK = 64 * 1024
+
+def _gunzip(data):
+    """Decompress a gzip request body; ValueError if it would exceed _MAX_BODY"""
+    decompressor = zlib.decompressobj(wbits=31)
+    out = decompressor.decompress(data, _MAX_BODY + 1)
+    if len(out) > _MAX_BODY or decompressor.unconsumed_tail:
+        raise ValueError("Request body too large")
+    return out
+
+# Request header asking that the JSON body be spliced into prompts as sent
+_PRESERVE_JSON_HEADER = "X-MCP-Preserve-JSON"
+
+# POST action route: /actions/<name>, optionally with a trailing slash or query string
+_ACTION_RE = re.compile(r'/actions/([A-Za-z_][A-Za-z0-9_]*)/?(?:\?.*)?\Z')
+
+class StreamingResponse:
+    """Action result sent as chunked NDJSON; chunks yields bytes of whole lines."""
+    
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+class BinaryResponse:
+    """Action result sent as-is with its own content type instead of as JSON."""
+    
+    __slots__ = ("body", "content_type")
+    
+    def __init__(self, body, content_type):
+        self.body = body
+        self.content_type = content_type
+
+ARROW_STREAM_TYPE = "application/vnd.apache.arrow.stream"
+
+def _arrow_ipc(df):
+    """Serialize df as an Arrow IPC stream"""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def _ndjson_chunks(df, batch_size=500):
+    """Yield a header line for df, then its rows as NDJSON in batches of batch_size."""
+    columns = df.columns.tolist()
+    yield _json_bytes({"rows": len(df), "columns": columns}) + b"\n"
+    batch = []
+    for values in df.itertuples(index=False, name=None):
+        batch.append(_json_bytes(dict(zip(columns, values))))
+        if len(batch) == batch_size:
+            yield b"\n".join(batch) + b"\n"
+            batch = []
+    if batch:
+        yield b"\n".join(batch) + b"\n"
+
 class MCPServer:
     """Custom implementation of MCP Server for Grafana Cost Analyzer."""
     
-    def __init__(self, host="localhost", port=8090):
-        """Initialize the MCP server."""
+    def __init__(self, host="localhost", port=8090, max_workers=None):
+        """Initialize the MCP server.
+        
+        max_workers bounds concurrently executing actions (default MCP_WORKERS).
+        """
         self.host = host
         self.port = port
         self.running = False
         self.server = None
-        self.actions = {}
+        self._asgi_server = None
+        # Server implementation picked by MCP_SERVER; checked here so a missing
+        # uvicorn fails in the caller rather than on the server thread
+        self._asgi = MCP_SERVER.lower() == 'asgi'
+        if self._asgi and uvicorn is None:
+            raise RuntimeError("MCP_SERVER=asgi requires uvicorn and starlette")
+        # Set once the listening socket is bound, so callers need not probe the port
+        self.ready = threading.Event()
+        # Registered actions; exposed read-only so only register_action adds to it
+        self._actions = {}
+        self.actions = types.MappingProxyType(self._actions)
+        # Caps how many actions run at once; each request gets its own
+        # handler thread, but action work (Grafana, Databricks, Gemini) is bounded
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers or MCP_WORKERS, thread_name_prefix="mcp-action"
+        )
+        # Streamed answers are relayed after their action returns, outside the
+        # pool, so they share the same limit through this semaphore
+        self._stream_slots = threading.BoundedSemaphore(max_workers or MCP_WORKERS)
         self.grafana_api = GrafanaAPI()
+        # Gemini answers keyed by prompt digest; identical analysis requests
+        # within ten minutes are served from memory
+        self._gemini_cache = TTLCache(maxsize=512, ttl=600)
+        self._gemini_lock = threading.Lock()
+        self._gemini_hits = 0
+        self._gemini_misses = 0
+        self._gemini_inflight = {}
+        # Fan-out pool for independent sub-prompts; separate from the action
+        # pool so an action waiting on its sub-prompts cannot starve them
+        self._gemini_executor = concurrent.futures.ThreadPoolExecutor(max_workers=8, thread_name_prefix="mcp-gemini")
+        # Answers keyed by a digest of the action inputs, checked before any
+        # prompt is built; dashboards re-send identical data on refresh
+        self._analysis_cache = TTLCache(maxsize=1024, ttl=900)
+        # Running background analyses by job id
+        self._jobs = {}
+        # Finished jobs until claimed; expired _JOB_TTL seconds after finishing
+        self._finished_jobs = TTLCache(maxsize=1024, ttl=_JOB_TTL)
+        self._jobs_lock = threading.Lock()
         self.graphql_handler = GrafanaMCPGraphQL(self.grafana_api)  # Initialize GraphQL handler
+        # Automatic persisted queries: sha256 hex digest -> query text
+        self._persisted_queries = LRUCache(maxsize=1024)
+        self._persisted_lock = threading.Lock()
         logger.info(f"Initializing Grafana Cost MCP Server on {host}:{port}")
         
         # Register built-in actions
@@ -67,31 +470,64 @@ class MCPServer:
         self.register_action("analyze_cost_patterns", self.analyze_cost_patterns)
         self.register_action("generate_recommendations", self.generate_recommendations)
         self.register_action("analyze_sql_query", self.analyze_sql_query)  # Register SQL query analysis action
+        self.register_action("get_job", self.get_job)
+        self.register_action("get_cache_stats", self.get_cache_stats)
         
         # Register GraphQL endpoint handler
         self.register_graphql_handler()
     
     def register_action(self, name, func):
-        """Register an action function."""
-        self.actions[name] = func
+        """Register an action function.
+
+        The accepted keyword names are captured once here so requests with
+        unknown parameters can be rejected before the action is called.
+        Underscore parameters are filled in by the server, never by clients;
+        an action taking _raw_json may receive the undecoded request body.
+        """
+        names = inspect.signature(func).parameters
+        self._actions[name] = (
+            func,
+            frozenset(n for n in names if not n.startswith('_')),
+            '_raw_json' in names
+        )
         logger.info(f"Registered action: {name}")
     
     def register_graphql_handler(self):
         """Register the GraphQL handler in the MCP server."""
-        self.actions["graphql"] = self.handle_graphql_request
+        self.register_action("graphql", self.handle_graphql_request)
         logger.info("Registered GraphQL endpoint handler")
     
-    def handle_graphql_request(self, params):
+    def handle_graphql_request(self, query=None, variables=None, extensions=None):
         """Handle a GraphQL request.
         
+        Supports automatic persisted queries: a request carrying
+        extensions.persistedQuery.sha256Hash with the query registers it, and
+        later requests may send the hash alone. An unknown hash without a
+        query yields the error "PersistedQueryNotFound".
+        
         Args:
-            params: Dictionary containing 'query' and optional 'variables'
+            query: GraphQL query string
+            variables: Optional dictionary of query variables
+            extensions: Optional GraphQL extensions (persistedQuery)
             
         Returns:
             ActionResponse containing the GraphQL execution result
         """
-        query = params.get("query")
-        variables = params.get("variables", {})
+        variables = variables or {}
+        
+        persisted = (extensions or {}).get("persistedQuery") or {}
+        query_hash = persisted.get("sha256Hash")
+        if query_hash:
+            if query:
+                if hashlib.sha256(query.encode('utf-8')).hexdigest() != query_hash:
+                    return ActionResponse("error", error="provided sha does not match query")
+                with self._persisted_lock:
+                    self._persisted_queries[query_hash] = query
+            else:
+                with self._persisted_lock:
+                    query = self._persisted_queries.get(query_hash)
+                if query is None:
+                    return ActionResponse("error", error="PersistedQueryNotFound")
         
         if not query:
             return ActionResponse("error", error="No GraphQL query provided")
@@ -111,37 +547,101 @@ class MCPServer:
             
         self.running = True
         
+        if self._asgi:
+            self._serve_asgi()
+            return
+        
         class MCPRequestHandler(BaseHTTPRequestHandler):
             outer = self  # Reference to the outer class
+            # Keep connections open so a client can issue several actions per socket
+            protocol_version = "HTTP/1.1"
+            
+            def _send_json(self, payload):
+                """Write a 200 JSON response as one buffer (status line, headers and body)."""
+                self._send_body(_json_bytes(payload), "application/json")
+            
+            def _send_body(self, body, content_type):
+                """Write a 200 response with an already encoded body in one write."""
+                self.log_request(200)
+                self.wfile.write(
+                    f"{self.protocol_version} 200 OK\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    f"Connection: keep-alive\r\n\r\n".encode('latin-1') + body
+                )
+            
+            def _send_ndjson(self, response):
+                """Write a StreamingResponse with chunked transfer encoding, one HTTP chunk per batch."""
+                self.log_request(200)
+                self.wfile.write(
+                    f"{self.protocol_version} 200 OK\r\n"
+                    f"Content-Type: application/x-ndjson\r\n"
+                    f"Transfer-Encoding: chunked\r\n"
+                    f"Connection: keep-alive\r\n\r\n".encode('latin-1')
+                )
+                try:
+                    for chunk in response.chunks:
+                        self.wfile.write(f"{len(chunk):x}\r\n".encode('latin-1') + chunk + b"\r\n")
+                except Exception as e:
+                    # Headers are already out, so the only signal left is a dropped connection
+                    _log_failure(f"Error streaming response: {str(e)}")
+                    self.close_connection = True
+                    return
+                self.wfile.write(b"0\r\n\r\n")
             
             def do_GET(self):
                 """Handle GET requests - health check."""
-                self.send_response(200)
-                self.send_header('Content-type', 'application/json')
-                self.end_headers()
-                self.wfile.write(json.dumps({"status": "ok"}).encode())
+                self._send_json({"status": "ok"})
             
             def do_POST(self):
                 """Handle POST requests - actions."""
                 try:
-                    parsed_url = urlparse(self.path)
-                    
-                    # Extract action name from URL path
-                    path_parts = parsed_url.path.strip('/').split('/')
-                    if len(path_parts) < 2 or path_parts[0] != "actions":
+                    # Extract action name from URL path (/actions/<name>)
+                    match = _ACTION_RE.match(self.path)
+                    if match is None:
                         self.send_error(404, "Not Found")
                         return
                     
-                    action_name = path_parts[1]
-                    
-                    # Read request body
-                    content_length = int(self.headers.get('Content-Length', 0))
-                    body = self.rfile.read(content_length).decode('utf-8')
+                    action_name = match.group(1)
                     
-                    if body:
+                    try:
+                        content_length = int(self.headers.get('Content-Length', 0))
+                    except ValueError:
+                        content_length = -1
+                    if content_length < 0:
+                        self.send_error(400, "Invalid Content-Length")
+                        return
+                    if content_length > _MAX_BODY:
+                        self.send_error(413, "Request body too large")
+                        return
+                    # Read in bounded chunks: memory grows with the bytes that
+                    # actually arrive, not with what the header claims
+                    body = bytearray()
+                    while len(body) < content_length:
+                        chunk = self.rfile.read(min(_READ_CHUNK, content_length - len(body)))
+                        if not chunk:
+                            break
+                        body += chunk
+                    received = len(body)
+                    if received < content_length:
+                        self.send_error(400, "Incomplete request body")
+                        return
+
+                    payload = body
+                    if received and self.headers.get('Content-Encoding', '').lower() == 'gzip':
+                        try:
+                            payload = _gunzip(payload)
+                        except ValueError:
+                            self.send_error(413, "Request body too large")
+                            return
+                        except zlib.error:
+                            self.send_error(400, "Invalid gzip body")
+                            return
+
+                    if received:
                         try:
-                            params = json.loads(body)
-                        except json.JSONDecodeError:
+                            params = orjson.loads(payload)
+                        except orjson.JSONDecodeError:
                             self.send_error(400, "Invalid JSON")
                             return
                     else:
@@ -149,45 +649,139 @@ class MCPServer:
                     
                     # Execute action
                     if action_name in self.outer.actions:
-                        logger.info(f"Executing action: {action_name}")
+                        func, allowed, wants_raw = self.outer.actions[action_name]
+                        if not isinstance(params, dict) or params.keys() - allowed:
+                            self.send_error(400, f"Invalid parameters for action: {action_name}")
+                            return
+                        if wants_raw and self.headers.get(_PRESERVE_JSON_HEADER) == '1':
+                            params['_raw_json'] = bytes(payload)
+                        logger.info("Executing action: %s", action_name)
                         try:
-                            result = self.outer.actions[action_name](**params)
+                            future = self.outer._executor.submit(func, **params)
+                            result = future.result()
+                            
+                            if isinstance(result, StreamingResponse):
+                                self._send_ndjson(result)
+                                return
+                            if isinstance(result, BinaryResponse):
+                                self._send_body(result.body, result.content_type)
+                                return
                             
-                            # Convert to dictionary if it's an ActionResponse
-                            if isinstance(result, ActionResponse):
-                                result = result.to_dict()
-                                
-                            # Send response
-                            self.send_response(200)
-                            self.send_header('Content-type', 'application/json')
-                            self.end_headers()
-                            self.wfile.write(json.dumps(result).encode())
+                            # Send response (ActionResponse is encoded via _json_default)
+                            self._send_json(result)
                         except Exception as e:
-                            logger.error(f"Error executing action {action_name}: {str(e)}", exc_info=True)
+                            _log_failure(f"Error executing action {action_name}: {str(e)}")
                             self.send_error(500, f"Error executing action: {str(e)}")
                     else:
                         self.send_error(404, f"Action not found: {action_name}")
                 except Exception as e:
-                    logger.error(f"Error processing request: {str(e)}", exc_info=True)
+                    _log_failure(f"Error processing request: {str(e)}")
                     self.send_error(500, f"Internal Server Error: {str(e)}")
             
             def log_message(self, format, *args):
                 """Override to use our logger."""
-                logger.info(f"MCP Server: {format % args}")
+                # Lazy arguments: nothing is formatted unless INFO is enabled
+                logger.info("MCP Server: " + format, *args)
         
+        _start_log_queue()
         try:
             # Create and start HTTP server
-            self.server = HTTPServer((self.host, self.port), MCPRequestHandler)
+            self.server = ThreadingHTTPServer((self.host, self.port), MCPRequestHandler)
+            self.server.daemon_threads = True
+            self.ready.set()
             logger.info(f"Starting MCP server on {self.host}:{self.port}")
             self.server.serve_forever()
         except Exception as e:
             self.running = False
             logger.error(f"Error starting MCP server: {str(e)}", exc_info=True)
             raise
+        finally:
+            _stop_log_queue()
+    
+    def _asgi_app(self):
+        """Build the Starlette app serving the same routes as MCPRequestHandler."""
+        async def health(request):
+            return Response(_json_bytes({"status": "ok"}), media_type="application/json")
+        
+        async def action(request):
+            action_name = request.path_params["name"]
+            if action_name not in self.actions:
+                return Response(f"Action not found: {action_name}", status_code=404)
+            
+            try:
+                content_length = int(request.headers.get('content-length', 0))
+            except ValueError:
+                content_length = -1
+            if content_length < 0:
+                return Response("Invalid Content-Length", status_code=400)
+            if content_length > _MAX_BODY:
+                return Response("Request body too large", status_code=413)
+            body = await request.body()
+            if body and request.headers.get('content-encoding', '').lower() == 'gzip':
+                try:
+                    body = _gunzip(body)
+                except ValueError:
+                    return Response("Request body too large", status_code=413)
+                except zlib.error:
+                    return Response("Invalid gzip body", status_code=400)
+            try:
+                params = orjson.loads(body) if body else {}
+            except orjson.JSONDecodeError:
+                return Response("Invalid JSON", status_code=400)
+            
+            func, allowed, wants_raw = self.actions[action_name]
+            if not isinstance(params, dict) or params.keys() - allowed:
+                return Response(f"Invalid parameters for action: {action_name}", status_code=400)
+            if wants_raw and request.headers.get(_PRESERVE_JSON_HEADER) == '1':
+                params['_raw_json'] = body
+            
+            logger.info("Executing action: %s", action_name)
+            try:
+                result = await asyncio.get_running_loop().run_in_executor(
+                    self._executor, functools.partial(func, **params)
+                )
+            except Exception as e:
+                _log_failure(f"Error executing action {action_name}: {str(e)}")
+                return Response(f"Error executing action: {str(e)}", status_code=500)
+            
+            if isinstance(result, StreamingResponse):
+                return ASGIStreamingResponse(result.chunks, media_type="application/x-ndjson")
+            if isinstance(result, BinaryResponse):
+                return Response(result.body, media_type=result.content_type)
+            return Response(_json_bytes(result), media_type="application/json")
+        
+        return Starlette(routes=[
+            Route("/actions/{name}", action, methods=["POST"]),
+            Route("/{path:path}", health, methods=["GET"]),
+        ])
+    
+    def _serve_asgi(self):
+        """Serve the actions with uvicorn (httptools/uvloop when installed)."""
+        _start_log_queue()
+        try:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.bind((self.host, self.port))
+            sock.listen(2048)
+            config = uvicorn.Config(self._asgi_app(), loop="auto", http="auto", log_level="info")
+            self._asgi_server = uvicorn.Server(config)
+            self.ready.set()
+            logger.info(f"Starting MCP server (ASGI) on {self.host}:{self.port}")
+            self._asgi_server.run(sockets=[sock])
+        except Exception as e:
+            self.running = False
+            logger.error(f"Error starting MCP server: {str(e)}", exc_info=True)
+            raise
+        finally:
+            _stop_log_queue()
     
     def stop(self):
         """Stop the server."""
-        if self.server:
+        if self._asgi_server:
+            self._asgi_server.should_exit = True
+            self.running = False
+            logger.info("MCP server stopped")
+        elif self.server:
             self.server.shutdown()
             self.running = False
             logger.info("MCP server stopped")
@@ -235,18 +829,32 @@ class MCPServer:
                 error=f"Failed to process dashboard: {str(e)}"
             )
     
-    def execute_query(self, sql, time_from=None, time_to=None):
-        """Execute SQL query on Databricks."""
+    def execute_query(self, sql, time_from=None, time_to=None, stream=False, format="json"):
+        """Execute SQL query on Databricks.
+        
+        With stream=True a DataFrame result is sent as chunked NDJSON: a
+        {"rows", "columns"} header line followed by one line per row. With
+        format="arrow" it is sent as an Arrow IPC stream (requires pyarrow).
+        """
         try:
+            if format == "arrow" and pa is None:
+                return ActionResponse(status="error", error="Arrow output requires pyarrow")
+            
             result = execute_databricks_query(sql)
             
+            if isinstance(result, pd.DataFrame) and format == "arrow":
+                return BinaryResponse(_arrow_ipc(result), ARROW_STREAM_TYPE)
+            if isinstance(result, pd.DataFrame) and stream:
+                return StreamingResponse(_ndjson_chunks(result))
             if isinstance(result, pd.DataFrame):
+                # pandas encodes the rows to JSON in C; orjson splices that
+                # text into the response as-is instead of building row dicts
                 return ActionResponse(
                     status="success",
                     data={
                         "rows": len(result),
-                        "columns": list(result.columns),
-                        "data": result.to_dict(orient="records")
+                        "columns": result.columns.tolist(),
+                        "data": orjson.Fragment(result.to_json(orient="records", date_format="iso"))
                     }
                 )
             else:
@@ -261,16 +869,54 @@ class MCPServer:
                 error=f"Failed to execute query: {str(e)}"
             )
     
-    def analyze_cost_patterns(self, data):
-        """Analyze cost patterns in the provided data."""
+    def analyze_cost_patterns(self, data, async_job=False, _raw_json=None):
+        """Analyze cost patterns in the provided data.
+
+        With async_job=True the analysis runs on the worker pool and the
+        response is "accepted" with a job_id to pass to get_job. When the
+        client sent X-MCP-Preserve-JSON: 1, the request body is embedded in
+        the prompt as received instead of re-encoding data.
+        """
         try:
-            # Use Gemini API for analysis
-            response = self._call_gemini_api(
-                "Analyze the following Databricks cost data and identify patterns, " +
-                "anomalies, and optimization opportunities. Focus on cost efficiency " +
-                "and resource utilization patterns.\n\n" +
-                f"Data: {json.dumps(data, indent=2)}"
+            if async_job:
+                return ActionResponse(status="accepted", data={"job_id": self._submit_job(self._do_analyze, data, _raw_json)})
+
+            return self._do_analyze(data, _raw_json)
+        except Exception as e:
+            logger.error(f"Error analyzing cost patterns: {str(e)}")
+            return ActionResponse(
+                status="error",
+                error=f"Failed to analyze cost patterns: {str(e)}"
             )
+
+    def _submit_job(self, func, *args):
+        """Run func(*args) on the worker pool as a background job; returns its job id"""
+        job_id = uuid.uuid4().hex
+        with self._jobs_lock:
+            self._finished_jobs.expire()
+            self._jobs[job_id] = future = self._executor.submit(func, *args)
+        future.add_done_callback(lambda _: self._finish_job(job_id))
+        return job_id
+
+    def _finish_job(self, job_id):
+        """Move a completed job to _finished_jobs, where its expiry clock starts"""
+        with self._jobs_lock:
+            future = self._jobs.pop(job_id, None)
+            if future is not None:
+                self._finished_jobs[job_id] = future
+
+    def _do_analyze(self, data, raw_json=None):
+        """Build the cost-pattern prompt and run it through Gemini."""
+        try:
+            if raw_json is not None:
+                key = hashlib.blake2b(b"analyze_cost_patterns|" + raw_json, digest_size=16).digest()
+                build_prompt = lambda: f"{_PROMPT_COST_PATTERNS}Data: {raw_json.decode('utf-8')}"
+            else:
+                key = _input_key("analyze_cost_patterns", data)
+                build_prompt = lambda: f"{_PROMPT_COST_PATTERNS}Data: {_json_text(data)}"
+            
+            # Use Gemini API for analysis
+            response = self._memoized_gemini(key, build_prompt)
             
             return ActionResponse(
                 status="success",
@@ -285,63 +931,59 @@ class MCPServer:
                 status="error",
                 error=f"Failed to analyze cost patterns: {str(e)}"
             )
+
+    def get_job(self, job_id):
+        """Return the result of a background analysis, or "pending" while it runs.
+
+        A finished job is handed out once; one nobody claims is dropped
+        _JOB_TTL seconds after it finished.
+        """
+        with self._jobs_lock:
+            future = self._finished_jobs.pop(job_id, None)
+            if future is None:
+                if job_id in self._jobs:
+                    return ActionResponse(status="pending", data={"job_id": job_id})
+                return ActionResponse(status="error", error=f"Unknown job: {job_id}")
+        return future.result()
     
-    def generate_recommendations(self, dashboard_data, analysis_results=None):
-        """Generate cost optimization recommendations."""
+    def generate_recommendations(self, dashboard_data, analysis_results=None, per_panel=False, stream=False):
+        """Generate cost optimization recommendations.
+        
+        With per_panel=True (and no analysis_results) each panel of the
+        dashboard gets its own prompt; the prompts run concurrently and the
+        answers are joined in panel order. With stream=True the answer is
+        sent as NDJSON {"text": ...} lines as Gemini produces it.
+        """
         try:
-            # Prepare prompt based on available data
-            if analysis_results:
-                prompt = (
-                    "Based on the following dashboard data and analysis results, "
-                    "provide specific cost optimization recommendations for Databricks "
-                    "usage. Include expected impact, implementation difficulty, and "
-                    "specific steps for each recommendation.\n\n"
-                    "IMPORTANT INSTRUCTIONS:\n"
-                    "1. For EACH recommendation, include a detailed cost-benefit analysis with monthly, quarterly, and yearly savings\n"
-                    "2. When you identify inefficient SQL queries, provide a fully rewritten optimized version of the query with clear explanations\n"
-                    "3. Explain specific configuration changes with exact parameter values\n"
-                    "4. Provide concrete implementation steps that can be immediately actioned\n"
-                    "5. Include performance impact metrics whenever possible\n"
-                    "6. Prioritize recommendations based on implementation effort vs. cost savings\n\n"
-                    f"Dashboard: {json.dumps(dashboard_data, indent=2)}\n\n"
-                    f"Analysis: {json.dumps(analysis_results, indent=2)}"
-                )
-            else:
-                prompt = (
-                    "Analyze this Grafana dashboard structure and provide specific "
-                    "cost optimization recommendations for Databricks usage. Focus on "
-                    "query efficiency, resource utilization, and storage optimization.\n\n"
-                    "IMPORTANT INSTRUCTIONS:\n"
-                    "1. For EACH recommendation, include a detailed cost-benefit analysis with monthly, quarterly, and yearly savings\n"
-                    "2. When you identify inefficient SQL queries, provide a fully rewritten optimized version of the query with clear explanations\n"
-                    "3. Explain specific configuration changes with exact parameter values\n"
-                    "4. Provide concrete implementation steps that can be immediately actioned\n"
-                    "5. Include performance impact metrics whenever possible\n"
-                    "6. Prioritize recommendations based on implementation effort vs. cost savings\n\n"
-                    "FORMAT EACH RECOMMENDATION AS FOLLOWS:\n"
-                    "## Recommendation: [Title]\n"
-                    "[Detailed explanation with specific actions]\n\n"
-                    "### SQL Optimization (if applicable):\n"
-                    "```sql\n"
-                    "-- Original query\n"
-                    "[ORIGINAL SQL]\n\n"
-                    "-- Optimized query\n"
-                    "[OPTIMIZED SQL]\n"
-                    "```\n\n"
-                    "### Implementation Steps:\n"
-                    "1. [Specific step with exact values/code]\n"
-                    "2. [Next step]\n\n"
-                    "### Cost-Benefit Impact:\n"
-                    "- **Monthly Savings**: $X,XXX\n"
-                    "- **Quarterly Savings**: $X,XXX\n"
-                    "- **Yearly Savings**: $X,XXX\n"
-                    "- **Performance Improvement**: X%\n"
-                    "- **Implementation Effort**: [Low/Medium/High]\n"
-                    "- **Priority**: [High/Medium/Low]\n\n"
-                    f"Dashboard: {json.dumps(dashboard_data, indent=2)}"
+            panels = _dashboard_panels(dashboard_data) if per_panel and not analysis_results and not stream else None
+            if panels:
+                response = "\n\n".join(self._call_gemini_many(
+                    [f"{_PROMPT_NO_ANALYSIS}Panel: {_json_text(panel)}" for panel in panels]
+                ))
+                return ActionResponse(
+                    status="success",
+                    data={
+                        "recommendations": response,
+                        "format": "markdown"
+                    }
                 )
             
-            response = self._call_gemini_api(prompt)
+            # Prepare prompt based on available data
+            def build_prompt():
+                if analysis_results:
+                    return (
+                        f"{_PROMPT_WITH_ANALYSIS}Dashboard: {_json_text(dashboard_data)}\n\n"
+                        f"Analysis: {_json_text(analysis_results)}"
+                    )
+                return f"{_PROMPT_NO_ANALYSIS}Dashboard: {_json_text(dashboard_data)}"
+            
+            if stream:
+                return StreamingResponse(self._stream_gemini_api(build_prompt()))
+            
+            response = self._memoized_gemini(
+                _input_key("generate_recommendations", dashboard_data, analysis_results or None),
+                build_prompt
+            )
             
             # Structure the recommendations
             return ActionResponse(
@@ -370,41 +1012,8 @@ class MCPServer:
         """
         try:
             # Build a specialized prompt for SQL optimization
-            prompt = (
-                "You are a Databricks SQL optimization expert. Analyze the following SQL query "
-                "and provide specific, actionable optimization recommendations to improve performance "
-                "and reduce cost. If the query is inefficient, provide a fully rewritten optimized version.\n\n"
-                "QUERY TO ANALYZE:\n"
-                f"```sql\n{sql_query}\n```\n\n"
-            )
-            
-            if execution_stats:
-                prompt += (
-                    "EXECUTION STATISTICS:\n"
-                    f"{json.dumps(execution_stats, indent=2)}\n\n"
-                )
-                
-            prompt += (
-                "REQUIRED OUTPUT FORMAT:\n"
-                "1. First, provide a clear assessment of the query's efficiency (1-2 paragraphs)\n"
-                "2. List specific inefficiencies found (bullet points)\n"
-                "3. Provide a fully rewritten optimized version of the query in ```sql code blocks\n"
-                "4. Explain each optimization made and its impact (bullet points)\n"
-                "5. Provide the estimated performance improvement as a percentage\n\n"
-                "SQL OPTIMIZATION TECHNIQUES TO CONSIDER:\n"
-                "- Filter pushdown opportunities\n"
-                "- Join order optimization\n"
-                "- Predicate optimization (removing redundant conditions)\n"
-                "- Partition pruning improvements\n"
-                "- Data skew handling\n"
-                "- Caching strategies\n"
-                "- Column pruning (SELECT only needed columns)\n"
-                "- Proper JOIN types (broadcast vs. shuffle)\n"
-                "- Subquery optimization or elimination\n"
-                "- Using appropriate data types\n"
-                "- Removing unnecessary functions in WHERE clauses\n"
-                "- Leveraging materialized views or Delta caching\n"
-            )
+            stats = f"EXECUTION STATISTICS:\n{_json_text(execution_stats)}\n\n" if execution_stats else ""
+            prompt = f"{_PROMPT_SQL_HEAD}```sql\n{sql_query}\n```\n\n{stats}{_PROMPT_SQL_TAIL}"
             
             # Call Gemini API with specialized SQL optimization prompt
             response = self._call_gemini_api(prompt)
@@ -423,45 +1032,129 @@ class MCPServer:
                 error=f"Failed to analyze SQL query: {str(e)}"
             )
     
-    def _call_gemini_api(self, prompt):
-        """Call the Gemini API with the given prompt."""
+    def get_cache_stats(self):
+        """Report Gemini cache effectiveness and sizes."""
+        with self._gemini_lock:
+            stats = {
+                "gemini_hits": self._gemini_hits,
+                "gemini_misses": self._gemini_misses,
+                "gemini_cached": len(self._gemini_cache),
+                "gemini_inflight": len(self._gemini_inflight),
+                "analyses_cached": len(self._analysis_cache),
+            }
+        return ActionResponse(status="success", data=stats)
+    
+    def _stream_gemini_api(self, prompt):
+        """Return an iterator of NDJSON {"text": ...} lines answering prompt as Gemini generates it.
+        
+        The key check and the upstream request happen before this returns, so
+        their errors reach the caller instead of a stream that already
+        answered 200. A cached answer is sent as a single line.
+        """
         if not GEMINI_API_KEY:
             raise ValueError("Gemini API Key not configured")
-
-        headers = {
-            'Content-Type': 'application/json',
+        
+        key = hashlib.blake2b(prompt.encode('utf-8'), digest_size=16).digest()
+        with self._gemini_lock:
+            cached = self._gemini_cache.get(key)
+        if cached is not None:
+            return iter((_json_bytes({"text": cached}) + b"\n",))
+        
+        data = {
+            "contents": ({"parts": ({"text": prompt},)},),
+            "generationConfig": _GEMINI_GENERATION_CONFIG
         }
-
-        # Use the experimental Gemini model
-        model_name = "gemini-2.0-flash-thinking-exp" 
-        # Ensure GEMINI_API_ENDPOINT is set to v1beta in config.py
-        api_endpoint = f"{GEMINI_API_ENDPOINT}/models/{model_name}:generateContent"
+        response = _open_gemini_stream(_GEMINI_STREAM_URL, _GEMINI_HEADERS, orjson.dumps(data))
+        return self._relay_gemini_stream(key, response)
+    
+    def _relay_gemini_stream(self, key, response):
+        """Yield the text of an open Gemini stream as NDJSON lines; a completed stream is cached."""
+        pieces = []
+        with self._stream_slots:
+            for line in _gemini_stream_lines(response):
+                if not line.startswith(b"data:"):
+                    continue
+                text = _candidate_text(orjson.loads(line[5:]))
+                if text:
+                    pieces.append(text)
+                    yield _json_bytes({"text": text}) + b"\n"
+        with self._gemini_lock:
+            self._gemini_cache[key] = "".join(pieces)
+    
+    def _call_gemini_many(self, prompts):
+        """Send independent prompts concurrently; answers come back in prompt order."""
+        return list(self._gemini_executor.map(self._call_gemini_api, prompts))
+    
+    def _memoized_gemini(self, key, build_prompt):
+        """Return the answer cached under key, or build the prompt and call Gemini."""
+        with self._gemini_lock:
+            cached = self._analysis_cache.get(key)
+        if cached is not None:
+            return cached
+        text = self._call_gemini_api(build_prompt())
+        if not text.startswith("Error:"):
+            with self._gemini_lock:
+                self._analysis_cache[key] = text
+        return text
+    
+    def _call_gemini_api(self, prompt):
+        """Call the Gemini API with the given prompt, reusing a cached answer when possible."""
+        if not GEMINI_API_KEY:
+            raise ValueError("Gemini API Key not configured")
+        
+        key = hashlib.blake2b(prompt.encode('utf-8'), digest_size=16).digest()
+        with self._gemini_lock:
+            cached = self._gemini_cache.get(key)
+            if cached is not None:
+                self._gemini_hits += 1
+                future, owner = None, False
+            else:
+                self._gemini_misses += 1
+                # Identical prompts arriving while one is on the wire share its answer
+                future = self._gemini_inflight.get(key)
+                owner = future is None
+                if owner:
+                    future = concurrent.futures.Future()
+                    self._gemini_inflight[key] = future
+            hits, misses = self._gemini_hits, self._gemini_misses
+        if cached is not None:
+            logger.info(f"Gemini cache hit ({hits} hits / {misses} misses)")
+            return cached
+        if not owner:
+            logger.info("Gemini prompt already in flight, waiting for its answer")
+            return future.result()
+        logger.info(f"Gemini cache miss ({hits} hits / {misses} misses)")
+        
+        try:
+            text = self._request_gemini(prompt)
+        except Exception as e:
+            with self._gemini_lock:
+                self._gemini_inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+        with self._gemini_lock:
+            if not text.startswith("Error:"):
+                self._gemini_cache[key] = text
+            self._gemini_inflight.pop(key, None)
+        future.set_result(text)
+        return text
+    
+    def _request_gemini(self, prompt):
+        """Send one prompt to the Gemini API and return the response text."""
+        model_name = _GEMINI_MODEL
+        api_endpoint = _GEMINI_ENDPOINT
         
         logger.info(f"Using experimental Gemini model: {model_name}")
         
-        # Use parameters compatible with the API (may need adjustment for experimental models)
+        # Tuples serialize as JSON arrays; the generation config is shared
         data = {
-            "contents": [{
-                "parts": [{
-                    "text": prompt
-                }]
-            }],
-            "generationConfig": {
-                "temperature": GEMINI_TEMPERATURE,
-                "topP": GEMINI_TOP_P,
-                "topK": GEMINI_TOP_K,
-                "maxOutputTokens": GEMINI_MAX_OUTPUT_TOKENS
-            }
+            "contents": ({"parts": ({"text": prompt},)},),
+            "generationConfig": _GEMINI_GENERATION_CONFIG
         }
         
         try:
             logger.info(f"Calling Gemini API with model: {model_name} via endpoint: {api_endpoint}")
-            response = requests.post(
-                f"{api_endpoint}?key={GEMINI_API_KEY}", 
-                headers=headers, 
-                json=data,
-                timeout=120
-            )
+            response = _post_gemini(_GEMINI_URL, _GEMINI_HEADERS, orjson.dumps(data))
             
             # More detailed error handling
             if response.status_code != 200:
@@ -469,7 +1162,7 @@ class MCPServer:
                 error_detail = ""
                 
                 try:
-                    error_json = response.json()
+                    error_json = orjson.loads(response.content)
                     if 'error' in error_json:
                         error_detail = f": {error_json['error'].get('message', '')}"
                 except:
@@ -485,57 +1178,49 @@ class MCPServer:
                 else:
                     response.raise_for_status()
             
-            result = response.json()
-            
-            if 'candidates' in result and len(result['candidates']) > 0:
-                content = result['candidates'][0].get('content', {})
-                if 'parts' in content and len(content['parts']) > 0:
-                    part = content['parts'][0]
-                    if isinstance(part, dict) and 'text' in part:
-                        return part['text']
-                    elif isinstance(part, str):
-                        return part
-                    else:
-                        return str(part)
+            result = orjson.loads(response.content)
+            usage = result.get('usageMetadata')
+            if usage:
+                logger.info(
+                    f"Gemini usage: {usage.get('promptTokenCount')} prompt tokens, "
+                    f"{usage.get('candidatesTokenCount')} response tokens"
+                )
+            text = _candidate_text(result)
+            if text is not None:
+                return text
             return "Error: Unexpected response format from Gemini API."
 
-        except requests.exceptions.RequestException as e:
+        except _TRANSPORT_ERRORS as e:
             logger.error(f"Error calling Gemini API: {str(e)}")
             raise
 
 # Server startup function
-def start_mcp_server(host="localhost", port=8090):
+def start_mcp_server(host="localhost", port=8090, max_workers=None):
     """Start the MCP server on the specified host and port."""
-    server = MCPServer(host, port)
+    server = MCPServer(host, port, max_workers)
     server_thread = threading.Thread(target=server.start, daemon=True)
     server_thread.start()
     
-    # Wait for server to start up (optional)
-    retry_count = 0
-    max_retries = 5
-    while retry_count < max_retries:
-        try:
-            # Try to connect to check if server is up
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                s.connect((host, port))
-                logger.info(f"MCP server successfully started on {host}:{port}")
-                return server
-        except ConnectionRefusedError:
-            retry_count += 1
-            if retry_count >= max_retries:
-                logger.warning(f"MCP server may not have started correctly after {max_retries} attempts")
-                return server
-            logger.info(f"Waiting for MCP server to start (attempt {retry_count}/{max_retries})...")
-            time.sleep(1)
+    # The server signals readiness as soon as its socket is listening
+    if server.ready.wait(timeout=5):
+        logger.info(f"MCP server successfully started on {host}:{port}")
+    else:
+        logger.warning(f"MCP server may not have started correctly on {host}:{port}")
     
     return server
 
 if __name__ == "__main__":
     # Start the server when the script is run directly
-    server = start_mcp_server()
-    try:
-        # Keep the main thread alive
-        while True:
-            time.sleep(1)
-    except KeyboardInterrupt:
-        server.stop()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Grafana Cost Analyzer MCP server")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--threads-http", type=int, default=None,
+                        help=f"maximum concurrently executing actions (default {MCP_WORKERS})")
+    args = parser.parse_args()
+    server = start_mcp_server(args.host, args.port, args.threads_http)
+    # Block the main thread until SIGINT/SIGTERM, without waking up to poll
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+    stop_event.wait()
+    server.stop()
\ No newline at end of file
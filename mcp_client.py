@@ -4,43 +4,372 @@ MCP Client for Grafana Cost Analyzer
 This module provides a client interface to interact with the MCP server
 for cost analysis and recommendations.
 """
-from typing import Dict, Any, Optional, List, Union
+from typing import Dict, Any, Optional, List, Union, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+import hashlib
+import gzip
+from functools import lru_cache
+from cachetools import TTLCache
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import logging
-import json
+import orjson
+import numpy as np
 import datetime
+import asyncio
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp is only needed for AsyncMCPClient
+    aiohttp = None
+
+try:
+    import ijson
+except ImportError:  # ijson is optional; trend values are then read from the full response
+    ijson = None
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Custom JSON encoder to handle non-serializable types
-class MCPJSONEncoder(json.JSONEncoder):
-    """Custom JSON encoder that handles pandas and datetime objects."""
-    
-    def default(self, obj):
-        # Handle datetime objects
-        if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
-            return obj.isoformat()
-        # Handle any other non-serializable types
-        try:
-            return super().default(obj)
-        except TypeError:
-            return str(obj)  # Convert any other non-serializable objects to strings
+# Status value of a successful action response
+_SUCCESS = "success"
+# Statuses of an action running as a background job (async_job=True) and of
+# get_job while that job is still running
+_ACCEPTED = "accepted"
+_PENDING = "pending"
+
+# Seconds between get_job polls for a background job
+JOB_POLL_INTERVAL = 1.0
+
+# Request bodies larger than this are sent gzip-compressed
+GZIP_THRESHOLD = 1024 * 1024
+
+def _isoformat(obj):
+    return obj.isoformat()
+
+# orjson fallback encoders by exact type; subclasses (e.g. pandas Timestamp)
+# are added on first sight from the nearest registered base class
+_DEFAULT_ENCODERS = {
+    datetime.datetime: _isoformat,
+    datetime.date: _isoformat,
+    datetime.time: _isoformat,
+}
+
+def _mcp_default(obj):
+    """orjson fallback for types it does not encode natively (e.g. pandas timestamps)."""
+    encode = _DEFAULT_ENCODERS.get(type(obj))
+    if encode is None:
+        # Use the nearest registered base class; anything else becomes a string
+        encode = next((_DEFAULT_ENCODERS[base] for base in type(obj).__mro__[1:]
+                       if base in _DEFAULT_ENCODERS), str)
+        _DEFAULT_ENCODERS[type(obj)] = encode
+    return encode(obj)
+
+@lru_cache(maxsize=256)
+def _query_hash(query: str) -> str:
+    """SHA-256 hex digest identifying a query for automatic persisted queries."""
+    return hashlib.sha256(query.encode('utf-8')).hexdigest()
+
+# GraphQL documents sent by MCPClient, built once at import
+_QUERY_COST_METRICS = """
+query GetCostMetrics($dashboardUid: String) {
+    costMetrics(dashboardUid: $dashboardUid) {
+        id
+        name
+        value
+        unit
+        trend
+        comparisonPeriod
+    }
+}
+"""
+
+_QUERY_COST_TREND = """
+query GetCostTrend($metricId: String!, $period: String) {
+    costTrend(metricId: $metricId, period: $period) {
+        metricId
+        trendData {
+            date
+            value
+        }
+        changePercentage
+        anomalies {
+            date
+            value
+            description
+        }
+    }
+}
+"""
+
+_QUERY_COMPUTE_COST_METRICS = """
+query GetComputeCostMetrics($resourceType: String, $period: String) {
+    computeCostMetrics(resourceType: $resourceType, period: $period) {
+        id
+        name
+        value
+        unit
+        resourceType
+        utilizationPercentage
+        trendPercentage
+        instanceCount
+        recommendations {
+            id
+            description
+            potentialSavings
+            confidence
+        }
+    }
+}
+"""
+
+_QUERY_STORAGE_COST_METRICS = """
+query GetStorageCostMetrics($storageType: String, $period: String) {
+    storageCostMetrics(storageType: $storageType, period: $period) {
+        id
+        name
+        value
+        unit
+        storageType
+        capacityGB
+        usedCapacityGB
+        utilizationPercentage
+        costPerGB
+        recommendations {
+            id
+            description
+            potentialSavings
+            confidence
+        }
+    }
+}
+"""
+
+_QUERY_NETWORK_COST_METRICS = """
+query GetNetworkCostMetrics($trafficType: String, $period: String) {
+    networkCostMetrics(trafficType: $trafficType, period: $period) {
+        id
+        name
+        value
+        unit
+        trafficType
+        dataTransferredGB
+        costPerGB
+        trendPercentage
+        recommendations {
+            id
+            description
+            potentialSavings
+            confidence
+        }
+    }
+}
+"""
+
+_QUERY_DATABASE_COST_METRICS = """
+query GetDatabaseCostMetrics($databaseType: String, $period: String) {
+    databaseCostMetrics(databaseType: $databaseType, period: $period) {
+        id
+        name
+        value
+        unit
+        databaseType
+        instanceCount
+        provisionedIOPS
+        storageSize
+        utilizationPercentage
+        queryPerformance
+        costEfficiency
+        recommendations {
+            id
+            description
+            potentialSavings
+            confidence
+            implementationComplexity
+        }
+    }
+}
+"""
+
+_QUERY_SERVERLESS_COST_METRICS = """
+query GetServerlessCostMetrics($functionType: String, $period: String) {
+    serverlessCostMetrics(functionType: $functionType, period: $period) {
+        id
+        name
+        value
+        unit
+        functionType
+        invocationCount
+        executionTime
+        memoryUsage
+        coldStarts
+        costPerInvocation
+        costPerGBSecond
+        recommendations {
+            id
+            description
+            potentialSavings
+            confidence
+            implementationComplexity
+        }
+    }
+}
+"""
+
+_QUERY_ALL_COST_METRICS = """
+query GetAllCostMetrics($period: String, $resourceType: String, $storageType: String,
+                        $trafficType: String, $databaseType: String, $functionType: String) {
+    compute: computeCostMetrics(resourceType: $resourceType, period: $period) {
+        id
+        name
+        value
+        unit
+        resourceType
+        utilizationPercentage
+        trendPercentage
+        instanceCount
+        recommendations {
+            id
+            description
+            potentialSavings
+            confidence
+        }
+    }
+    storage: storageCostMetrics(storageType: $storageType, period: $period) {
+        id
+        name
+        value
+        unit
+        storageType
+        capacityGB
+        usedCapacityGB
+        utilizationPercentage
+        costPerGB
+        recommendations {
+            id
+            description
+            potentialSavings
+            confidence
+        }
+    }
+    network: networkCostMetrics(trafficType: $trafficType, period: $period) {
+        id
+        name
+        value
+        unit
+        trafficType
+        dataTransferredGB
+        costPerGB
+        trendPercentage
+        recommendations {
+            id
+            description
+            potentialSavings
+            confidence
+        }
+    }
+    database: databaseCostMetrics(databaseType: $databaseType, period: $period) {
+        id
+        name
+        value
+        unit
+        databaseType
+        instanceCount
+        provisionedIOPS
+        storageSize
+        utilizationPercentage
+        queryPerformance
+        costEfficiency
+        recommendations {
+            id
+            description
+            potentialSavings
+            confidence
+            implementationComplexity
+        }
+    }
+    serverless: serverlessCostMetrics(functionType: $functionType, period: $period) {
+        id
+        name
+        value
+        unit
+        functionType
+        invocationCount
+        executionTime
+        memoryUsage
+        coldStarts
+        costPerInvocation
+        costPerGBSecond
+        recommendations {
+            id
+            description
+            potentialSavings
+            confidence
+            implementationComplexity
+        }
+    }
+}
+"""
 
 class MCPClient:
     """Client for interacting with the Grafana Cost MCP Server."""
     
-    def __init__(self, host: str = "localhost", port: int = 8090):
+    # Seconds a successful result of these actions is reused for identical params
+    CACHE_TTLS = {
+        "get_dashboard": 300,
+        "graphql": 30,
+        "analyze_cost_patterns": 300,
+    }
+    
+    def __init__(self, host: str = "localhost", port: int = 8090,
+                 cache_ttls: Optional[Dict[str, int]] = None):
         """Initialize the MCP client.
         
         Args:
             host: The host where the MCP server is running
             port: The port on which the MCP server is listening
+            cache_ttls: Optional per-action TTL overrides; 0 disables caching
+                for that action
         """
         self.base_url = f"http://{host}:{port}"
+        # One pooled keep-alive session for every action this client sends
+        self._session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=10,
+            pool_maxsize=20,
+            max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=[502, 503, 504])
+        )
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._session.headers.update({"Content-Type": "application/json"})
+        # Per-action result caches; GraphQL mutations are never cached
+        ttls = {**self.CACHE_TTLS, **(cache_ttls or {})}
+        self._caches = {name: TTLCache(maxsize=1024, ttl=ttl) for name, ttl in ttls.items() if ttl > 0}
+        self._cache_lock = threading.Lock()
+        # Hashes of GraphQL queries the server has registered
+        self._persisted = set()
+        # Created on first use by gather()
+        self._executor = None
+        self._executor_lock = threading.Lock()
         logger.info(f"Initializing MCP client for server at {self.base_url}")
     
+    def close(self):
+        """Close the pooled connections and worker threads held by this client."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        self._session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
     def execute_action(self, action_name: str, params: Dict[str, Any]) -> Dict[str, Any]:
         """Execute an action on the MCP server.
         
@@ -57,24 +386,53 @@ class MCPClient:
         url = f"{self.base_url}/actions/{action_name}"
         
         try:
-            logger.info(f"Executing MCP action: {action_name}")
-            
-            # Use our custom JSON encoder to handle non-serializable types like dates
-            json_data = json.dumps(params, cls=MCPJSONEncoder)
-            
-            response = requests.post(
+            cache = self._caches.get(action_name)
+            if cache is not None and action_name == "graphql" and \
+                    str(params.get("query", "")).lstrip().startswith("mutation"):
+                cache = None
+            
+            # orjson handles dates and NumPy values; _mcp_default covers the rest.
+            # Cacheable requests are encoded with sorted keys so the body doubles as the cache key
+            option = orjson.OPT_SERIALIZE_NUMPY
+            if cache is not None:
+                option |= orjson.OPT_SORT_KEYS
+            json_data = orjson.dumps(params, default=_mcp_default, option=option)
+            
+            if cache is not None:
+                key = hashlib.blake2b(json_data, digest_size=16).digest()
+                with self._cache_lock:
+                    cached = cache.get(key)
+                if cached is not None:
+                    logger.info(f"Using cached result for MCP action: {action_name}")
+                    return cached
+            
+            logger.info("Executing MCP action: %s", action_name)
+            
+            headers = None
+            if len(json_data) > GZIP_THRESHOLD:
+                # Large payloads (serialized query results) compress well
+                json_data = gzip.compress(json_data, compresslevel=1)
+                headers = {"Content-Encoding": "gzip"}
+            
+            response = self._session.post(
                 url,
-                data=json_data,  # Use pre-encoded JSON string
-                headers={"Content-Type": "application/json"},
+                data=json_data,  # Use pre-encoded JSON bytes
+                headers=headers,
                 timeout=300  # Longer timeout for AI operations
             )
             response.raise_for_status()
             
-            result = response.json()
-            
-            if result.get("status") == "success":
-                logger.info(f"Successfully executed MCP action: {action_name}")
-                return result.get("data", {})
+            result = orjson.loads(response.content)
+            if result.get("status") == _ACCEPTED:
+                result = self._await_job(result["data"]["job_id"])
+            
+            if result.get("status") == _SUCCESS:
+                logger.info("Successfully executed MCP action: %s", action_name)
+                data = result["data"] if "data" in result else {}
+                if cache is not None:
+                    with self._cache_lock:
+                        cache[key] = data
+                return data
             else:
                 error_message = result.get("error", "Unknown error")
                 logger.error(f"MCP action {action_name} failed: {error_message}")
@@ -82,7 +440,38 @@ class MCPClient:
                 
         except requests.exceptions.RequestException as e:
             logger.error(f"Error communicating with MCP server: {str(e)}")
-            raise Exception(f"MCP communication error: {str(e)}")
+            # The message carries the cause; skip chaining the transport traceback
+            raise Exception(f"MCP communication error: {str(e)}") from None
+    
+    def _await_job(self, job_id: str) -> Dict[str, Any]:
+        """Poll get_job until a background action finishes; returns its raw response"""
+        body = orjson.dumps({"job_id": job_id})
+        while True:
+            time.sleep(JOB_POLL_INTERVAL)
+            response = self._session.post(f"{self.base_url}/actions/get_job", data=body, timeout=300)
+            response.raise_for_status()
+            result = orjson.loads(response.content)
+            if result.get("status") != _PENDING:
+                return result
+    
+    def gather(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Execute independent actions concurrently.
+        
+        Args:
+            calls: (action_name, params) pairs
+            
+        Returns:
+            The action results, in the order of calls
+            
+        Raises:
+            Exception: The first failure, after the other calls have finished
+        """
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="mcp-client")
+            executor = self._executor
+        futures = [executor.submit(self.execute_action, name, params) for name, params in calls]
+        return [future.result() for future in futures]
     
     def execute_graphql(self, query: str, variables: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Execute a GraphQL query against the MCP server.
@@ -97,16 +486,28 @@ class MCPClient:
         Raises:
             Exception: If the GraphQL execution fails
         """
-        params = {
-            "query": query,
-        }
+        # Automatic persisted queries: once the server has seen a query it is
+        # sent by hash alone, with the full text only on the first use or when
+        # the server no longer knows the hash
+        query_hash = _query_hash(query)
+        params = {"extensions": {"persistedQuery": {"version": 1, "sha256Hash": query_hash}}}
+        if query_hash not in self._persisted:
+            params["query"] = query
         
         if variables:
             params["variables"] = variables
             
         try:
             logger.info("Executing GraphQL query through MCP")
-            return self.execute_action("graphql", params)
+            try:
+                result = self.execute_action("graphql", params)
+            except Exception as e:
+                if "query" in params or "PersistedQueryNotFound" not in str(e):
+                    raise
+                params["query"] = query
+                result = self.execute_action("graphql", params)
+            self._persisted.add(query_hash)
+            return result
         except Exception as e:
             logger.error(f"Error executing GraphQL query: {str(e)}")
             raise Exception(f"GraphQL execution failed: {str(e)}")
@@ -120,18 +521,7 @@ class MCPClient:
         Returns:
             Dictionary containing cost metrics
         """
-        query = """
-        query GetCostMetrics($dashboardUid: String) {
-            costMetrics(dashboardUid: $dashboardUid) {
-                id
-                name
-                value
-                unit
-                trend
-                comparisonPeriod
-            }
-        }
-        """
+        query = _QUERY_COST_METRICS
         
         variables = {}
         if dashboard_uid:
@@ -154,23 +544,7 @@ class MCPClient:
         Returns:
             Dictionary containing trend data
         """
-        query = """
-        query GetCostTrend($metricId: String!, $period: String) {
-            costTrend(metricId: $metricId, period: $period) {
-                metricId
-                trendData {
-                    date
-                    value
-                }
-                changePercentage
-                anomalies {
-                    date
-                    value
-                    description
-                }
-            }
-        }
-        """
+        query = _QUERY_COST_TREND
         
         variables = {
             "metricId": metric_id,
@@ -184,7 +558,65 @@ class MCPClient:
             logger.error(f"Error getting cost trend: {str(e)}")
             raise
     
-    def get_dashboard_analysis(self, dashboard_data: Dict[str, Any]) -> Dict[str, Any]:
+    def get_cost_trend_values(self, metric_id: str, period: str = "30d") -> np.ndarray:
+        """Get the values of a cost trend as a float64 array.
+        
+        With ijson installed the trendData values are parsed straight off the
+        response stream, so neither the raw body nor the point dicts are held
+        in memory at once.
+        
+        Args:
+            metric_id: The ID of the cost metric
+            period: Time period for trend analysis (e.g., "7d", "30d", "90d")
+            
+        Returns:
+            Array of trend values in date order
+        """
+        variables = {"metricId": metric_id, "period": period}
+        if ijson is not None:
+            body = orjson.dumps({"query": _QUERY_COST_TREND, "variables": variables})
+            with self._session.post(f"{self.base_url}/actions/graphql", data=body,
+                                    stream=True, timeout=300) as response:
+                response.raise_for_status()
+                response.raw.decode_content = True
+                values = np.fromiter(
+                    (float(v or 0.0) for v in ijson.items(response.raw, "data.costTrend.trendData.item.value")),
+                    dtype=np.float64
+                )
+            if values.size:
+                return values
+        
+        # No ijson, or nothing streamed (possibly an error response): use the regular path
+        points = self.get_cost_trend(metric_id, period).get("trendData") or []
+        return np.fromiter((point.get("value") or 0.0 for point in points),
+                           dtype=np.float64, count=len(points))
+    
+    def summarize_trend(self, trend: Dict[str, Any]) -> Dict[str, float]:
+        """Summarize a costTrend result in one vectorized pass.
+        
+        Args:
+            trend: A costTrend result as returned by get_cost_trend
+            
+        Returns:
+            Dictionary with the mean, standard deviation and first-to-last
+            percentage change of the trend values
+        """
+        points = trend.get("trendData") or []
+        values = np.fromiter((point.get("value") or 0.0 for point in points),
+                             dtype=np.float64, count=len(points))
+        if not values.size:
+            return {"mean": 0.0, "std": 0.0, "changePercentage": 0.0}
+        
+        first = values[0]
+        change = (values[-1] - first) / first * 100.0 if first else 0.0
+        return {
+            "mean": float(values.mean()),
+            "std": float(values.std()),
+            "changePercentage": float(change)
+        }
+    
+    def get_dashboard_analysis(self, dashboard_data: Dict[str, Any],
+                               query_results: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Get a complete analysis of a dashboard.
         
         This is a convenience method that chains multiple MCP actions
@@ -192,6 +624,8 @@ class MCPClient:
         
         Args:
             dashboard_data: The Grafana dashboard structure
+            query_results: Optional query results (JSON-serializable) to analyze
+                for cost patterns alongside the recommendations
             
         Returns:
             Dictionary containing the analysis results
@@ -200,17 +634,21 @@ class MCPClient:
             # Step 1: Retrieve dashboard
             dashboard_data = self.execute_action("get_dashboard", {"data": dashboard_data})
             
-            # Step 2: Generate recommendations based on dashboard structure
-            recommendations = self.execute_action(
-                "generate_recommendations", 
-                {"dashboard_data": dashboard_data}
-            )
+            # Step 2: Generate recommendations based on dashboard structure,
+            # analyzing any query results at the same time
+            calls = [("generate_recommendations", {"dashboard_data": dashboard_data})]
+            if query_results is not None:
+                calls.append(("analyze_cost_patterns", {"data": query_results}))
+            recommendations, *patterns = self.gather(calls)
             
-            return {
+            analysis = {
                 "dashboard": dashboard_data.get("dashboard", {}),
                 "recommendations": recommendations.get("recommendations", ""),
                 "format": recommendations.get("format", "markdown")
             }
+            if patterns:
+                analysis["analysis"] = patterns[0].get("analysis", "")
+            return analysis
             
         except Exception as e:
             logger.error(f"Error getting dashboard analysis: {str(e)}")
@@ -226,13 +664,15 @@ class MCPClient:
             Dictionary containing the analysis results
         """
         try:
-            # Convert any DataFrame objects to JSON-serializable dictionaries
+            # Encode DataFrames to JSON records in pandas (C) and splice the
+            # text into the request as-is instead of building row dicts
             serializable_results = {}
             
             for key, value in results.items():
-                if hasattr(value, 'to_dict'):
-                    # Convert pandas DataFrame to dictionary
-                    serializable_results[key] = value.to_dict(orient='records')
+                if hasattr(value, 'to_json'):
+                    serializable_results[key] = orjson.Fragment(
+                        value.to_json(orient='records', date_format='iso')
+                    )
                 else:
                     serializable_results[key] = value
             
@@ -290,26 +730,7 @@ class MCPClient:
         Returns:
             Dictionary containing compute cost metrics
         """
-        query = """
-        query GetComputeCostMetrics($resourceType: String, $period: String) {
-            computeCostMetrics(resourceType: $resourceType, period: $period) {
-                id
-                name
-                value
-                unit
-                resourceType
-                utilizationPercentage
-                trendPercentage
-                instanceCount
-                recommendations {
-                    id
-                    description
-                    potentialSavings
-                    confidence
-                }
-            }
-        }
-        """
+        query = _QUERY_COMPUTE_COST_METRICS
         
         variables = {"period": period}
         if resource_type:
@@ -332,27 +753,7 @@ class MCPClient:
         Returns:
             Dictionary containing storage cost metrics
         """
-        query = """
-        query GetStorageCostMetrics($storageType: String, $period: String) {
-            storageCostMetrics(storageType: $storageType, period: $period) {
-                id
-                name
-                value
-                unit
-                storageType
-                capacityGB
-                usedCapacityGB
-                utilizationPercentage
-                costPerGB
-                recommendations {
-                    id
-                    description
-                    potentialSavings
-                    confidence
-                }
-            }
-        }
-        """
+        query = _QUERY_STORAGE_COST_METRICS
         
         variables = {"period": period}
         if storage_type:
@@ -375,26 +776,7 @@ class MCPClient:
         Returns:
             Dictionary containing network cost metrics
         """
-        query = """
-        query GetNetworkCostMetrics($trafficType: String, $period: String) {
-            networkCostMetrics(trafficType: $trafficType, period: $period) {
-                id
-                name
-                value
-                unit
-                trafficType
-                dataTransferredGB
-                costPerGB
-                trendPercentage
-                recommendations {
-                    id
-                    description
-                    potentialSavings
-                    confidence
-                }
-            }
-        }
-        """
+        query = _QUERY_NETWORK_COST_METRICS
         
         variables = {"period": period}
         if traffic_type:
@@ -417,30 +799,7 @@ class MCPClient:
         Returns:
             Dictionary containing database cost metrics
         """
-        query = """
-        query GetDatabaseCostMetrics($databaseType: String, $period: String) {
-            databaseCostMetrics(databaseType: $databaseType, period: $period) {
-                id
-                name
-                value
-                unit
-                databaseType
-                instanceCount
-                provisionedIOPS
-                storageSize
-                utilizationPercentage
-                queryPerformance
-                costEfficiency
-                recommendations {
-                    id
-                    description
-                    potentialSavings
-                    confidence
-                    implementationComplexity
-                }
-            }
-        }
-        """
+        query = _QUERY_DATABASE_COST_METRICS
         
         variables = {"period": period}
         if database_type:
@@ -463,30 +822,7 @@ class MCPClient:
         Returns:
             Dictionary containing serverless cost metrics
         """
-        query = """
-        query GetServerlessCostMetrics($functionType: String, $period: String) {
-            serverlessCostMetrics(functionType: $functionType, period: $period) {
-                id
-                name
-                value
-                unit
-                functionType
-                invocationCount
-                executionTime
-                memoryUsage
-                coldStarts
-                costPerInvocation
-                costPerGBSecond
-                recommendations {
-                    id
-                    description
-                    potentialSavings
-                    confidence
-                    implementationComplexity
-                }
-            }
-        }
-        """
+        query = _QUERY_SERVERLESS_COST_METRICS
         
         variables = {"period": period}
         if function_type:
@@ -497,4 +833,187 @@ class MCPClient:
             return result.get("serverlessCostMetrics", [])
         except Exception as e:
             logger.error(f"Error getting serverless cost metrics: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+    
+    def get_all_cost_metrics(self, period: str = "30d", filters: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """Get compute, storage, network, database and serverless cost metrics in one request.
+        
+        The five category queries are sent as a single aliased GraphQL
+        operation, so this costs one round trip instead of five.
+        
+        Args:
+            period: Time period for metrics (e.g., "7d", "30d", "90d")
+            filters: Optional per-category filters keyed by "resourceType",
+                "storageType", "trafficType", "databaseType" or "functionType"
+            
+        Returns:
+            Dictionary with "compute", "storage", "network", "database" and
+            "serverless" metric lists
+        """
+        query = _QUERY_ALL_COST_METRICS
+        
+        variables = {"period": period}
+        if filters:
+            variables.update({name: value for name, value in filters.items() if value})
+            
+        try:
+            result = self.execute_graphql(query, variables)
+            return {
+                category: result.get(category, [])
+                for category in ("compute", "storage", "network", "database", "serverless")
+            }
+        except Exception as e:
+            logger.error(f"Error getting all cost metrics: {str(e)}")
+            raise
+
+
+class AsyncMCPClient:
+    """aiohttp-based MCP client for fanning out many actions from one event loop
+    
+    Use as an async context manager so the underlying session is closed:
+    
+        async with AsyncMCPClient() as client:
+            compute, storage = await asyncio.gather(
+                client.execute_graphql(_QUERY_COMPUTE_COST_METRICS, {"period": "30d"}),
+                client.execute_graphql(_QUERY_STORAGE_COST_METRICS, {"period": "30d"}),
+            )
+    """
+    
+    def __init__(self, host: str = "localhost", port: int = 8090):
+        """Initialize the async MCP client.
+        
+        Args:
+            host: The host where the MCP server is running
+            port: The port on which the MCP server is listening
+        """
+        if aiohttp is None:
+            raise ImportError("AsyncMCPClient requires the aiohttp package")
+        self.base_url = f"http://{host}:{port}"
+        self._session = None
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+    
+    def _get_session(self):
+        """Create the pooled session on first use (it must be bound to a running loop)"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers={"Content-Type": "application/json"},
+                connector=aiohttp.TCPConnector(limit=40, keepalive_timeout=30),
+                timeout=aiohttp.ClientTimeout(total=300)  # Longer timeout for AI operations
+            )
+        return self._session
+    
+    async def aclose(self):
+        """Close the underlying HTTP session"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+    
+    async def execute_action(self, action_name: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute an action on the MCP server.
+        
+        Args:
+            action_name: The name of the action to execute
+            params: Parameters for the action
+            
+        Returns:
+            The response data from the MCP server
+            
+        Raises:
+            Exception: If the action execution fails
+        """
+        json_data = orjson.dumps(params, default=_mcp_default, option=orjson.OPT_SERIALIZE_NUMPY)
+        try:
+            async with self._get_session().post(f"{self.base_url}/actions/{action_name}", data=json_data) as response:
+                response.raise_for_status()
+                result = orjson.loads(await response.read())
+            if result.get("status") == _ACCEPTED:
+                result = await self._await_job(result["data"]["job_id"])
+        except aiohttp.ClientError as e:
+            logger.error(f"Error communicating with MCP server: {str(e)}")
+            raise Exception(f"MCP communication error: {str(e)}") from None
+        
+        if result.get("status") == _SUCCESS:
+            return result["data"] if "data" in result else {}
+        error_message = result.get("error", "Unknown error")
+        logger.error(f"MCP action {action_name} failed: {error_message}")
+        raise Exception(f"MCP action failed: {error_message}")
+    
+    async def _await_job(self, job_id: str) -> Dict[str, Any]:
+        """Poll get_job until a background action finishes; returns its raw response"""
+        body = orjson.dumps({"job_id": job_id})
+        while True:
+            await asyncio.sleep(JOB_POLL_INTERVAL)
+            async with self._get_session().post(f"{self.base_url}/actions/get_job", data=body) as response:
+                response.raise_for_status()
+                result = orjson.loads(await response.read())
+            if result.get("status") != _PENDING:
+                return result
+    
+    async def execute_graphql(self, query: str, variables: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Execute a GraphQL query against the MCP server.
+        
+        Args:
+            query: The GraphQL query string
+            variables: Optional variables for the GraphQL query
+            
+        Returns:
+            The GraphQL response data
+        """
+        params = {"query": query}
+        if variables:
+            params["variables"] = variables
+        return await self.execute_action("graphql", params)
+    
+    async def get_all_cost_metrics(self, period: str = "30d", filters: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """Get compute, storage, network, database and serverless cost metrics in one request.
+        
+        Args:
+            period: Time period for metrics (e.g., "7d", "30d", "90d")
+            filters: Optional per-category filters, as for MCPClient.get_all_cost_metrics
+            
+        Returns:
+            Dictionary with the five metric lists keyed by category
+        """
+        variables = {"period": period}
+        if filters:
+            variables.update({name: value for name, value in filters.items() if value})
+        result = await self.execute_graphql(_QUERY_ALL_COST_METRICS, variables)
+        return {
+            category: result.get(category, [])
+            for category in ("compute", "storage", "network", "database", "serverless")
+        }
+    
+    async def get_dashboard_analysis(self, dashboard_data: Dict[str, Any],
+                                     query_results: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Get a complete analysis of a dashboard.
+        
+        Recommendations and the optional query-result analysis run
+        concurrently once the dashboard has been retrieved.
+        
+        Args:
+            dashboard_data: The Grafana dashboard structure
+            query_results: Optional query results (JSON-serializable) to analyze
+            
+        Returns:
+            Dictionary containing the analysis results
+        """
+        dashboard_data = await self.execute_action("get_dashboard", {"data": dashboard_data})
+        
+        calls = [self.execute_action("generate_recommendations", {"dashboard_data": dashboard_data})]
+        if query_results is not None:
+            calls.append(self.execute_action("analyze_cost_patterns", {"data": query_results}))
+        recommendations, *patterns = await asyncio.gather(*calls)
+        
+        analysis = {
+            "dashboard": dashboard_data.get("dashboard", {}),
+            "recommendations": recommendations.get("recommendations", ""),
+            "format": recommendations.get("format", "markdown")
+        }
+        if patterns:
+            analysis["analysis"] = patterns[0].get("analysis", "")
+        return analysis
@@ -15,9 +15,14 @@ source $VENV_DIR/bin/activate
 # Install dependencies if needed
 pip install -r requirements.txt
 
-# Run the tests
-echo "Running end-to-end tests..."
-python3 -m unittest test_e2e.py
+# Run the tests, sharded across all but two cores (at least one worker);
+# --dist loadgroup keeps the Grafana test classes together on one worker
+WORKERS=$(( $(nproc) - 2 ))
+if [ $WORKERS -lt 1 ]; then
+    WORKERS=1
+fi
+echo "Running tests on $WORKERS workers..."
+python3 -m pytest -n $WORKERS --dist loadgroup test_e2e.py test_gemini_api.py test_pdf_generation.py test_grafana_graphql.py test_grafana_cache.py test_grafana_mcp_server.py test_mcp_client.py
 
 # Check if tests were successful
 if [ $? -eq 0 ]; then
@@ -1,43 +1,185 @@
 import unittest
 import os
+import io
+import hashlib
 import requests
-import json
+import urllib3
+import orjson
 import re
+from html import unescape
+from urllib.parse import parse_qs, urlencode, urlsplit
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from unittest import mock
+from urllib3.connectionpool import HTTPConnectionPool
 from dotenv import load_dotenv
+import config
 from app import app
-from grafana_api import GrafanaAPI
+from grafana_api import GrafanaAPI, has_cost_term
 
-# Load environment variables
-load_dotenv()
+# Load the .env next to this file, once, and only when the environment is
+# not already populated (e.g. on CI); existing variables are never overridden
+if not os.environ.get('GRAFANA_URL'):
+    load_dotenv(Path(__file__).with_name('.env'), override=False)
 
+# Grafana is replayed from fixtures/ unless GRAFANACOST_LIVE is set
+LIVE = bool(os.environ.get('GRAFANACOST_LIVE'))
+
+# Grafana details, read once for both test classes. Live runs take them from
+# the environment; replay runs use the app's own client settings and a
+# placeholder dashboard UID, since nothing is contacted
+if LIVE:
+    GRAFANA_URL = os.environ.get('GRAFANA_URL')
+    GRAFANA_TOKEN = os.environ.get('GRAFANA_API_KEY')
+    DASHBOARD_ID = os.environ.get('GRAFANA_COST_DASHBOARD_ID')
+else:
+    GRAFANA_URL = config.GRAFANA_URL
+    GRAFANA_TOKEN = config.GRAFANA_SERVICE_TOKEN
+    DASHBOARD_ID = os.environ.get('GRAFANA_COST_DASHBOARD_ID') or 'replay-cost-dashboard'
+HAS_GRAFANA_CONFIG = not LIVE or all([GRAFANA_URL, GRAFANA_TOKEN, DASHBOARD_ID])
+_NO_GRAFANA_CONFIG = "Live Grafana URL, API key or cost dashboard ID not configured"
+_FIXTURES = Path(__file__).with_name('fixtures')
+
+# GRAFANACOST_FAST=1 skips deep structure checks on a dashboard whose
+# content hash already passed them; the hash is kept in pytest's cache
+FAST = bool(os.environ.get('GRAFANACOST_FAST'))
+_KNOWN_GOOD_KEY = 'grafanacost/dashboard_hash'
+
+# Flask test client and Grafana API client shared by every test class
+app.config['TESTING'] = True
+app.config['WTF_CSRF_ENABLED'] = False
+_CLIENT = app.test_client()
+_API = GrafanaAPI()
+
+# Constant page path, regexes and expected-key sets shared by the tests
+_DASHBOARD_PATH = f'/dashboard/{DASHBOARD_ID}'
+_IFRAME_RE = re.compile(rb'<iframe[^>]*src="([^"]*)"')
+# Case-insensitive needle, searched without lowercasing a copy of the body
+_ERROR_RE = re.compile(rb'error', re.IGNORECASE)
+# Every structural marker of the dashboard page as one alternation, so a
+# single finditer pass reports which of them the page contains
+_HTML_STRUCT_RE = re.compile(
+    rb'(?P<doctype><!DOCTYPE html>)|(?P<html_open><html)|(?P<head><head>)|(?P<body><body>)'
+    rb'|(?P<html_close></html>)|(?P<iframe>iframe)|(?P<dashboard>(?i:dashboard))'
+)
+_HTML_STRUCT_GROUPS = frozenset(_HTML_STRUCT_RE.groupindex)
+_REQUIRED_DASHBOARD_PROPS = frozenset(('id', 'uid', 'title', 'panels', 'time', 'timezone', 'schemaVersion'))
+_REQUIRED_PANEL_PROPS = frozenset(('id', 'type', 'title', 'gridPos'))
+_PANEL_SUMMARY_PROPS = frozenset(('id', 'type', 'title'))
+_DASHBOARD_SUMMARY_PROPS = frozenset(('id', 'uid', 'title'))
+_REQUIRED_API_DASHBOARD_PROPS = frozenset(('id', 'uid', 'title', 'url'))
+
+def _fixture(name):
+    """Fixture body with the placeholder UID replaced by the configured dashboard ID"""
+    return (_FIXTURES / name).read_bytes().replace(b'DASHBOARD_UID', (DASHBOARD_ID or '').encode())
+
+# Recorded Grafana response bodies by request path, loaded once at import
+_REPLAY = {} if LIVE else {
+    f'/api/dashboards/uid/{DASHBOARD_ID}': _fixture('dashboard.json'),
+    '/api/search': _fixture('search.json'),
+}
+_NOT_FOUND = orjson.dumps({'message': 'Dashboard not found'})
+
+def _replay(url):
+    """Status and body Grafana would return for url"""
+    body = _REPLAY.get(urlsplit(url).path)
+    return (200, body) if body is not None else (404, _NOT_FOUND)
+
+def _fake_session_get(session, url, **_):
+    """Stand-in for requests.Session.get that serves recorded payloads"""
+    status, body = _replay(url)
+    response = requests.Response()
+    response.status_code = status
+    response.reason = 'OK' if status == 200 else 'Not Found'
+    response.headers['Content-Type'] = 'application/json'
+    response.url = url
+    response._content = body
+    return response
+
+def _fake_urlopen(pool, method, url, body=None, headers=None, preload_content=True, **_):
+    """Stand-in for urllib3's urlopen, used by GrafanaAPI's pooled GETs"""
+    status, data = _replay(url)
+    return urllib3.HTTPResponse(
+        body=io.BytesIO(data), headers={'Content-Type': 'application/json'}, status=status,
+        reason='OK' if status == 200 else 'Not Found', preload_content=preload_content
+    )
+
+_PATCHERS = (
+    mock.patch.object(requests.Session, 'get', _fake_session_get),
+    mock.patch.object(HTTPConnectionPool, 'urlopen', _fake_urlopen),
+)
+
+def setUpModule():
+    """Route Grafana traffic to the recorded payloads for offline runs"""
+    if not LIVE:
+        for patcher in _PATCHERS:
+            patcher.start()
+
+def tearDownModule():
+    if not LIVE:
+        for patcher in _PATCHERS:
+            patcher.stop()
+
+def _raw_get(api, path):
+    """Undecoded GET of a Grafana API path over the client's pooled session"""
+    return api.session.get(f"{api.base_url}{path}")
+
+def _iframe_src(data):
+    """Return the iframe src URL from a dashboard page, or None if there is no iframe"""
+    match = _IFRAME_RE.search(data)
+    return unescape(match.group(1).decode('utf-8')) if match else None
+
+def _contains_any_ci(obj, match):
+    """True if match accepts any lowercased string key or value in a decoded JSON tree"""
+    if isinstance(obj, str):
+        return match(obj.lower())
+    if isinstance(obj, dict):
+        return any(_contains_any_ci(key, match) or _contains_any_ci(value, match)
+                   for key, value in obj.items())
+    if isinstance(obj, list):
+        return any(_contains_any_ci(item, match) for item in obj)
+    return False
+
+def _iframe_query(data):
+    """Return the query parameters of the dashboard page's iframe URL as a parse_qs dict"""
+    src = _iframe_src(data)
+    return None if src is None else parse_qs(urlsplit(src).query, keep_blank_values=True)
+
+@unittest.skipUnless(HAS_GRAFANA_CONFIG, _NO_GRAFANA_CONFIG)
 class GrafanaCostDashboardE2ETests(unittest.TestCase):
     """End-to-end tests for the Grafana Cost Dashboard application"""
     
     @classmethod
     def setUpClass(cls):
         """Set up the test environment once for all tests"""
-        # Configure Flask test client
-        app.config['TESTING'] = True
-        app.config['WTF_CSRF_ENABLED'] = False
-        cls.client = app.test_client()
-        
-        # Get Grafana details from environment
-        cls.grafana_url = os.environ.get('GRAFANA_URL')
-        cls.grafana_token = os.environ.get('GRAFANA_API_KEY')
-        cls.dashboard_id = os.environ.get('GRAFANA_COST_DASHBOARD_ID')
-        
-        if not all([cls.grafana_url, cls.grafana_token, cls.dashboard_id]):
-            raise ValueError("Missing required environment variables for testing")
-        
-        # Configure headers for direct API access
-        cls.grafana_headers = {
-            'Authorization': f'Bearer {cls.grafana_token}',
-            'Content-Type': 'application/json'
-        }
+        cls.client = _CLIENT
+        cls.grafana_url = GRAFANA_URL
+        cls.grafana_token = GRAFANA_TOKEN
+        cls.dashboard_id = DASHBOARD_ID
+        
+        if not HAS_GRAFANA_CONFIG:
+            raise unittest.SkipTest(_NO_GRAFANA_CONFIG)
         
-        # Initialize the API client
-        cls.grafana_api = GrafanaAPI()
+        cls.grafana_api = _API
+        
+        # Fire every raw Grafana read the tests need at once over the client's
+        # pooled session; tests assert against these responses
+        endpoints = {
+            'dashboard_uid': f"/api/dashboards/uid/{cls.dashboard_id}",
+            'search': "/api/search?type=dash-db",
+        }
+        with ThreadPoolExecutor(max_workers=len(endpoints)) as executor:
+            futures = {name: executor.submit(_raw_get, cls.grafana_api, path) for name, path in endpoints.items()}
+        cls._resp = {name: future.result() for name, future in futures.items()}
+        
+        response = cls._resp['dashboard_uid']
+        cls._dashboard_status = response.status_code
+        cls._dashboard_payload = orjson.loads(response.content) if response.ok else {}
+        
+        # One client-side dashboard fetch shared by the panel and structure tests
+        cls._dashboard_full = cls.grafana_api.get_dashboard(cls.dashboard_id)
+        cls._panels = cls._dashboard_full.get('dashboard', {}).get('panels', [])
+        cls._body_hash = hashlib.blake2b(orjson.dumps(cls._dashboard_full, option=orjson.OPT_SORT_KEYS)).hexdigest()
     
     def test_homepage_loads(self):
         """Test that the homepage loads successfully"""
@@ -49,11 +191,11 @@ class GrafanaCostDashboardE2ETests(unittest.TestCase):
         """Test that the default dashboard redirect works"""
         response = self.client.get('/default-cost-dashboard', follow_redirects=False)
         self.assertEqual(response.status_code, 302)  # 302 is redirect
-        self.assertIn(f'/dashboard/{self.dashboard_id}', response.location)
+        self.assertIn(_DASHBOARD_PATH, response.location)
     
     def test_dashboard_page_loads(self):
         """Test that the dashboard page loads successfully"""
-        response = self.client.get(f'/dashboard/{self.dashboard_id}')
+        response = self.client.get(_DASHBOARD_PATH)
         self.assertEqual(response.status_code, 200)
         self.assertIn(b'iframe', response.data)  # Check that the iframe is present
     
@@ -61,124 +203,111 @@ class GrafanaCostDashboardE2ETests(unittest.TestCase):
         """Test the API endpoint for cost dashboards"""
         response = self.client.get('/api/dashboards/cost')
         self.assertEqual(response.status_code, 200)
-        data = json.loads(response.data)
+        data = orjson.loads(response.data)
         self.assertIsInstance(data, list)  # Should return a list of dashboards
     
+    @unittest.skipUnless(LIVE, 'connectivity check needs GRAFANACOST_LIVE=1')
     def test_direct_grafana_api_access(self):
         """Test direct access to Grafana API to validate credentials"""
-        url = f"{self.grafana_url}/api/dashboards/uid/{self.dashboard_id}"
-        response = requests.get(url, headers=self.grafana_headers)
-        self.assertEqual(response.status_code, 200)
-        data = response.json()
+        self.assertEqual(self._dashboard_status, 200)
+        data = self._dashboard_payload
         self.assertIn('dashboard', data)
         self.assertIn('meta', data)
+        
+        # The shared session asks for compressed bodies; urllib3 inflates them transparently
+        response = self._resp['dashboard_uid']
+        self.assertIn('gzip', response.request.headers.get('Accept-Encoding', ''))
+        self.assertIn(response.raw.headers.get('Content-Encoding'), (None, 'gzip', 'deflate', 'br', 'zstd'))
     
+    @unittest.skipUnless(LIVE, 'permission check needs GRAFANACOST_LIVE=1')
     def test_grafana_token_permissions(self):
         """Test that the Grafana token has the necessary permissions"""
-        # Test access to search API
-        search_url = f"{self.grafana_url}/api/search?type=dash-db"
-        response = requests.get(search_url, headers=self.grafana_headers)
-        self.assertEqual(response.status_code, 200)
+        # Test access to search API (both fetched in setUpClass)
+        self.assertEqual(self._resp['search'].status_code, 200)
         
         # Test access to dashboard by UID
-        dashboard_url = f"{self.grafana_url}/api/dashboards/uid/{self.dashboard_id}"
-        response = requests.get(dashboard_url, headers=self.grafana_headers)
-        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._dashboard_status, 200)
     
     def test_grafana_dashboard_content(self):
         """Test that the Grafana dashboard contains expected content"""
-        url = f"{self.grafana_url}/api/dashboards/uid/{self.dashboard_id}"
-        response = requests.get(url, headers=self.grafana_headers)
-        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._dashboard_status, 200)
         
-        dashboard_data = response.json().get('dashboard', {})
+        dashboard_data = self._dashboard_payload.get('dashboard', {})
         
         # Verify dashboard has panels
         self.assertIn('panels', dashboard_data)
         self.assertTrue(len(dashboard_data['panels']) > 0)
         
         # Check if dashboard has cost-related content
-        dashboard_json = json.dumps(dashboard_data).lower()
-        cost_terms = ['cost', 'expense', 'billing', 'budget', 'finance']
-        self.assertTrue(any(term in dashboard_json for term in cost_terms), 
+        self.assertTrue(_contains_any_ci(dashboard_data, has_cost_term),
                         "Dashboard doesn't contain any cost-related terms")
     
     def test_dashboard_embed_url_generation(self):
         """Test that the dashboard embed URL is correctly generated"""
-        response = self.client.get(f'/dashboard/{self.dashboard_id}')
+        response = self.client.get(_DASHBOARD_PATH)
         self.assertEqual(response.status_code, 200)
         
-        # Extract the iframe src URL from the response
-        iframe_src_match = re.search(rb'<iframe[^>]*src="([^"]*)"', response.data)
-        self.assertIsNotNone(iframe_src_match, "No iframe found in dashboard page")
-        
-        embed_url = iframe_src_match.group(1).decode('utf-8')
+        # Extract the iframe src URL from the response, staying in bytes
+        match = _IFRAME_RE.search(response.data)
+        self.assertIsNotNone(match, "No iframe found in dashboard page")
+        path, _, query = match.group(1).replace(b'&amp;', b'&').partition(b'?')
         
         # Verify embed URL parameters
-        self.assertIn(f'd/{self.dashboard_id}', embed_url)
-        self.assertIn('orgId=', embed_url)
-        self.assertIn('theme=', embed_url)
-        self.assertIn('from=', embed_url)
-        self.assertIn('to=', embed_url)
-        self.assertIn('kiosk', embed_url)
-    
-    def test_dashboard_with_custom_time_range(self):
-        """Test that custom time ranges are correctly applied to the dashboard"""
-        custom_from = 'now-30d'
-        custom_to = 'now'
-        
-        response = self.client.get(
-            f'/dashboard/{self.dashboard_id}?from={custom_from}&to={custom_to}'
-        )
-        self.assertEqual(response.status_code, 200)
-        
-        # Check that custom time range is included in the iframe URL
-        self.assertIn(f'from={custom_from}'.encode(), response.data)
-        self.assertIn(f'to={custom_to}'.encode(), response.data)
+        self.assertIn(b'd/' + self.dashboard_id.encode(), path)
+        params = parse_qs(query, keep_blank_values=True)
+        for param in (b'orgId', b'theme', b'from', b'to', b'kiosk'):
+            self.assertIn(param, params)
     
-    def test_dashboard_with_custom_theme(self):
-        """Test that custom theme is correctly applied to the dashboard"""
-        custom_theme = 'dark'
-        
-        response = self.client.get(
-            f'/dashboard/{self.dashboard_id}?theme={custom_theme}'
+    def test_dashboard_url_parameters(self):
+        """Test that custom time ranges and themes are applied to the iframe URL"""
+        cases = (
+            {'from': 'now-30d', 'to': 'now'},
+            {'theme': 'dark'},
+            {'from': '2023-01-01', 'to': '2023-01-31'},
+            {'from': 'now-60d', 'to': 'now', 'theme': 'dark'},
         )
-        self.assertEqual(response.status_code, 200)
-        
-        # Check that the custom theme is included in the iframe URL
-        self.assertIn(f'theme={custom_theme}'.encode(), response.data)
+        for case in cases:
+            with self.subTest(params=case):
+                response = self.client.get(f'{_DASHBOARD_PATH}?{urlencode(case)}')
+                self.assertEqual(response.status_code, 200)
+                
+                query = _iframe_query(response.data)
+                self.assertIsNotNone(query, "No iframe found in dashboard page")
+                for param, value in case.items():
+                    self.assertEqual(query[param][0], value)
     
     def test_dashboard_panels_api_access(self):
         """Test that we can access panels via API and validate their structure"""
-        panels = self.grafana_api.get_dashboard_panels(self.dashboard_id)
+        panels = self._panels
         
         # Verify panels structure and content
         self.assertIsInstance(panels, list)
         if panels:
             panel = panels[0]  # Check first panel
-            required_props = ['id', 'type', 'title']
-            for prop in required_props:
-                self.assertIn(prop, panel)
+            self.assertLessEqual(_PANEL_SUMMARY_PROPS, panel.keys())
     
     def test_dashboard_metrics_data_structure(self):
         """Test that dashboard metrics data has the expected structure"""
-        dashboard_data = self.grafana_api.get_dashboard(self.dashboard_id)
+        # run_cache is attached by conftest.py; plain unittest runs always do the full checks
+        cache = getattr(self, 'run_cache', None) if FAST else None
+        if cache is not None and cache.get(_KNOWN_GOOD_KEY, None) == self._body_hash:
+            self.skipTest('dashboard unchanged since the last passing run')
+        dashboard_data = self._dashboard_full
         
         self.assertIn('dashboard', dashboard_data)
         dashboard = dashboard_data['dashboard']
         
-        required_props = ['id', 'uid', 'title', 'panels', 'time', 'timezone', 'schemaVersion']
-        for prop in required_props:
-            self.assertIn(prop, dashboard)
+        self.assertLessEqual(_REQUIRED_DASHBOARD_PROPS, dashboard.keys())
         
         self.assertIn('from', dashboard['time'])
         self.assertIn('to', dashboard['time'])
         
         if len(dashboard['panels']) > 0:
             panel = dashboard['panels'][0]
-            panel_props = ['id', 'type', 'title', 'gridPos']
-            for prop in panel_props:
-                self.assertIn(prop, panel)
+            self.assertLessEqual(_REQUIRED_PANEL_PROPS, panel.keys())
+        
+        if cache is not None:
+            cache.set(_KNOWN_GOOD_KEY, self._body_hash)
     
     def test_error_handling_invalid_dashboard(self):
         """Test application's handling of invalid dashboard ID"""
@@ -186,37 +315,19 @@ class GrafanaCostDashboardE2ETests(unittest.TestCase):
         
         response = self.client.get(f'/dashboard/{invalid_id}')
         self.assertEqual(response.status_code, 200)
-        self.assertIn(b'error', response.data.lower())
+        self.assertRegex(response.data, _ERROR_RE)
     
     def test_api_error_handling(self):
         """Test API endpoint error handling"""
         with mock.patch.object(GrafanaAPI, 'get_cost_dashboards', side_effect=Exception('API Error')):
             response = self.client.get('/api/dashboards/cost')
             self.assertEqual(response.status_code, 500)
-            data = json.loads(response.data)
+            data = orjson.loads(response.data)
             self.assertIn('error', data)
     
-    def test_dashboard_with_all_parameters(self):
-        """Test dashboard with all possible URL parameters"""
-        # Test with supported custom parameters
-        custom_params = {
-            'from': 'now-60d',
-            'to': 'now',
-            'theme': 'dark'
-        }
-        
-        query_string = '&'.join([f"{k}={v}" for k, v in custom_params.items()])
-        response = self.client.get(f'/dashboard/{self.dashboard_id}?{query_string}')
-        
-        self.assertEqual(response.status_code, 200)
-        
-        # Check that all custom parameters are included in the iframe URL
-        for param, value in custom_params.items():
-            self.assertIn(f'{param}={value}'.encode(), response.data)
-    
     def test_dashboard_response_headers(self):
         """Test that appropriate response headers are set"""
-        response = self.client.get(f'/dashboard/{self.dashboard_id}')
+        response = self.client.get(_DASHBOARD_PATH)
         self.assertEqual(response.content_type, 'text/html; charset=utf-8')
         
         # Security headers recommendation
@@ -236,48 +347,25 @@ class GrafanaCostDashboardE2ETests(unittest.TestCase):
     
     def test_dashboard_html_structure(self):
         """Test the structure of the dashboard HTML page"""
-        response = self.client.get(f'/dashboard/{self.dashboard_id}')
-        self.assertEqual(response.status_code, 200)
-        
-        # Basic HTML structure checks
-        self.assertIn(b'<!DOCTYPE html>', response.data)
-        self.assertIn(b'<html', response.data)
-        self.assertIn(b'<head>', response.data)
-        self.assertIn(b'<body>', response.data)
-        self.assertIn(b'</html>', response.data)
-        
-        # Dashboard-specific elements
-        self.assertIn(b'iframe', response.data)
-        self.assertIn(b'dashboard', response.data.lower())
-    
-    def test_dashboard_content_with_date_range(self):
-        """Test that the dashboard respects date ranges"""
-        from_date = '2023-01-01'
-        to_date = '2023-01-31'
-        
-        response = self.client.get(
-            f'/dashboard/{self.dashboard_id}?from={from_date}&to={to_date}'
-        )
+        response = self.client.get(_DASHBOARD_PATH)
         self.assertEqual(response.status_code, 200)
         
-        # Check that date range parameters are passed correctly
-        self.assertIn(f'from={from_date}'.encode(), response.data)
-        self.assertIn(f'to={to_date}'.encode(), response.data)
+        # Basic HTML structure and dashboard-specific elements, found in one pass
+        seen = {match.lastgroup for match in _HTML_STRUCT_RE.finditer(response.data)}
+        self.assertEqual(_HTML_STRUCT_GROUPS - seen, set(), "Dashboard page is missing HTML markers")
     
     def test_api_response_structure(self):
         """Test the structure of API responses"""
         response = self.client.get('/api/dashboards/cost')
         self.assertEqual(response.status_code, 200)
-        data = json.loads(response.data)
+        data = orjson.loads(response.data)
         
         # Verify it's a list of dashboard objects
         self.assertIsInstance(data, list)
         
         if data:  # If there are dashboards
             dashboard = data[0]
-            required_props = ['id', 'uid', 'title', 'url']
-            for prop in required_props:
-                self.assertIn(prop, dashboard)
+            self.assertLessEqual(_REQUIRED_API_DASHBOARD_PROPS, dashboard.keys())
     
     def test_okta_templates_if_available(self):
         """Test Okta-specific templates if they exist"""
@@ -290,19 +378,24 @@ class GrafanaCostDashboardE2ETests(unittest.TestCase):
             self.assertIn(b'Okta', response.data)
 
 
+@unittest.skipUnless(HAS_GRAFANA_CONFIG, _NO_GRAFANA_CONFIG)
 class GrafanaAPIIntegrationTests(unittest.TestCase):
     """Tests specifically for the Grafana API integration"""
     
     @classmethod
     def setUpClass(cls):
         """Set up test resources for all tests"""
-        # Get Grafana credentials
-        cls.grafana_url = os.environ.get('GRAFANA_URL')
-        cls.grafana_token = os.environ.get('GRAFANA_API_KEY')
-        cls.dashboard_id = os.environ.get('GRAFANA_COST_DASHBOARD_ID')
-        
-        # Initialize the API client
-        cls.api = GrafanaAPI()
+        cls.grafana_url = GRAFANA_URL
+        cls.grafana_token = GRAFANA_TOKEN
+        cls.dashboard_id = DASHBOARD_ID
+        cls.api = _API
+        
+        # Fetch once for the whole class; in this order the cost filter reuses
+        # the cached search and the panels reuse the cached dashboard
+        cls._all = cls.api.get_all_dashboards()
+        cls._cost = cls.api.get_cost_dashboards()
+        cls._dashboard = cls.api.get_dashboard(cls.dashboard_id)
+        cls._panels = cls.api.get_dashboard_panels(cls.dashboard_id)
     
     def test_api_initialization(self):
         """Test that the GrafanaAPI is initialized correctly"""
@@ -311,20 +404,18 @@ class GrafanaAPIIntegrationTests(unittest.TestCase):
         
     def test_get_all_dashboards(self):
         """Test retrieving all dashboards"""
-        dashboards = self.api.get_all_dashboards()
+        dashboards = self._all
         
         self.assertIsInstance(dashboards, list)
         self.assertTrue(len(dashboards) > 0, "No dashboards returned from the API")
         
         if dashboards:
             dashboard = dashboards[0]
-            required_props = ['id', 'uid', 'title']
-            for prop in required_props:
-                self.assertIn(prop, dashboard)
+            self.assertLessEqual(_DASHBOARD_SUMMARY_PROPS, dashboard.keys())
     
     def test_get_dashboard(self):
         """Test retrieving a specific dashboard"""
-        dashboard = self.api.get_dashboard(self.dashboard_id)
+        dashboard = self._dashboard
         
         self.assertIn('dashboard', dashboard)
         self.assertIn('meta', dashboard)
@@ -335,38 +426,34 @@ class GrafanaAPIIntegrationTests(unittest.TestCase):
     
     def test_get_dashboard_panels(self):
         """Test retrieving panels from a dashboard"""
-        panels = self.api.get_dashboard_panels(self.dashboard_id)
+        panels = self._panels
         
         self.assertIsInstance(panels, list)
         self.assertTrue(len(panels) > 0, "No panels found in dashboard")
         
         if panels:
             panel = panels[0]
-            required_props = ['id', 'type', 'title']
-            for prop in required_props:
-                self.assertIn(prop, panel)
+            self.assertLessEqual(_PANEL_SUMMARY_PROPS, panel.keys())
     
     def test_get_cost_dashboards(self):
         """Test filtering for cost-related dashboards"""
-        cost_dashboards = self.api.get_cost_dashboards()
+        cost_dashboards = self._cost
         
         self.assertIsInstance(cost_dashboards, list)
         
         for dashboard in cost_dashboards:
-            required_props = ['id', 'uid', 'title']
-            for prop in required_props:
-                self.assertIn(prop, dashboard)
+            self.assertLessEqual(_DASHBOARD_SUMMARY_PROPS, dashboard.keys())
     
     def test_generate_dashboard_embed_url(self):
         """Test URL generation for dashboard embedding"""
         url = self.api.generate_dashboard_embed_url(self.dashboard_id)
         
         self.assertIn(self.grafana_url, url)
-        self.assertIn(f'd/{self.dashboard_id}', url)
-        self.assertIn('from=', url)
-        self.assertIn('to=', url)
-        self.assertIn('theme=', url)
-        self.assertIn('kiosk', url)
+        parts = urlsplit(url)
+        self.assertIn(f'd/{self.dashboard_id}', parts.path)
+        query = parse_qs(parts.query, keep_blank_values=True)
+        for param in ('from', 'to', 'theme', 'kiosk'):
+            self.assertIn(param, query)
 
 
 if __name__ == '__main__':
@@ -1,8 +1,9 @@
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 import os
+import re
 import sys
-import requests
+import requests_mock
 
 # Add project root to sys.path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -10,20 +11,16 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 from app import get_insights_from_gemini, set_gemini_testing_mode
 from config import GEMINI_API_URL, GEMINI_API_ENDPOINT  # Import URL variables but not the key
 
+# Any generateContent call, whatever the API version, model or query string
+_GENERATE_CONTENT = re.compile(r'.*:generateContent.*')
+
 class TestGeminiAPI(unittest.TestCase):
 
-    def setUp(self):
-        """Set up for test methods."""
-        # Ensure testing mode is off by default for these tests
-        set_gemini_testing_mode(enable=False)
-        
-        # Save any existing API key
-        self.original_api_key = os.environ.get('GEMINI_API_KEY')
-        # Set test API key consistently
-        os.environ['GEMINI_API_KEY'] = 'test_api_key'
-        
+    @classmethod
+    def setUpClass(cls):
+        """Build the expected Gemini endpoint once; it is the same for every test."""
         # Ensure we're using the correct API endpoint format (matching app.py implementation)
-        self.model_name = "gemini-2.0-flash-thinking-exp"
+        cls.model_name = "gemini-2.0-flash-thinking-exp"
         
         # Mimic the same logic used in app.py to construct the endpoint
         api_base = GEMINI_API_ENDPOINT
@@ -38,8 +35,18 @@ class TestGeminiAPI(unittest.TestCase):
             else:
                 api_base = f"{api_base}/v1beta"
                 
-        self.api_endpoint_base = api_base
-        self.expected_api_endpoint = f"{self.api_endpoint_base}/models/{self.model_name}:generateContent"
+        cls.api_endpoint_base = api_base
+        cls.expected_api_endpoint = f"{cls.api_endpoint_base}/models/{cls.model_name}:generateContent"
+
+    def setUp(self):
+        """Set up for test methods."""
+        # Ensure testing mode is off by default for these tests
+        set_gemini_testing_mode(enable=False)
+        
+        # Save any existing API key
+        self.original_api_key = os.environ.get('GEMINI_API_KEY')
+        # Set test API key consistently
+        os.environ['GEMINI_API_KEY'] = 'test_api_key'
 
     def tearDown(self):
         """Clean up after test methods."""
@@ -53,14 +60,11 @@ class TestGeminiAPI(unittest.TestCase):
         set_gemini_testing_mode(enable=False)
 
     @patch('app.GEMINI_API_KEY', 'test_api_key')  # Mock the imported API key directly
-    @patch('app.requests.post')
-    def test_gemini_api_call_success(self, mock_post):
+    @requests_mock.Mocker()
+    def test_gemini_api_call_success(self, mock_http):
         """Test successful Gemini API call with dashboard data."""
-        # Mock the requests.post response
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        # Updated mock response structure for v1beta
-        mock_response.json.return_value = {
+        # Answer generateContent with the v1beta response structure
+        mock_http.post(_GENERATE_CONTENT, status_code=200, json={
             'candidates': [{
                 'content': {
                     'parts': [{
@@ -69,50 +73,47 @@ class TestGeminiAPI(unittest.TestCase):
                     'role': 'model'
                 }
             }]
-        }
-        mock_post.return_value = mock_response
+        })
 
         dashboard_data = {'title': 'Test Dashboard', 'panels': []}
         insights = get_insights_from_gemini(dashboard_data)
 
-        # Verify requests.post was called correctly
-        mock_post.assert_called_once()
-        args, kwargs = mock_post.call_args
+        # Verify exactly one request was sent, to the right endpoint
+        self.assertEqual(mock_http.call_count, 1)
+        request = mock_http.last_request
         
         # Check that the URL contains the expected endpoint path (more flexible check)
-        self.assertIn(f"models/{self.model_name}:generateContent", args[0])
-        self.assertIn(f"v1beta", args[0])
-        self.assertIn(f"key=test_api_key", args[0])
+        self.assertIn(f"models/{self.model_name}:generateContent", request.url)
+        self.assertIn(f"v1beta", request.url)
+        self.assertIn(f"key=test_api_key", request.url)
         
         # Check the payload structure
-        self.assertIn('contents', kwargs['json'])
-        self.assertIn('generationConfig', kwargs['json'])
-        self.assertEqual(kwargs['json']['contents'][0]['parts'][0]['text'], 
+        payload = request.json()
+        self.assertIn('contents', payload)
+        self.assertIn('generationConfig', payload)
+        self.assertEqual(payload['contents'][0]['parts'][0]['text'], 
                          'Analyze this Grafana dashboard structure and provide specific cost optimization recommendations for Databricks usage. Focus on query efficiency, resource utilization, and storage optimization.\n\nDashboard: {\n  "title": "Test Dashboard",\n  "panels": []\n}')
 
         # Verify the result
         self.assertEqual(insights, 'Successful analysis based on dashboard.')
 
     @patch('app.GEMINI_API_KEY', 'test_api_key')  # Mock the imported API key directly
-    @patch('app.requests.post')
-    def test_gemini_api_call_failure(self, mock_post):
+    @requests_mock.Mocker()
+    def test_gemini_api_call_failure(self, mock_http):
         """Test Gemini API call failure."""
-        # Mock the requests.post response for failure
-        mock_response = MagicMock()
-        mock_response.status_code = 500
-        mock_response.text = 'Internal Server Error'
-        mock_post.return_value = mock_response
+        # Answer generateContent with a server error
+        mock_http.post(_GENERATE_CONTENT, status_code=500, text='Internal Server Error')
 
         dashboard_data = {'title': 'Test Dashboard', 'panels': []}
         insights = get_insights_from_gemini(dashboard_data)
 
-        # Verify requests.post was called
-        mock_post.assert_called_once()
-        args, kwargs = mock_post.call_args
+        # Verify exactly one request was sent
+        self.assertEqual(mock_http.call_count, 1)
+        url = mock_http.last_request.url
         
         # Check that the URL contains the expected endpoint path (more flexible check)
-        self.assertIn(f"models/{self.model_name}:generateContent", args[0])
-        self.assertIn(f"v1beta", args[0])
+        self.assertIn(f"models/{self.model_name}:generateContent", url)
+        self.assertIn(f"v1beta", url)
 
         # Verify the error message
         self.assertIn("Error calling Gemini API:", insights)
@@ -0,0 +1,49 @@
+import unittest
+from unittest import mock
+
+from grafana_api import GrafanaAPI
+from grafana_cache import CacheBackend
+
+class DictBackend(CacheBackend):
+    """In-memory stand-in for DiskCache/RedisCache"""
+
+    def __init__(self):
+        self.store = {}
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def set(self, key, value, ttl):
+        self.store[key] = value
+
+    def delete(self, key):
+        self.store.pop(key, None)
+
+    def clear(self, kind=None):
+        self.store.clear()
+
+class TestInvalidate(unittest.TestCase):
+    """Test cases for dropping persistent cache entries written by @cached"""
+
+    def setUp(self):
+        self.backend = DictBackend()
+        self.api = GrafanaAPI(base_url="http://grafana.test", use_pool=False, cache_backend=self.backend)
+
+    def test_invalidate_refetches_dashboard(self):
+        """After invalidate(uid) the next read goes back to Grafana"""
+        with mock.patch.object(self.api, '_get_conditional', side_effect=[{"version": 1}, {"version": 2}]) as fetch:
+            self.assertEqual(self.api.get_dashboard("u1"), {"version": 1})
+            self.api.invalidate("u1")
+            self.assertEqual(self.api.get_dashboard("u1"), {"version": 2})
+        self.assertEqual(fetch.call_count, 2)
+
+    def test_invalidate_drops_search_entry(self):
+        """invalidate(uid) also removes the persisted dashboard search"""
+        with mock.patch.object(self.api, '_get', return_value=[{"uid": "u1"}]):
+            self.api._fetch_all_dashboards()
+        self.assertEqual(len(self.backend.store), 1)
+        self.api.invalidate("u1")
+        self.assertEqual(self.backend.store, {})
+
+if __name__ == '__main__':
+    unittest.main()
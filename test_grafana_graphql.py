@@ -0,0 +1,60 @@
+import unittest
+from unittest import mock
+from graphql import parse, print_ast
+
+from grafana_api import GrafanaAPI
+from grafana_graphql import GrafanaMCPGraphQL, CostMetricsLoader, _normalize_query, _requested_cost_kinds
+
+class TestNormalizeQuery(unittest.TestCase):
+    """Test cases for the whitespace normalization in front of the query cache"""
+
+    def test_formatting_variants_share_entry(self):
+        """Queries differing only in indentation and blank runs normalize to the same text"""
+        compact = "query {\n  dashboard(uid: $uid) { uid  title }\n}"
+        spread = "\n\n    query {\n        dashboard(uid: $uid)   {   uid title }\n\n    }\n"
+        self.assertEqual(_normalize_query(compact), _normalize_query(spread))
+
+    def test_comment_line_keeps_rest_of_query(self):
+        """A # comment must not swallow the lines after it"""
+        query = "query {\n  # list metrics\n  __typename\n}"
+        normalized = _normalize_query(query)
+
+        self.assertEqual(normalized, "query {\n# list metrics\n__typename\n}")
+        self.assertEqual(print_ast(parse(normalized)), print_ast(parse(query)))
+
+class TestCostMetricsLoader(unittest.TestCase):
+    """Test cases for per-kind results of the batched cost metric fetch"""
+
+    def setUp(self):
+        self.api = GrafanaAPI(base_url="http://grafana.test", use_pool=False)
+        compute = mock.patch.object(self.api, 'get_compute_cost_metrics',
+                                    return_value=[{"name": "cpu", "value": 1.0, "unit": "USD", "timestamp": "t"}])
+        storage = mock.patch.object(self.api, 'get_storage_cost_metrics', side_effect=RuntimeError("storage down"))
+        self.compute = compute.start()
+        self.storage = storage.start()
+        self.addCleanup(mock.patch.stopall)
+
+    def test_failed_kind_only_fails_itself(self):
+        """A failing category raises for its own key; the sibling is served from the one batch"""
+        loader = CostMetricsLoader(self.api, {'compute', 'storage'})
+        with self.assertRaises(RuntimeError):
+            loader.load(("u1", "30d", "storage"))
+        self.assertEqual(loader.load(("u1", "30d", "compute"))[0]["name"], "cpu")
+        self.assertEqual(self.compute.call_count, 1)
+        self.assertEqual(self.storage.call_count, 1)
+
+    def test_literal_unknown_kind_is_not_batched(self):
+        """allCostMetrics(kind: "bogus") is not passed on to the batch fetch"""
+        document = parse('{ allCostMetrics(dashboardUid: "u1", kind: "bogus") { name } }')
+        self.assertEqual(_requested_cost_kinds(document), frozenset())
+
+    def test_unknown_kind_leaves_sibling_fields(self):
+        """A bogus kind empties its own field only"""
+        result = GrafanaMCPGraphQL(self.api).execute_query(
+            '{ bogus: allCostMetrics(dashboardUid: "u1", kind: "bogus") { name } '
+            'compute: allCostMetrics(dashboardUid: "u1", kind: "compute") { name } }'
+        )
+        self.assertEqual(result["data"], {"bogus": [], "compute": [{"name": "cpu"}]})
+
+if __name__ == '__main__':
+    unittest.main()
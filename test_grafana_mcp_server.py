@@ -0,0 +1,159 @@
+import gzip
+import http.client
+import threading
+import time
+import unittest
+from unittest import mock
+
+import orjson
+
+import grafana_mcp_server
+from grafana_mcp_server import MCPServer, StreamingResponse, start_mcp_server
+
+def _wait_for(condition, timeout=5):
+    """Poll condition() until it is true; fail the test after timeout seconds"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached in time")
+        time.sleep(0.01)
+
+class TestGeminiSingleFlight(unittest.TestCase):
+    """Test cases for sharing one in-flight Gemini call between identical prompts"""
+
+    def setUp(self):
+        self.server = MCPServer(port=0)
+        self.release = threading.Event()
+        self.calls = 0
+
+    def _run_concurrently(self, count):
+        """Call _call_gemini_api("prompt") from count threads; returns results or exceptions"""
+        results = [None] * count
+
+        def call(i):
+            try:
+                results[i] = self.server._call_gemini_api("prompt")
+            except Exception as e:
+                results[i] = e
+
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        # Every caller has registered as owner or waiter once it counted its miss
+        _wait_for(lambda: self.server._gemini_misses == count)
+        self.release.set()
+        for thread in threads:
+            thread.join(5)
+        return results
+
+    def test_identical_prompts_make_one_call(self):
+        """Concurrent identical prompts share the owner's upstream request"""
+        def request(prompt):
+            self.calls += 1
+            self.release.wait(5)
+            return "answer"
+
+        with mock.patch.object(self.server, '_request_gemini', side_effect=request):
+            results = self._run_concurrently(5)
+
+        self.assertEqual(results, ["answer"] * 5)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self.server._gemini_inflight, {})
+
+    def test_owner_exception_reaches_waiters(self):
+        """A failed upstream call raises in every waiter and is not cached"""
+        def request(prompt):
+            self.calls += 1
+            self.release.wait(5)
+            raise RuntimeError("upstream down")
+
+        with mock.patch.object(self.server, '_request_gemini', side_effect=request):
+            results = self._run_concurrently(4)
+            self.assertTrue(all(isinstance(r, RuntimeError) for r in results))
+            self.assertEqual(self.calls, 1)
+            self.assertEqual(self.server._gemini_inflight, {})
+            # The next call goes upstream again
+            with self.assertRaises(RuntimeError):
+                self.server._call_gemini_api("prompt")
+        self.assertEqual(self.calls, 2)
+
+class FakeStream:
+    """Open streamGenerateContent response yielding one SSE text chunk"""
+
+    closed = False
+
+    def iter_lines(self):
+        line = 'data: {"candidates":[{"content":{"parts":[{"text":"hi"}]}}]}'
+        return iter([line if grafana_mcp_server._HTTPX is not None else line.encode('utf-8')])
+
+    def close(self):
+        self.closed = True
+
+class TestStreamRelay(unittest.TestCase):
+    """Test cases for generate_recommendations(stream=True)"""
+
+    def setUp(self):
+        self.server = MCPServer(port=0)
+
+    def test_upstream_error_is_an_error_response(self):
+        """Failures opening the stream surface before any NDJSON is produced"""
+        with mock.patch.object(grafana_mcp_server, '_open_gemini_stream', side_effect=RuntimeError("429")):
+            result = self.server.generate_recommendations({"panels": []}, stream=True)
+        self.assertEqual(result.status, "error")
+
+    def test_completed_stream_is_closed_and_cached(self):
+        """The relay closes the upstream response and replays the answer from cache"""
+        upstream = FakeStream()
+        with mock.patch.object(grafana_mcp_server, '_open_gemini_stream', return_value=upstream) as open_stream:
+            first = self.server.generate_recommendations({"panels": []}, stream=True)
+            self.assertIsInstance(first, StreamingResponse)
+            self.assertEqual(list(first.chunks), [b'{"text":"hi"}\n'])
+            second = self.server.generate_recommendations({"panels": []}, stream=True)
+            self.assertEqual(list(second.chunks), [b'{"text":"hi"}\n'])
+        self.assertTrue(upstream.closed)
+        self.assertEqual(open_stream.call_count, 1)
+
+class TestRequestBodies(unittest.TestCase):
+    """Test cases for request body limits on the http.server transport"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = start_mcp_server(port=0)
+        cls.port = cls.server.server.server_address[1]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+        cls.server.server.server_close()
+
+    def _post(self, body, headers):
+        """POST body to get_cache_stats; returns the response status"""
+        connection = http.client.HTTPConnection("localhost", self.port, timeout=5)
+        self.addCleanup(connection.close)
+        connection.request("POST", "/actions/get_cache_stats", body=body, headers=headers)
+        response = connection.getresponse()
+        response.read()
+        return response.status
+
+    def test_gzip_body(self):
+        """A gzip-encoded JSON body is decompressed before parsing"""
+        status = self._post(gzip.compress(orjson.dumps({})), {"Content-Encoding": "gzip"})
+        self.assertEqual(status, 200)
+
+    def test_gzip_bomb_is_rejected(self):
+        """A body inflating past _MAX_BODY answers 413"""
+        with mock.patch.object(grafana_mcp_server, '_MAX_BODY', 1024):
+            status = self._post(gzip.compress(b" " * 4096), {"Content-Encoding": "gzip"})
+        self.assertEqual(status, 413)
+
+    def test_invalid_gzip_is_rejected(self):
+        """A body that is not gzip data answers 400"""
+        self.assertEqual(self._post(b"{}", {"Content-Encoding": "gzip"}), 400)
+
+    def test_oversized_content_length_is_rejected(self):
+        """A declared length past _MAX_BODY answers 413 before the body is read"""
+        with mock.patch.object(grafana_mcp_server, '_MAX_BODY', 1024):
+            self.assertEqual(self._post(b" " * 2048, {}), 413)
+
+if __name__ == '__main__':
+    unittest.main()
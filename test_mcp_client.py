@@ -0,0 +1,92 @@
+import unittest
+from unittest import mock
+
+import orjson
+import requests_mock
+
+import mcp_client
+from mcp_client import MCPClient, _query_hash
+
+_BASE = "http://mcp.test:8090"
+_QUERY = "query { costDashboards { uid } }"
+_MUTATION = 'mutation { deleteDashboard(uid: "u1") { success } }'
+
+def _ok(data):
+    return {"json": {"status": "success", "data": data}}
+
+class TestPersistedQueries(unittest.TestCase):
+    """Test cases for automatic persisted queries in execute_graphql"""
+
+    def setUp(self):
+        self.client = MCPClient(host="mcp.test", cache_ttls={"graphql": 0})
+        self.addCleanup(self.client.close)
+
+    def test_first_use_sends_full_query(self):
+        """An unknown query goes out with its text; afterwards only the hash is sent"""
+        with requests_mock.Mocker() as mocker:
+            mocker.post(f"{_BASE}/actions/graphql", [_ok({}), _ok({})])
+            self.client.execute_graphql(_QUERY)
+            self.client.execute_graphql(_QUERY)
+        first, second = (orjson.loads(r.body) for r in mocker.request_history)
+        self.assertEqual(first["query"], _QUERY)
+        self.assertNotIn("query", second)
+        self.assertEqual(second["extensions"]["persistedQuery"]["sha256Hash"], _query_hash(_QUERY))
+
+    def test_not_found_falls_back_to_full_query(self):
+        """PersistedQueryNotFound for a hash-only request is retried with the text"""
+        self.client._persisted.add(_query_hash(_QUERY))
+        with requests_mock.Mocker() as mocker:
+            mocker.post(f"{_BASE}/actions/graphql", [
+                {"json": {"status": "error", "error": "PersistedQueryNotFound"}},
+                _ok({"costDashboards": []}),
+            ])
+            result = self.client.execute_graphql(_QUERY)
+        self.assertEqual(result, {"costDashboards": []})
+        retry = orjson.loads(mocker.request_history[1].body)
+        self.assertEqual(retry["query"], _QUERY)
+
+class TestResultCache(unittest.TestCase):
+    """Test cases for the per-action client result cache"""
+
+    def setUp(self):
+        self.client = MCPClient(host="mcp.test")
+        self.addCleanup(self.client.close)
+
+    def test_identical_query_is_cached(self):
+        """A repeated GraphQL query is answered from the cache"""
+        params = {"query": _QUERY}
+        with requests_mock.Mocker() as mocker:
+            mocker.post(f"{_BASE}/actions/graphql", json={"status": "success", "data": {"n": 1}})
+            self.client.execute_action("graphql", params)
+            self.client.execute_action("graphql", params)
+        self.assertEqual(mocker.call_count, 1)
+
+    def test_mutations_are_not_cached(self):
+        """Every GraphQL mutation reaches the server"""
+        params = {"query": _MUTATION}
+        with requests_mock.Mocker() as mocker:
+            mocker.post(f"{_BASE}/actions/graphql", json={"status": "success", "data": {}})
+            self.client.execute_action("graphql", params)
+            self.client.execute_action("graphql", params)
+        self.assertEqual(mocker.call_count, 2)
+
+class TestBackgroundJobs(unittest.TestCase):
+    """Test cases for actions answered with "accepted" and a job id"""
+
+    def test_accepted_action_polls_get_job(self):
+        """The client polls get_job until the job is no longer pending"""
+        client = MCPClient(host="mcp.test", cache_ttls={"analyze_cost_patterns": 0})
+        self.addCleanup(client.close)
+        with requests_mock.Mocker() as mocker, mock.patch.object(mcp_client, 'JOB_POLL_INTERVAL', 0):
+            mocker.post(f"{_BASE}/actions/analyze_cost_patterns",
+                        json={"status": "accepted", "data": {"job_id": "j1"}})
+            jobs = mocker.post(f"{_BASE}/actions/get_job", [
+                {"json": {"status": "pending", "data": {"job_id": "j1"}}},
+                _ok({"analysis": "done"}),
+            ])
+            result = client.execute_action("analyze_cost_patterns", {"data": [], "async_job": True})
+        self.assertEqual(result, {"analysis": "done"})
+        self.assertEqual(jobs.call_count, 2)
+
+if __name__ == '__main__':
+    unittest.main()